@@ -0,0 +1,231 @@
+# --- File: app/analytics.py ---
+# Batch pipeline deriving dso_analytics.csv and collection_performance.csv from source tables
+
+import os
+import tempfile
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from .data_loaders import DataLoader
+from .dso import DSOEngine
+from .schemas import get_schema, parse_dataset
+from .sidecars import sidecars_available, write_sidecar
+from .utils import AGING_BOUNDARIES
+
+DSO_ANALYTICS_FILE = 'dso_analytics.csv'
+COLLECTION_PERFORMANCE_FILE = 'collection_performance.csv'
+# dso_analytics columns holding AR per aging bucket, in aging_buckets() label order
+BUCKET_COLUMNS = ('current_ar', 'ar_1_30_days', 'ar_31_60_days', 'ar_61_90_days', 'ar_over_90_days')
+
+
+def monthly_dso_analytics(invoices, disputes=None, months=None):
+    """
+    One dso_analytics row per month: revenue, AR at month end (total and by
+    aging bucket), DSO, CEI and invoice counts.
+
+    AR follows the balance basis of DSOEngine: an invoice carries its
+    balance_amount until it is paid. CEI is (opening AR + month's billing -
+    closing AR) / (opening AR + month's billing). months defaults to every
+    month from the first to the last invoice date.
+
+    Invoices paid before the month preceding months (whose closing AR is
+    the first opening AR) add nothing to these rows and are dropped first,
+    so a few recent months cost in proportion to the invoices open or
+    raised since then rather than the whole history.
+    """
+    if months is None:
+        invoice_month = invoices['invoice_date'].dt.to_period('M')
+        months = pd.period_range(invoice_month.min(), invoice_month.max(), freq='M')
+    months = pd.PeriodIndex(months, freq='M')
+    if not len(months):
+        return pd.DataFrame(columns=_dso_analytics_columns())
+
+    since = (months[0] - 1).start_time
+    settled = (invoices['payment_status'] == 'Paid') & (invoices['payment_date'] < since)
+    invoices = invoices[~settled | (invoices['invoice_date'] >= since)]
+    invoice_month = invoices['invoice_date'].dt.to_period('M')
+    engine = DSOEngine(invoices)
+    dso = engine.dso(freq='M', start=months[0] - 1, end=months[-1]).set_index('period')
+    opening_ar = dso['ar'].shift(1).reindex(months.astype(str)).fillna(0).to_numpy()
+    dso = dso.reindex(months.astype(str))
+
+    in_month = invoices.groupby(invoice_month, observed=True)
+    billed = in_month['total_amount'].sum().reindex(months, fill_value=0).to_numpy()
+    counts = in_month.size().reindex(months, fill_value=0).to_numpy()
+    paid = invoices[invoices['payment_status'] == 'Paid'].groupby(invoice_month, observed=True).size()
+    disputed_ids = disputes['invoice_id'].unique() if disputes is not None else []
+    disputed = invoices[invoices['invoice_id'].isin(disputed_ids)].groupby(invoice_month, observed=True).size()
+
+    closing_ar = dso['ar'].to_numpy()
+    credit = opening_ar + billed
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cei = np.where(credit > 0, (credit - closing_ar) / credit * 100, 0.0)
+
+    result = pd.DataFrame({
+        'month': months.astype(str),
+        'total_revenue': dso['sales'].to_numpy(),
+        'total_ar': closing_ar,
+        'dso': np.rint(np.nan_to_num(dso['dso'].to_numpy())).astype(np.int32),
+    })
+    buckets = _month_end_buckets(invoices, months)
+    for column in BUCKET_COLUMNS:
+        result[column] = buckets[column]
+    result['cei_percentage'] = np.round(cei, 2)
+    result['invoices_count'] = counts.astype(np.int32)
+    result['paid_invoices'] = paid.reindex(months, fill_value=0).to_numpy().astype(np.int32)
+    result['disputed_invoices'] = disputed.reindex(months, fill_value=0).to_numpy().astype(np.int32)
+    return result[_dso_analytics_columns()]
+
+
+def collection_performance(cases, as_of=None):
+    """
+    One collection_performance row per collector from collection_cases:
+    case counts, resolution and escalation rates, amounts and CEI
+    (collected / assigned). Collectors appear in order of their first case.
+    """
+    as_of = pd.Timestamp(as_of if as_of is not None else datetime.now().date())
+    resolved = cases['status'] == 'Resolved'
+    frame = pd.DataFrame({
+        'collector_id': cases['collector_id'].astype(object),
+        'collector_name': cases['assigned_to'].astype(object),
+        'resolved': resolved,
+        'escalated': cases['status'] == 'Escalated',
+        'amount_due': cases['amount_due'],
+        'collected': cases['amount_due'].where(resolved, 0.0),
+        'resolution_days': (cases['resolution_date'] - cases['case_open_date']).dt.days.where(resolved),
+    })
+    grouped = frame.groupby('collector_id', sort=False)
+    result = grouped.agg(
+        collector_name=('collector_name', 'first'),
+        total_cases=('resolved', 'size'),
+        resolved_cases=('resolved', 'sum'),
+        escalated_cases=('escalated', 'sum'),
+        amount_assigned=('amount_due', 'sum'),
+        amount_collected=('collected', 'sum'),
+        avg_resolution_days=('resolution_days', 'mean'),
+    ).reset_index()
+    result['resolution_rate'] = result['resolved_cases'] / result['total_cases'] * 100
+    result['escalation_rate'] = result['escalated_cases'] / result['total_cases'] * 100
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result['cei_percentage'] = np.where(
+            result['amount_assigned'] > 0, result['amount_collected'] / result['amount_assigned'] * 100, 0.0)
+    result['avg_resolution_days'] = result['avg_resolution_days'].fillna(0.0).round(1)
+    for column in ('resolution_rate', 'escalation_rate', 'cei_percentage'):
+        result[column] = result[column].round(2)
+    result['assessment_date'] = as_of.strftime('%Y-%m-%d')
+    return result[[
+        'collector_id', 'collector_name', 'total_cases', 'resolved_cases', 'escalated_cases',
+        'resolution_rate', 'escalation_rate', 'amount_assigned', 'amount_collected',
+        'avg_resolution_days', 'cei_percentage', 'assessment_date',
+    ]]
+
+
+def run_pipeline(data_dir=None, full=False, as_of=None):
+    """
+    Regenerate dso_analytics.csv and collection_performance.csv in data_dir.
+
+    Months already in dso_analytics.csv are treated as closed; only the
+    latest stored month (which may have been partial) and newer months are
+    computed, from the invoices still open or raised in them, unless
+    full=True. collection_performance is a single aggregation over
+    collection_cases and is always recomputed for every collector. Both
+    files are rewritten atomically together with their typed columnar
+    sidecars. Returns a summary dict.
+    """
+    loader = DataLoader(data_dir=data_dir)
+    invoices = loader.get_invoice_data()
+    disputes = loader.get_disputes() if os.path.exists(os.path.join(loader.data_dir, 'disputes.csv')) else None
+
+    invoice_month = invoices['invoice_date'].dt.to_period('M')
+    all_months = pd.period_range(invoice_month.min(), invoice_month.max(), freq='M')
+    existing = None
+    if not full and os.path.exists(os.path.join(loader.data_dir, DSO_ANALYTICS_FILE)):
+        existing = loader.get_dso_analytics()
+        if len(existing):
+            stored = pd.PeriodIndex(existing['month'], freq='M')
+            last_closed = stored[-1] - 1
+            existing = existing[stored <= last_closed]
+            all_months = all_months[all_months > last_closed]
+
+    computed = monthly_dso_analytics(invoices, disputes, all_months)
+    if existing is not None and len(existing):
+        analytics = pd.concat([existing[computed.columns], computed], ignore_index=True)
+    else:
+        analytics = computed
+    write_dataset(loader.data_dir, DSO_ANALYTICS_FILE, analytics)
+
+    performance = collection_performance(loader.get_collection_cases(), as_of=as_of)
+    write_dataset(loader.data_dir, COLLECTION_PERFORMANCE_FILE, performance)
+    return {
+        'months_computed': list(computed['month']),
+        'months_total': len(analytics),
+        'collectors': len(performance),
+    }
+
+
+def _dso_analytics_columns():
+    return ['month', 'total_revenue', 'total_ar', 'dso', *BUCKET_COLUMNS,
+            'cei_percentage', 'invoices_count', 'paid_invoices', 'disputed_invoices']
+
+
+def _month_end_buckets(invoices, months):
+    """
+    AR per aging bucket at each month end (invoices open at that date, aged on it).
+
+    An invoice is open over a run of consecutive month ends and moves up one
+    bucket at a time, so each (invoice, bucket) pair covers a contiguous
+    range of month ends. Balances are added at the start of each range and
+    removed at its end, in integer cents, and a cumulative sum gives every
+    month at once.
+    """
+    ends = months.end_time.normalize().to_numpy().astype('datetime64[D]').astype('int64')
+    count = len(ends)
+
+    def day_numbers(column):
+        values = invoices[column].to_numpy(dtype='datetime64[D]')
+        return np.isnat(values), values.astype('int64')
+
+    no_invoice_date, raised = day_numbers('invoice_date')
+    no_payment_date, paid_on = day_numbers('payment_date')
+    no_due_date, due = day_numbers('due_date')
+    is_paid = (invoices['payment_status'] == 'Paid').to_numpy()
+    cents = np.rint(invoices['balance_amount'].fillna(0).to_numpy(dtype='float64') * 100).astype(np.int64)
+
+    # Month-end index range [first, last) over which each invoice is open
+    first = np.where(no_invoice_date, count, np.searchsorted(ends, raised, side='left'))
+    last = np.where(is_paid, np.where(no_payment_date, 0, np.searchsorted(ends, paid_on, side='left')), count)
+    # First month-end index in each bucket (right-inclusive boundaries); no due date: the oldest bucket
+    entered = [np.zeros(len(invoices), dtype=np.int64)]
+    for boundary in AGING_BOUNDARIES:
+        entered.append(np.where(no_due_date, 0, np.searchsorted(ends, due + boundary + 1, side='left')))
+    entered.append(np.full(len(invoices), count))
+
+    buckets = {}
+    for code, column in enumerate(BUCKET_COLUMNS):
+        start = np.maximum(first, entered[code])
+        stop = np.minimum(last, entered[code + 1])
+        spans = start < stop
+        delta = (np.bincount(start[spans], weights=cents[spans], minlength=count + 1)
+                 - np.bincount(stop[spans], weights=cents[spans], minlength=count + 1))
+        buckets[column] = np.cumsum(np.rint(delta).astype(np.int64))[:count] / 100
+    return buckets
+
+
+def write_dataset(data_dir, filename, df):
+    """Atomically replace data_dir/filename with df and write its typed sidecar."""
+    path = os.path.join(data_dir, filename)
+    schema = get_schema(filename)
+    if schema is not None:
+        # Percent columns are stored as "12.34%" strings like the generated files
+        df = schema.format(df)
+    fd, tmp_path = tempfile.mkstemp(dir=data_dir, suffix='.tmp')
+    os.close(fd)
+    try:
+        df.to_csv(tmp_path, index=False, float_format='%.2f')
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    if sidecars_available():
+        # Parse back through the schema so the sidecar has exactly the types the views load
+        write_sidecar(path, parse_dataset(path))
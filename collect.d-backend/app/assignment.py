@@ -0,0 +1,198 @@
+# --- File: app/assignment.py ---
+# Rebalancing open collection cases across collectors (greedy, capacity-aware)
+
+import heapq
+import numpy as np
+import pandas as pd
+
+CLOSED_STATUSES = ('Resolved',)
+PRIORITY_RANK = {'Critical': 4, 'High': 3, 'Medium': 2, 'Low': 1}
+# Case-count capacity as a multiple of the average open cases per collector
+DEFAULT_CAPACITY_FACTOR = 1.25
+# Resolution rates are shrunk towards the book-wide rate with this many pseudo-cases
+RATE_PRIOR_CASES = 20
+# Workload weight is RATE_FLOOR + resolution rate, so a perfect record earns 3x a zero record
+RATE_FLOOR = 0.5
+# Collectors keep their own cases up to this much over target, so a balanced book isn't reshuffled
+KEEP_TOLERANCE = 0.10
+DIFF_COLUMNS = ['case_id', 'invoice_id', 'customer_id', 'priority', 'amount_due',
+                'from_collector_id', 'from_collector', 'to_collector_id', 'to_collector']
+
+
+def collector_profiles(cases, capacity=None, capacity_factor=DEFAULT_CAPACITY_FACTOR):
+    """
+    One row per collector in cases: name, historical resolution rate
+    (shrunk towards the book-wide rate, so a handful of cases doesn't swing
+    it), case capacity and the share of open workload they should carry
+    (proportional to RATE_FLOOR + resolution rate; equal when nobody has a
+    history). capacity may be a number or a mapping of collector_id to
+    open-case capacity.
+    """
+    frame = pd.DataFrame({
+        'collector_id': cases['collector_id'].astype(object).to_numpy(),
+        'collector_name': cases['assigned_to'].astype(object).to_numpy(),
+        'resolved': (cases['status'] == 'Resolved').to_numpy(),
+        'open': ~cases['status'].isin(CLOSED_STATUSES).to_numpy(),
+    })
+    profiles = frame.groupby('collector_id', sort=True).agg(
+        collector_name=('collector_name', 'first'),
+        total_cases=('resolved', 'size'),
+        resolved_cases=('resolved', 'sum'),
+        open_cases=('open', 'sum'),
+    )
+    book_rate = profiles['resolved_cases'].sum() / max(profiles['total_cases'].sum(), 1)
+    profiles['resolution_rate'] = (
+        (profiles['resolved_cases'] + RATE_PRIOR_CASES * book_rate) / (profiles['total_cases'] + RATE_PRIOR_CASES))
+    weight = RATE_FLOOR + profiles['resolution_rate']
+    profiles['share'] = weight / weight.sum()
+    if capacity is None:
+        average = profiles['open_cases'].sum() / max(len(profiles), 1)
+        profiles['capacity'] = int(np.ceil(average * capacity_factor))
+    elif isinstance(capacity, dict):
+        profiles['capacity'] = profiles.index.map(capacity).fillna(0).astype(int)
+    else:
+        profiles['capacity'] = int(capacity)
+    return profiles
+
+
+def rebalance(cases, capacity=None, capacity_factor=DEFAULT_CAPACITY_FACTOR):
+    """
+    Proposed collector for every open case.
+
+    Each collector's target is their share of the open amount_due. Collectors
+    first keep their own cases, highest priority first, while they stay
+    within target (plus KEEP_TOLERANCE) and capacity (so critical cases keep their collector);
+    the remaining cases, highest priority and amount first, each go to the
+    collector with the lowest load relative to target who still has
+    capacity. Runs in O(n log n + n log m) for n cases and m collectors.
+    Returns (assignments, profiles): assignments has case_id, the current
+    and proposed collector_id and amount_due, in case order.
+    """
+    profiles = collector_profiles(cases, capacity, capacity_factor)
+    open_cases = cases[~cases['status'].isin(CLOSED_STATUSES)]
+    current = open_cases['collector_id'].astype(object).to_numpy()
+    amount = open_cases['amount_due'].fillna(0).to_numpy(dtype='float64')
+    rank = open_cases['priority'].astype(object).map(PRIORITY_RANK).fillna(0).to_numpy()
+    target = profiles['share'].to_numpy() * amount.sum()
+    capacity = profiles['capacity'].to_numpy()
+    collectors = profiles.index
+
+    # Keep phase: cumulative load of each collector's own cases in priority order
+    order = np.lexsort((-amount, -rank, collectors.get_indexer(current)))
+    code = collectors.get_indexer(current)[order]
+    sorted_amount = amount[order]
+    cum_amount = pd.Series(sorted_amount).groupby(code).cumsum().to_numpy()
+    cum_count = pd.Series(np.ones(len(order))).groupby(code).cumsum().to_numpy()
+    valid = code >= 0
+    keep = np.zeros(len(order), dtype=bool)
+    keep[valid] = (cum_amount[valid] <= target[code[valid]] * (1 + KEEP_TOLERANCE)) & (cum_count[valid] <= capacity[code[valid]])
+    proposed = np.full(len(order), -1)
+    proposed[keep] = code[keep]
+    load = np.bincount(code[keep], weights=sorted_amount[keep], minlength=len(collectors))
+    count = np.bincount(code[keep], minlength=len(collectors))
+
+    # Assign phase: pooled cases (already in priority/amount order within each collector) re-sorted globally
+    pool = np.flatnonzero(~keep)
+    pool = pool[np.lexsort((-sorted_amount[pool], -rank[order][pool]))]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(target > 0, load / target, np.inf)
+    heap = [(ratio[j], j) for j in range(len(collectors)) if count[j] < capacity[j]]
+    heapq.heapify(heap)
+    for i in pool.tolist():
+        if not heap:
+            break  # no capacity left anywhere: the case stays where it is
+        _, j = heapq.heappop(heap)
+        proposed[i] = j
+        load[j] += sorted_amount[i]
+        count[j] += 1
+        if count[j] < capacity[j]:
+            heapq.heappush(heap, (load[j] / target[j] if target[j] > 0 else np.inf, j))
+
+    unplaced = proposed < 0
+    proposed_ids = np.where(unplaced, current[order], collectors.to_numpy()[np.maximum(proposed, 0)])
+    assignments = pd.DataFrame({
+        'case_id': open_cases['case_id'].astype(object).to_numpy()[order],
+        'current_collector_id': current[order],
+        'proposed_collector_id': proposed_ids,
+        'amount_due': sorted_amount,
+    }, index=open_cases.index[order]).sort_index()
+    return assignments.reset_index(drop=True), profiles
+
+
+def load_metrics(collector_ids, amounts, profiles):
+    """
+    Load-balance metrics for an assignment: open cases and amount per
+    collector, their load against target, and book-level spread
+    (max/min/mean amount, coefficient of variation, max load ratio).
+    """
+    per_collector = pd.DataFrame({'collector_id': collector_ids, 'amount_due': amounts})
+    grouped = per_collector.groupby('collector_id')['amount_due'].agg(['size', 'sum'])
+    grouped = grouped.reindex(profiles.index, fill_value=0)
+    target = profiles['share'] * grouped['sum'].sum()
+    amounts = grouped['sum'].to_numpy(dtype='float64')
+    mean = amounts.mean() if len(amounts) else 0.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        load_ratio = np.where(target > 0, amounts / target, 0.0)
+    collectors = [
+        {
+            'collector_id': collector_id,
+            'collector_name': profiles.at[collector_id, 'collector_name'],
+            'open_cases': int(cases),
+            'amount_assigned': round(float(amount), 2),
+            'target_amount': round(float(goal), 2),
+            'load_ratio': round(float(ratio), 3),
+        }
+        for collector_id, cases, amount, goal, ratio in zip(
+            grouped.index, grouped['size'], amounts, target, load_ratio)
+    ]
+    return {
+        'collectors': collectors,
+        'max_amount': round(float(amounts.max()), 2) if len(amounts) else 0.0,
+        'min_amount': round(float(amounts.min()), 2) if len(amounts) else 0.0,
+        'mean_amount': round(float(mean), 2),
+        'cv_amount': round(float(amounts.std() / mean), 4) if mean else 0.0,
+        'max_load_ratio': round(float(load_ratio.max()), 3) if len(load_ratio) else 0.0,
+        'max_open_cases': int(grouped['size'].max()) if len(grouped) else 0,
+    }
+
+
+def assignment_diff(cases, assignments, profiles):
+    """The cases whose collector changes, with from/to collector ids and names."""
+    moved = assignments[assignments['current_collector_id'] != assignments['proposed_collector_id']]
+    details = cases.set_index(cases['case_id'].astype(object))
+    details = details.loc[moved['case_id'], ['invoice_id', 'customer_id', 'priority']].astype(object)
+    names = profiles['collector_name']
+    return pd.DataFrame({
+        'case_id': moved['case_id'].to_numpy(),
+        'invoice_id': details['invoice_id'].to_numpy(),
+        'customer_id': details['customer_id'].to_numpy(),
+        'priority': details['priority'].to_numpy(),
+        'amount_due': moved['amount_due'].to_numpy(),
+        'from_collector_id': moved['current_collector_id'].to_numpy(),
+        'from_collector': moved['current_collector_id'].map(names).to_numpy(),
+        'to_collector_id': moved['proposed_collector_id'].to_numpy(),
+        'to_collector': moved['proposed_collector_id'].map(names).to_numpy(),
+    })[DIFF_COLUMNS]
+
+
+def plan_rebalance(cases, capacity=None, capacity_factor=DEFAULT_CAPACITY_FACTOR):
+    """Dry run: {'current', 'proposed'} load metrics and the diff of moved cases."""
+    assignments, profiles = rebalance(cases, capacity, capacity_factor)
+    return {
+        'current': load_metrics(assignments['current_collector_id'], assignments['amount_due'], profiles),
+        'proposed': load_metrics(assignments['proposed_collector_id'], assignments['amount_due'], profiles),
+        'diff': assignment_diff(cases, assignments, profiles),
+    }
+
+
+def apply_assignments(cases, diff):
+    """A copy of cases with the moved cases' collector_id and assigned_to updated from diff."""
+    updated = cases.copy()
+    moves = diff.set_index('case_id')
+    rows = updated['case_id'].astype(object).isin(moves.index).to_numpy()
+    case_ids = updated.loc[rows, 'case_id'].astype(object)
+    for column, source in (('collector_id', 'to_collector_id'), ('assigned_to', 'to_collector')):
+        values = updated[column].astype(object)
+        values[rows] = case_ids.map(moves[source]).to_numpy()
+        updated[column] = values
+    return updated
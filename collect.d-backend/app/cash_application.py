@@ -0,0 +1,325 @@
+# --- File: app/cash_application.py ---
+# Matching incoming payments to open invoices and applying them in one vectorised pass
+
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from itertools import combinations
+import numpy as np
+import pandas as pd
+from .analytics import write_dataset
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: batches are only serialised within one process
+    fcntl = None
+
+INVOICES_FILE = 'invoices.csv'
+
+# Matching stages, in the order they are tried
+MATCH_METHODS = ('invoice_id', 'reference', 'customer_amount', 'tolerance', 'combination')
+# A payment within this much of an invoice balance (absolute, or relative to the payment) settles it
+AMOUNT_TOLERANCE = 1.0
+RELATIVE_TOLERANCE = 0.005
+# Combination matching looks at a customer's oldest open invoices only
+MAX_COMBINATION_INVOICES = 12
+MAX_COMBINATION_SIZE = 4
+MATCH_COLUMNS = ['payment_id', 'invoice_id', 'method', 'applied_amount', 'difference']
+_CENT = 0.005
+
+
+def _cents(values):
+    return np.rint(np.asarray(values, dtype='float64') * 100).astype(np.int64)
+
+
+def _tolerance(amounts):
+    return np.maximum(AMOUNT_TOLERANCE, np.abs(amounts) * RELATIVE_TOLERANCE)
+
+
+def normalize_batch(payments):
+    """Bank-file rows with the columns the matcher reads; optional ones are filled with nulls."""
+    if 'payment_amount' not in payments.columns:
+        raise ValueError("Payment batch needs a payment_amount column")
+    batch = pd.DataFrame(index=range(len(payments)))
+    batch['payment_id'] = (payments['payment_id'].astype(object).to_numpy() if 'payment_id' in payments.columns
+                           else [f"BANK{i:06d}" for i in range(len(payments))])
+    for column in ('invoice_id', 'customer_id', 'reference_number'):
+        values = payments[column].astype(object) if column in payments.columns else pd.Series(None, index=payments.index, dtype=object)
+        batch[column] = values.where(values.notna() & (values.astype(str).str.strip() != ''), None).to_numpy()
+    batch['payment_amount'] = pd.to_numeric(payments['payment_amount'], errors='coerce').to_numpy(dtype='float64')
+    dates = payments['payment_date'] if 'payment_date' in payments.columns else pd.Series(pd.NaT, index=payments.index)
+    batch['payment_date'] = pd.to_datetime(dates, errors='coerce').fillna(pd.Timestamp(datetime.now().date())).to_numpy()
+    if batch['payment_amount'].isna().any():
+        raise ValueError("Payment batch has non-numeric payment_amount values")
+    return batch
+
+
+class _Matcher:
+    """One matching run: remaining invoice balances and unmatched payments, narrowed stage by stage."""
+
+    def __init__(self, invoices, batch):
+        self.batch = batch
+        self.remaining = invoices['balance_amount'].fillna(0).to_numpy(dtype='float64').copy()
+        self.invoices = pd.DataFrame({
+            'invoice_id': invoices['invoice_id'].astype(object).to_numpy(),
+            'customer_id': invoices['customer_id'].astype(object).to_numpy(),
+            'reference_number': invoices['reference_number'].astype(object).to_numpy()
+            if 'reference_number' in invoices.columns else None,
+            'due_date': invoices['due_date'].to_numpy(),
+        })
+        self.unmatched = np.ones(len(batch), dtype=bool)
+        self.matches = []
+
+    def open_invoices(self):
+        positions = np.flatnonzero(self.remaining > _CENT)
+        return self.invoices.iloc[positions].assign(position=positions, remaining=self.remaining[positions])
+
+    def pending(self, column=None):
+        mask = self.unmatched.copy()
+        if column:
+            mask &= self.batch[column].notna().to_numpy()
+        return self.batch[mask].assign(row=np.flatnonzero(mask))
+
+    def record(self, rows, positions, method, settle=False):
+        """
+        Apply payments rows to invoice positions. Several payments on one
+        invoice are applied in batch order; settle (tolerance and combination
+        matches) clears the invoice balance whatever the small difference.
+        """
+        if not len(rows):
+            return
+        rows, positions = np.asarray(rows), np.asarray(positions)
+        amounts = self.batch['payment_amount'].to_numpy()[rows]
+        balance = self.remaining[positions]
+        if settle:
+            applied = balance
+        else:
+            paid_before = pd.Series(amounts).groupby(positions).cumsum().to_numpy() - amounts
+            applied = np.clip(balance - paid_before, 0, amounts)
+        np.subtract.at(self.remaining, positions, applied)
+        self.remaining[np.abs(self.remaining) < _CENT] = 0.0
+        self.unmatched[rows] = False
+        difference = amounts - applied if not settle else self._settle_difference(rows, amounts, applied)
+        self.matches.append(pd.DataFrame({
+            'payment_id': self.batch['payment_id'].to_numpy()[rows],
+            'invoice_id': self.invoices['invoice_id'].to_numpy()[positions],
+            'method': method,
+            'applied_amount': applied,
+            'difference': difference,
+            'payment_date': self.batch['payment_date'].to_numpy()[rows],
+            'position': positions,
+        }))
+
+    @staticmethod
+    def _settle_difference(rows, amounts, applied):
+        # A payment settling several invoices carries the whole difference on its last one
+        frame = pd.DataFrame({'row': rows, 'amount': amounts, 'applied': applied})
+        total_applied = frame.groupby('row')['applied'].transform('sum').to_numpy()
+        last = ~frame.duplicated('row', keep='last').to_numpy()
+        return np.where(last, amounts - total_applied, 0.0)
+
+    # --- stages ---
+
+    def by_invoice_id(self):
+        payments = self.pending('invoice_id')
+        index = pd.Index(self.invoices['invoice_id'])
+        positions = index.get_indexer(payments['invoice_id'])
+        found = (positions >= 0)
+        found[found] = self.remaining[positions[found]] > _CENT
+        self.record(payments['row'].to_numpy()[found], positions[found], 'invoice_id')
+
+    def by_reference(self):
+        payments = self.pending('reference_number')
+        invoices = self.open_invoices()
+        invoices = invoices[invoices['reference_number'].notna()].drop_duplicates('reference_number', keep=False)
+        pairs = payments[['row', 'reference_number']].merge(invoices[['reference_number', 'position']], on='reference_number')
+        self.record(pairs['row'].to_numpy(), pairs['position'].to_numpy(), 'reference')
+
+    def by_customer_amount(self):
+        # Payments and invoices with the same (customer, amount) are paired oldest invoice first
+        payments = self.pending('customer_id')
+        payments = payments.assign(cents=_cents(payments['payment_amount']))
+        invoices = self.open_invoices().sort_values(['due_date', 'position'])
+        invoices = invoices.assign(cents=_cents(invoices['remaining']))
+        payments['rank'] = payments.groupby(['customer_id', 'cents']).cumcount()
+        invoices['rank'] = invoices.groupby(['customer_id', 'cents']).cumcount()
+        pairs = payments[['row', 'customer_id', 'cents', 'rank']].merge(
+            invoices[['customer_id', 'cents', 'rank', 'position']], on=['customer_id', 'cents', 'rank'])
+        self.record(pairs['row'].to_numpy(), pairs['position'].to_numpy(), 'customer_amount')
+
+    def by_tolerance(self):
+        payments = self.pending('customer_id').sort_values('payment_amount')
+        invoices = self.open_invoices().sort_values('remaining')
+        if not len(payments) or not len(invoices):
+            return
+        nearest = pd.merge_asof(
+            payments[['row', 'customer_id', 'payment_amount']], invoices[['customer_id', 'remaining', 'position']],
+            left_on='payment_amount', right_on='remaining', by='customer_id', direction='nearest')
+        nearest = nearest[nearest['position'].notna()]
+        nearest['gap'] = (nearest['payment_amount'] - nearest['remaining']).abs()
+        nearest = nearest[nearest['gap'] <= _tolerance(nearest['payment_amount'])]
+        # An invoice goes to the closest of the payments competing for it
+        nearest = nearest.sort_values(['gap', 'row']).drop_duplicates('position')
+        self.record(nearest['row'].to_numpy(), nearest['position'].to_numpy(dtype=np.intp), 'tolerance', settle=True)
+
+    def by_combination(self):
+        payments = self.pending('customer_id')
+        if not len(payments):
+            return
+        invoices = self.open_invoices().sort_values(['due_date', 'position'])
+        groups = invoices.groupby('customer_id', sort=False).indices
+        open_positions = invoices['position'].to_numpy()
+        taken = np.zeros(len(self.remaining), dtype=bool)
+        rows, positions = [], []
+        for row, customer_id, amount in zip(payments['row'].tolist(), payments['customer_id'].tolist(),
+                                            payments['payment_amount'].tolist()):
+            candidates = groups.get(customer_id)
+            if candidates is None:
+                continue
+            candidates = open_positions[candidates]
+            candidates = candidates[~taken[candidates]][:MAX_COMBINATION_INVOICES]
+            combo = _find_combination(candidates, self.remaining[candidates], amount, _tolerance(amount))
+            if combo is not None:
+                rows.extend([row] * len(combo))
+                positions.extend(combo.tolist())
+                taken[combo] = True
+        self.record(rows, positions, 'combination', settle=True)
+
+    def result(self):
+        if self.matches:
+            matches = pd.concat(self.matches, ignore_index=True)
+        else:
+            matches = pd.DataFrame(columns=MATCH_COLUMNS + ['payment_date', 'position'])
+        return matches, self.batch[self.unmatched]
+
+
+@lru_cache(maxsize=None)
+def _combination_index(n, size):
+    return np.array(list(combinations(range(n), size)), dtype=np.intp).reshape(-1, size)
+
+
+def _find_combination(positions, balances, amount, tolerance):
+    """Invoices whose balances add up to amount: the oldest-first run, else the smallest subset."""
+    if len(positions) < 2:
+        return None
+    running = np.cumsum(balances)
+    hits = np.flatnonzero(np.abs(running - amount) <= tolerance)
+    if len(hits) and hits[0] > 0:
+        return positions[:hits[0] + 1]
+    for size in range(2, min(MAX_COMBINATION_SIZE, len(positions)) + 1):
+        index = _combination_index(len(positions), size)
+        hits = np.flatnonzero(np.abs(balances[index].sum(axis=1) - amount) <= tolerance)
+        if len(hits):
+            return positions[index[hits[0]]]
+    return None
+
+
+def match_payments(invoices, payments):
+    """
+    Match a payment batch against invoices.
+
+    Stages run in MATCH_METHODS order on whatever is still unmatched: hash
+    joins on invoice_id, on the invoice reference_number (remittance
+    reference) and on (customer_id, amount) exact to the cent, then the
+    nearest balance of the same customer within tolerance, then a set of the
+    customer's open invoices adding up to the payment. Returns (matches,
+    unmatched): matches has one row per payment/invoice pair with
+    method, applied_amount, difference (unapplied or short-paid amount),
+    payment_date and the invoice's position in invoices.
+    """
+    matcher = _Matcher(invoices.reset_index(drop=True), normalize_batch(payments))
+    for method in MATCH_METHODS:
+        getattr(matcher, f'by_{method}')()
+    return matcher.result()
+
+
+def apply_matches(invoices, matches):
+    """
+    New invoices frame with matched amounts applied: paid_amount up,
+    balance_amount down (cleared for settled matches), payment_status Paid
+    when nothing is left (payment_date set) and Partial otherwise, unless the
+    invoice is Overdue. All updates are one vectorised pass over the
+    invoice table.
+    """
+    updated = invoices.reset_index(drop=True).copy()
+    if not len(matches):
+        return updated
+    n = len(updated)
+    positions = matches['position'].to_numpy(dtype=np.intp)
+    settled = matches['method'].isin(('tolerance', 'combination')).to_numpy()
+    applied = np.bincount(positions, weights=matches['applied_amount'].to_numpy(dtype='float64'), minlength=n)
+    cleared = np.bincount(positions[settled], minlength=n) > 0
+    touched = np.bincount(positions, minlength=n) > 0
+    last_date = pd.Series(matches['payment_date'].to_numpy()).groupby(positions).max()
+
+    balance = updated['balance_amount'].fillna(0).to_numpy(dtype='float64') - applied
+    balance[cleared | (np.abs(balance) < _CENT)] = 0.0
+    updated['balance_amount'] = np.round(balance, 2)
+    updated['paid_amount'] = np.round(updated['paid_amount'].fillna(0).to_numpy(dtype='float64') + applied, 2)
+
+    status = updated['payment_status'].astype(object).to_numpy().copy()
+    paid = touched & (balance == 0)
+    partial = touched & ~paid & (status != 'Overdue')
+    status[paid] = 'Paid'
+    status[partial] = 'Partial'
+    if isinstance(updated['payment_status'].dtype, pd.CategoricalDtype):
+        categories = updated['payment_status'].cat.categories.union(pd.Index(['Paid', 'Partial']), sort=False)
+        updated['payment_status'] = pd.Categorical(status, categories=categories)
+    else:
+        updated['payment_status'] = status
+
+    payment_date = updated['payment_date'].copy()
+    paid_positions = np.flatnonzero(paid)
+    payment_date.iloc[paid_positions] = last_date.reindex(paid_positions).to_numpy()
+    updated['payment_date'] = payment_date
+    return updated
+
+
+def apply_cash(invoices, payments):
+    """match_payments + apply_matches. Returns (updated invoices, matches, unmatched payments)."""
+    matches, unmatched = match_payments(invoices, payments)
+    return apply_matches(invoices, matches), matches, unmatched
+
+
+@contextmanager
+def _exclusive(path):
+    # Cross-process lock held while a batch reads, matches and rewrites path
+    with open(f"{path}.lock", 'a') as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        yield
+
+
+def apply_batch(loader, payments):
+    """
+    Apply a payment batch to loader's invoices.csv and persist it (CSV and
+    typed sidecar) under an exclusive file lock, so batches applied by
+    different processes are serialised and each is matched against the
+    balances the previous one wrote. Returns (updated invoices as reloaded
+    from disk, matches, unmatched payments).
+    """
+    with _exclusive(os.path.join(loader.data_dir, INVOICES_FILE)):
+        updated, matches, unmatched = apply_cash(loader.get_invoice_data(), payments)
+        if len(matches):
+            write_dataset(loader.data_dir, INVOICES_FILE, updated)
+        return loader.get_invoice_data(), matches, unmatched
+
+
+def summarize(matches, unmatched):
+    """Counts and amounts per match method, plus what stayed unmatched."""
+    by_method = matches.groupby('method')
+    return {
+        'matched_payments': int(matches['payment_id'].nunique()) if len(matches) else 0,
+        'matched_invoices': int(matches['invoice_id'].nunique()) if len(matches) else 0,
+        'applied_amount': round(float(matches['applied_amount'].sum()), 2) if len(matches) else 0.0,
+        'unmatched_payments': len(unmatched),
+        'unmatched_amount': round(float(unmatched['payment_amount'].sum()), 2),
+        'by_method': {
+            method: {
+                'payments': int(by_method.get_group(method)['payment_id'].nunique()),
+                'applied_amount': round(float(by_method.get_group(method)['applied_amount'].sum()), 2),
+            }
+            for method in MATCH_METHODS if method in by_method.groups
+        },
+    }
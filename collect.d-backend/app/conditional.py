@@ -0,0 +1,49 @@
+# --- File: app/conditional.py ---
+# Conditional GET support (ETag / Last-Modified / 304) for dataset-backed views
+
+import hashlib
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def request_etag(request, *validators):
+    """
+    Strong ETag for request given the validators of the data it reads.
+
+    validators identify the data version (e.g. file signatures); the path,
+    query string and negotiated format are added so every distinct
+    representation gets its own tag.
+    """
+    digest = hashlib.sha256()
+    for part in validators:
+        digest.update(repr(part).encode())
+        digest.update(b'\0')
+    digest.update(request.path.encode())
+    digest.update(b'\0')
+    for key, values in sorted(request.query_params.lists()):
+        digest.update(repr((key, values)).encode())
+    renderer = getattr(request, 'accepted_renderer', None)
+    digest.update((renderer.format if renderer else '').encode())
+    return f'"{digest.hexdigest()[:40]}"'
+
+
+def conditional_get(request, build_response, validators, last_modified=None):
+    """
+    Answer a GET with 304 Not Modified when the client's copy is current.
+
+    validators and last_modified (epoch seconds) must be cheap to compute;
+    build_response() is only called when the client's If-None-Match /
+    If-Modified-Since don't match, so no data is loaded or serialized for a
+    304. Successful responses carry the ETag and Last-Modified headers.
+    """
+    etag = request_etag(request, *validators)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = build_response()
+    if 200 <= response.status_code < 300 or response.status_code == 304:
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        # Let clients keep the body but revalidate on every poll
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
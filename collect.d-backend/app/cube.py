@@ -0,0 +1,309 @@
+# --- File: app/cube.py ---
+# Pre-aggregated open-AR cube (aging x sales rep x customer attributes), maintained incrementally
+
+import threading
+from datetime import datetime
+from itertools import combinations
+import numpy as np
+import pandas as pd
+from .utils import AGING_BOUNDARIES, aging_buckets, aging_labels
+
+CUSTOMER_ATTRIBUTES = ('state', 'industry_sector', 'customer_category')
+# Dimensions of the regional cuboids; customer_id only combines with rep and bucket
+REGIONAL_DIMENSIONS = ('sales_rep_id',) + CUSTOMER_ATTRIBUTES + ('aging_bucket',)
+CUSTOMER_DIMENSIONS = ('customer_id', 'sales_rep_id', 'aging_bucket')
+DIMENSIONS = ('customer_id',) + REGIONAL_DIMENSIONS
+UNKNOWN_LABEL = 'Unknown'
+# Bit widths of the rep and bucket codes in a packed customer-cell key (the customer code takes the rest)
+_REP_BITS = 24
+_BUCKET_BITS = 8
+# Invoice columns that decide whether and where an invoice is booked
+_SOURCE_COLUMNS = ('customer_id', 'sales_rep_id', 'due_date', 'balance_amount')
+
+
+def _cuboid_keys():
+    """Every subset of the regional dimensions."""
+    keys = []
+    for size in range(len(REGIONAL_DIMENSIONS) + 1):
+        keys.extend(combinations(REGIONAL_DIMENSIONS, size))
+    return keys
+
+
+def _pack(customer, rep, bucket):
+    return ((np.asarray(customer, dtype=np.int64) << (_REP_BITS + _BUCKET_BITS))
+            | (np.asarray(rep, dtype=np.int64) << _BUCKET_BITS) | np.asarray(bucket, dtype=np.int64))
+
+
+def _unpack(keys):
+    return (keys >> (_REP_BITS + _BUCKET_BITS), (keys >> _BUCKET_BITS) & ((1 << _REP_BITS) - 1),
+            keys & ((1 << _BUCKET_BITS) - 1))
+
+
+class _SparseCuboid:
+    """
+    Balance and count per observed (customer, rep, bucket) combination, as
+    sorted packed keys with aligned value arrays. Memory follows the number
+    of combinations with open invoices rather than customers x reps x buckets.
+    """
+
+    def __init__(self):
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.balance = np.zeros(0)
+        self.count = np.zeros(0)
+
+    def add(self, keys, amounts, sign):
+        keys, inverse = np.unique(keys, return_inverse=True)
+        amounts = np.bincount(inverse, weights=amounts, minlength=len(keys))
+        counts = sign * np.bincount(inverse, minlength=len(keys))
+        pos = np.searchsorted(self.keys, keys)
+        found = pos < len(self.keys)
+        found[found] = self.keys[pos[found]] == keys[found]
+        self.balance[pos[found]] += amounts[found]
+        self.count[pos[found]] += counts[found]
+        new = ~found
+        if new.any():
+            self.keys = np.insert(self.keys, pos[new], keys[new])
+            self.balance = np.insert(self.balance, pos[new], amounts[new])
+            self.count = np.insert(self.count, pos[new], counts[new])
+        # Drop combinations left without open invoices
+        touched = np.searchsorted(self.keys, keys)
+        emptied = touched[self.count[touched] == 0]
+        if len(emptied):
+            self.keys, self.balance, self.count = (np.delete(values, emptied)
+                                                   for values in (self.keys, self.balance, self.count))
+
+
+class _Axis:
+    """Labels of one cube dimension and their integer codes; grows as new labels appear."""
+
+    def __init__(self, labels=()):
+        self.labels = list(labels)
+        self._codes = {label: i for i, label in enumerate(self.labels)}
+
+    def __len__(self):
+        return len(self.labels)
+
+    def encode(self, values):
+        for value in pd.unique(values):
+            if value not in self._codes:
+                self._codes[value] = len(self.labels)
+                self.labels.append(value)
+        return pd.Index(self.labels, dtype=object).get_indexer(values)
+
+    def lookup(self, labels):
+        return [self._codes[label] for label in labels if label in self._codes]
+
+
+class ARCube:
+    """
+    Sum and count of open balances per aging bucket and dimension combination.
+
+    Open invoices (balance_amount > 0) are booked into a dense cuboid for
+    every combination of sales_rep_id, state, industry_sector,
+    customer_category and aging_bucket, and into one sparse cuboid of the
+    (customer_id, sales_rep_id, aging_bucket) combinations that occur. A
+    regional query reads the smallest dense cuboid covering its group-by and
+    filter dimensions, so answering it costs a few array lookups over at most
+    a few thousand cells; a customer query groups the sparse cells. Neither
+    touches the invoice table.
+    sync_invoices() and advance() re-book only the invoices that changed or
+    crossed an aging boundary.
+    """
+
+    def __init__(self, invoices, customers, as_of=None, boundaries=AGING_BOUNDARIES):
+        self.boundaries = tuple(boundaries)
+        self.as_of = pd.Timestamp(as_of if as_of is not None else datetime.now().date()).normalize()
+        self._attributes = customers.drop_duplicates('customer_id').set_index('customer_id')[list(CUSTOMER_ATTRIBUTES)]
+        self._axes = {dim: _Axis() for dim in DIMENSIONS}
+        self._axes['aging_bucket'] = _Axis(aging_labels(self.boundaries))
+        self._cuboids = {dims: self._empty(dims) for dims in _cuboid_keys()}
+        self._customer_cells = _SparseCuboid()
+        self._customer_attr_codes = {attr: np.zeros(0, dtype=np.intp) for attr in CUSTOMER_ATTRIBUTES}
+        self._cells = pd.DataFrame(columns=list(DIMENSIONS) + ['due_date', 'balance'])
+        self._hashes = pd.Series(dtype='uint64')
+        self._lock = threading.Lock()
+        self._book_invoices(invoices)
+
+    # --- maintenance ---
+
+    def sync_invoices(self, invoices):
+        """Re-book only invoices that were added, removed or changed since the last sync. Returns how many."""
+        with self._lock:
+            return self._book_invoices(invoices)
+
+    def advance(self, as_of=None):
+        """Move the cube to a new as-of date, re-bucketing only the invoices whose aging bucket changes."""
+        as_of = pd.Timestamp(as_of if as_of is not None else datetime.now().date()).normalize()
+        with self._lock:
+            if as_of == self.as_of:
+                return 0
+            cells = self._cells
+            new_bucket = aging_buckets(cells['due_date'], as_of, self.boundaries).cat.codes.to_numpy(np.intp)
+            moved = np.flatnonzero(new_bucket != cells['aging_bucket'].to_numpy())
+            if len(moved):
+                before = cells.iloc[moved]
+                self._add(before, sign=-1)
+                self._add(before.assign(aging_bucket=new_bucket[moved]), sign=1)
+                self._cells.iloc[moved, self._cells.columns.get_loc('aging_bucket')] = new_bucket[moved]
+            self.as_of = as_of
+            return len(moved)
+
+    # --- queries ---
+
+    def query(self, group_by=(), filters=None):
+        """
+        Open balance and invoice count per combination of group_by dimensions.
+
+        filters maps a dimension to the labels to keep. customer_id can be
+        grouped together with sales_rep_id and aging_bucket only (customer
+        attributes may still be used as filters). Returns one dict per
+        non-empty cell with the group_by labels plus balance and count.
+        """
+        group_by = list(dict.fromkeys(group_by))
+        filters = {dim: list(labels) for dim, labels in (filters or {}).items()}
+        for dim in group_by + list(filters):
+            if dim not in DIMENSIONS:
+                raise ValueError(f"Unknown cube dimension: {dim}")
+        with self._lock:
+            if 'customer_id' in group_by or 'customer_id' in filters:
+                coords, balance, count = self._query_customers(group_by, filters)
+            else:
+                coords, balance, count = self._query_regional(group_by, filters)
+            labels = {dim: self._axes[dim].labels for dim in group_by}
+
+        columns = [[labels[dim][i] for i in coords[dim].tolist()] for dim in group_by]
+        columns.append(balance.tolist())
+        columns.append([int(n) for n in count.tolist()])
+        return [dict(zip(group_by + ['balance', 'count'], row)) for row in zip(*columns)]
+
+    def totals(self, filters=None):
+        """(balance, count) over all cells matching filters."""
+        result = self.query((), filters)
+        return (result[0]['balance'], result[0]['count']) if result else (0.0, 0)
+
+    # --- internals ---
+
+    def _empty(self, dims):
+        shape = tuple(len(self._axes[dim]) for dim in dims)
+        return np.zeros(shape), np.zeros(shape)
+
+    def _open_cells(self, invoices):
+        """Cube coordinates, due date and balance of the open invoices in invoices."""
+        open_invoices = invoices[invoices['balance_amount'].fillna(0).to_numpy() > 0]
+        cells = pd.DataFrame(index=open_invoices.index)
+        customer_ids = open_invoices['customer_id'].astype(object)
+        cells['customer_id'] = self._axes['customer_id'].encode(customer_ids.to_numpy())
+        cells['sales_rep_id'] = self._axes['sales_rep_id'].encode(
+            open_invoices['sales_rep_id'].astype(object).fillna(UNKNOWN_LABEL).to_numpy())
+        for attr in CUSTOMER_ATTRIBUTES:
+            values = customer_ids.map(self._attributes[attr]).astype(object)
+            cells[attr] = self._axes[attr].encode(values.where(values.notna(), UNKNOWN_LABEL).to_numpy())
+            # Attribute code of every customer on the customer axis, for customer-level filters
+            codes = np.zeros(len(self._axes['customer_id']), dtype=np.intp)
+            known = self._customer_attr_codes[attr]
+            codes[:len(known)] = known
+            codes[cells['customer_id'].to_numpy()] = cells[attr].to_numpy()
+            self._customer_attr_codes[attr] = codes
+        cells['aging_bucket'] = aging_buckets(
+            open_invoices['due_date'], self.as_of, self.boundaries).cat.codes.to_numpy(np.intp)
+        cells['due_date'] = open_invoices['due_date']
+        cells['balance'] = open_invoices['balance_amount'].to_numpy(dtype='float64')
+        return cells
+
+    def _grow(self):
+        # New labels extend the cuboids with zero cells
+        for dims, (balance, count) in self._cuboids.items():
+            shape = tuple(len(self._axes[dim]) for dim in dims)
+            if balance.shape != shape:
+                pad = [(0, new - old) for old, new in zip(balance.shape, shape)]
+                self._cuboids[dims] = (np.pad(balance, pad), np.pad(count, pad))
+
+    def _add(self, cells, sign):
+        if not len(cells):
+            return
+        amounts = cells['balance'].to_numpy(dtype='float64') * sign
+        codes = {dim: cells[dim].to_numpy(dtype=np.intp) for dim in DIMENSIONS}
+        for dims, (balance, count) in self._cuboids.items():
+            if not dims:
+                balance[...] += amounts.sum()
+                count[...] += sign * len(amounts)
+                continue
+            flat = np.ravel_multi_index(tuple(codes[dim] for dim in dims), balance.shape)
+            if len(flat) * 8 < balance.size:
+                # Small batches (incremental updates): touch only the affected cells
+                np.add.at(balance.reshape(-1), flat, amounts)
+                np.add.at(count.reshape(-1), flat, sign)
+            else:
+                balance += np.bincount(flat, weights=amounts, minlength=balance.size).reshape(balance.shape)
+                count += sign * np.bincount(flat, minlength=balance.size).reshape(balance.shape)
+        if len(self._axes['sales_rep_id']) >= 1 << _REP_BITS:
+            raise ValueError("Too many sales reps for the customer cuboid")
+        self._customer_cells.add(
+            _pack(codes['customer_id'], codes['sales_rep_id'], codes['aging_bucket']), amounts, sign)
+
+    def _book_invoices(self, invoices):
+        # Caller must hold self._lock (or be __init__)
+        invoices = invoices.set_index('invoice_id', drop=False)
+        hashes = pd.util.hash_pandas_object(invoices[list(_SOURCE_COLUMNS)], index=False)
+        hashes.index = invoices.index
+        previous = self._hashes.reindex(hashes.index)
+        changed = hashes.index[previous.isna().to_numpy() | (previous.to_numpy() != hashes.to_numpy())]
+        removed = self._hashes.index.difference(hashes.index)
+
+        stale = self._cells.index.intersection(changed.append(removed))
+        self._add(self._cells.loc[stale], sign=-1)
+        fresh = self._open_cells(invoices.loc[changed])
+        self._grow()
+        self._add(fresh, sign=1)
+
+        kept = self._cells.drop(index=stale)
+        if len(kept) and len(fresh):
+            self._cells = pd.concat([kept, fresh])
+        else:
+            self._cells = fresh if len(fresh) else kept
+        self._hashes = hashes
+        return len(changed) + len(removed)
+
+    def _select(self, cuboid, dims, group_by, filters):
+        balance, count = cuboid
+        for axis, dim in enumerate(dims):
+            if dim in filters:
+                idx = self._axes[dim].lookup(filters[dim])
+                balance, count = np.take(balance, idx, axis=axis), np.take(count, idx, axis=axis)
+        summed = tuple(axis for axis, dim in enumerate(dims) if dim not in group_by)
+        if summed:
+            balance, count = balance.sum(axis=summed), count.sum(axis=summed)
+        return balance, count, [dim for dim in dims if dim in group_by]
+
+    def _query_regional(self, group_by, filters):
+        dims = tuple(dim for dim in REGIONAL_DIMENSIONS if dim in group_by or dim in filters)
+        balance, count, dims = self._select(self._cuboids[dims], dims, group_by, filters)
+        order = [dims.index(dim) for dim in group_by]
+        balance = np.atleast_1d(np.transpose(balance, order))
+        count = np.atleast_1d(np.transpose(count, order))
+        cells = np.nonzero(count)
+        return dict(zip(group_by, cells)), balance[cells], count[cells]
+
+    def _query_customers(self, group_by, filters):
+        if not set(group_by) <= set(CUSTOMER_DIMENSIONS):
+            raise ValueError("customer_id can only be grouped with sales_rep_id and aging_bucket")
+        sparse = self._customer_cells
+        codes = dict(zip(CUSTOMER_DIMENSIONS, _unpack(sparse.keys)))
+        mask = np.ones(len(sparse.keys), dtype=bool)
+        for dim, labels in filters.items():
+            wanted = self._axes[dim].lookup(labels)
+            if dim in CUSTOMER_ATTRIBUTES:
+                # Customer attributes are filtered through the attribute code of each cell's customer
+                mask &= np.isin(self._customer_attr_codes[dim][codes['customer_id']], wanted)
+            else:
+                mask &= np.isin(codes[dim], wanted)
+        # Group the remaining cells on the packed key with the other dimensions zeroed
+        kept = [codes[dim][mask] if dim in group_by else np.zeros(mask.sum(), dtype=np.int64) for dim in CUSTOMER_DIMENSIONS]
+        groups, inverse = np.unique(_pack(*kept), return_inverse=True)
+        balance = np.bincount(inverse, weights=sparse.balance[mask], minlength=len(groups))
+        count = np.bincount(inverse, weights=sparse.count[mask], minlength=len(groups))
+        coords = dict(zip(CUSTOMER_DIMENSIONS, _unpack(groups)))
+        order = np.lexsort([coords[dim] for dim in reversed(group_by)]) if group_by else slice(None)
+        nonzero = count[order] != 0
+        return ({dim: coords[dim][order][nonzero] for dim in group_by},
+                balance[order][nonzero], count[order][nonzero])
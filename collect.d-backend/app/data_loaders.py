@@ -1,73 +1,201 @@
 import os
-import pandas as pd
-from django.conf import settings
+import threading
+from collections import OrderedDict
+from config import DATA_DIR, DATA_CACHE_MAX_BYTES, SHARED_DATASETS_DIR
+from .schemas import parse_dataset
+from .sidecars import read_dataset
+
+
+def file_signature(file_path):
+    """Return the (mtime_ns, size) pair used to detect changes to a data file"""
+    stat = os.stat(file_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def frame_nbytes(df):
+    """Deep memory footprint of a DataFrame in bytes"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class DatasetCache:
+    """
+    Thread-safe LRU cache of parsed datasets.
+
+    Entries are keyed by file path and validated against the file's
+    (mtime, size) signature, so a rewritten file is reparsed on next access.
+    The total deep size of cached frames is kept under ``max_bytes`` by
+    evicting the least recently used datasets.
+    """
+
+    def __init__(self, max_bytes=DATA_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # path -> (signature, frame, nbytes)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path, signature):
+        """Return the cached frame for path if its signature still matches, else None"""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                # Stale entry: the file changed on disk since it was cached
+                self._discard(path)
+            self.misses += 1
+            return None
+
+    def put(self, path, signature, frame):
+        """Store a parsed frame, evicting least recently used entries to stay within budget"""
+        nbytes = frame_nbytes(frame)
+        with self._lock:
+            if path in self._entries:
+                self._discard(path)
+            if nbytes > self.max_bytes:
+                # Larger than the whole budget - serve it uncached
+                return frame
+            while self._entries and self.current_bytes + nbytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+            self._entries[path] = (signature, frame, nbytes)
+            self.current_bytes += nbytes
+        return frame
+
+    def invalidate(self, path=None):
+        """Drop one cached dataset, or all of them when path is None"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self.current_bytes = 0
+            elif path in self._entries:
+                self._discard(path)
+
+    def stats(self):
+        """Snapshot of cache counters and per-dataset sizes"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'current_bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'datasets': {os.path.basename(path): entry[2] for path, entry in self._entries.items()},
+            }
+
+    def _discard(self, path):
+        # Caller must hold self._lock
+        _, _, nbytes = self._entries.pop(path)
+        self.current_bytes -= nbytes
+
 
 class DataLoader:
-    def __init__(self):
-        self.data_dir = os.path.join(settings.BASE_DIR, 'data')
-        
+    def __init__(self, data_dir=None, cache=None, shared_store=None):
+        self.data_dir = data_dir or DATA_DIR
+        self.cache = cache if cache is not None else DatasetCache()
+        # Optional SharedDatasetStore: datasets memory-mapped from files shared by all workers
+        self.shared_store = shared_store
+
     def load_csv(self, filename):
-        """Load a CSV file from the data directory"""
+        """
+        Load a CSV file from the data directory.
+
+        Parsed frames are cached until the file changes on disk; the returned
+        DataFrame is shared between callers and must be treated as read-only.
+        Columns are typed by the dataset's schema (see app/schemas.py) and
+        cache misses are served from the columnar sidecar when it is fresh,
+        or attached from the shared store when one is configured.
+        """
+        file_path = os.path.join(self.data_dir, filename)
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Data file not found: {filename}")
+        signature = file_signature(file_path)
+        df = self.cache.get(file_path, signature)
+        if df is None:
+            if self.shared_store is not None:
+                df = self.shared_store.load(file_path, signature, parse=parse_dataset)
+            else:
+                df = read_dataset(file_path, parse=parse_dataset)
+            df = self.cache.put(file_path, signature, df)
+        return df
+
+    def signature(self, filename):
+        """(mtime_ns, size) of a data file, identifying the version load_csv would return"""
         file_path = os.path.join(self.data_dir, filename)
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Data file not found: {filename}")
-        return pd.read_csv(file_path)
-    
+        return file_signature(file_path)
+
+    def cache_stats(self):
+        """Hit/miss counters and memory usage of the dataset cache"""
+        return self.cache.stats()
+
     def get_customer_data(self):
         """Load and process customer master data"""
         return self.load_csv('customer_master.csv')
-    
+
     def get_invoice_data(self):
         """Load and process invoice data"""
         return self.load_csv('invoices.csv')
-    
+
     def get_payment_data(self):
         """Load and process payment data"""
         return self.load_csv('payments.csv')
-    
+
     def get_collection_cases(self):
         """Load and process collection cases data"""
         return self.load_csv('collection_cases.csv')
-    
+
     def get_disputes(self):
         """Load and process disputes data"""
         return self.load_csv('disputes.csv')
-    
+
     def get_risk_scores(self):
         """Load and process risk scores data"""
         return self.load_csv('risk_scores.csv')
-    
+
     def get_customer_interactions(self):
         """Load and process customer interactions data"""
         return self.load_csv('customer_interactions.csv')
-    
+
     def get_orders(self):
         """Load and process orders data"""
         return self.load_csv('orders.csv')
-    
+
     def get_gl_entries(self):
         """Load and process GL entries data"""
         return self.load_csv('gl_entries.csv')
-    
+
     def get_invoice_line_items(self):
         """Load and process invoice line items data"""
         return self.load_csv('invoice_line_items.csv')
-    
+
     def get_payment_plans(self):
         """Load and process payment plans data"""
         return self.load_csv('payment_plans.csv')
-    
+
     def get_dso_analytics(self):
         """Load and process DSO analytics data"""
         return self.load_csv('dso_analytics.csv')
-    
+
     def get_strategy_effectiveness(self):
         """Load and process strategy effectiveness data"""
         return self.load_csv('strategy_effectiveness.csv')
-    
+
     def get_collection_performance(self):
         """Load and process collection performance data"""
         return self.load_csv('collection_performance.csv')
 
+def _default_shared_store():
+    if not SHARED_DATASETS_DIR:
+        return None
+    from .shared_store import SharedDatasetStore  # POSIX-only (fcntl)
+    return SharedDatasetStore(SHARED_DATASETS_DIR)
+
 # Create a singleton instance
-data_loader = DataLoader() 
\ No newline at end of file
+data_loader = DataLoader(shared_store=_default_shared_store())
\ No newline at end of file
@@ -0,0 +1,238 @@
+# --- File: app/datasets.py ---
+# Lazy, thread-safe holder for the DataFrames the service layer works on
+
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class ReadWriteLock:
+    """
+    Writer-preferring readers-writer lock.
+
+    Any number of readers may hold the lock together; a writer waits for them
+    to drain and blocks new readers while it is waiting, so a steady stream of
+    requests cannot starve a reload.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    @contextmanager
+    def read_locked(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_locked(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class DatasetSnapshot:
+    """
+    An immutable, consistent set of DataFrames from one load.
+
+    Frames are shared between requests and must not be modified in place;
+    changes go through DatasetManager.update, which publishes a new snapshot.
+    Values derived from the frames can be memoized on the snapshot with
+    derive(); they are dropped together with it when a newer one is published.
+    versions holds the source version each watched dataset was loaded from.
+    """
+
+    def __init__(self, generation, frames, versions=None):
+        self.generation = generation
+        self.loaded_at = datetime.now()
+        self._frames = dict(frames)
+        self.versions = dict(versions or {})
+        self._derived = {}
+        self._families = {}  # family -> OrderedDict of its keys, least recently used first
+        self._derived_lock = threading.Lock()
+
+    def __getitem__(self, name):
+        return self._frames[name]
+
+    def get(self, name, default=None):
+        return self._frames.get(name, default)
+
+    def names(self):
+        return list(self._frames)
+
+    def derive(self, key, build, maxsize=None):
+        """
+        build(self), computed once per snapshot and key and then shared.
+
+        The result is shared like the frames and must be treated as read-only.
+        Concurrent first calls may both build; the first result stored wins.
+        With maxsize, key is a tuple whose first item names a family of values
+        (e.g. one per request parameter combination); only the maxsize most
+        recently used of the family are kept.
+        """
+        with self._derived_lock:
+            if key in self._derived:
+                if maxsize is not None:
+                    self._families[key[0]].move_to_end(key)
+                return self._derived[key]
+        value = build(self)
+        with self._derived_lock:
+            value = self._derived.setdefault(key, value)
+            if maxsize is not None:
+                family = self._families.setdefault(key[0], OrderedDict())
+                family[key] = None
+                family.move_to_end(key)
+                while len(family) > maxsize:
+                    del self._derived[family.popitem(last=False)[0]]
+            return value
+
+
+class DatasetManager:
+    """
+    Loads a named set of datasets on first access and swaps in new snapshots atomically.
+
+    ``loaders`` maps a dataset name to a zero-argument callable returning its
+    DataFrame. Callers grab ``snapshot()`` once per request and read every
+    frame from it, so a reload running concurrently never mixes old and new
+    data within one request.
+
+    ``versions`` optionally maps a dataset name to a zero-argument callable
+    returning the version of its source (e.g. a file signature). Datasets
+    other processes may rewrite are watched this way: snapshot() reloads one
+    whose source version moved on since it was loaded.
+    """
+
+    def __init__(self, loaders, versions=None):
+        self._loaders = dict(loaders)
+        self._versions = dict(versions or {})
+        self._snapshot = None
+        self._generation = 0
+        self._lock = ReadWriteLock()  # guards the published snapshot
+        self._write_mutex = threading.Lock()  # serialises reloads and updates
+
+    @property
+    def generation(self):
+        """Generation number of the published snapshot (0 before the first load)."""
+        with self._lock.read_locked():
+            return self._generation
+
+    def is_loaded(self):
+        with self._lock.read_locked():
+            return self._snapshot is not None
+
+    def snapshot(self):
+        """Current snapshot, loading the datasets on first access. None if loading failed."""
+        with self._lock.read_locked():
+            snapshot = self._snapshot
+        if snapshot is None:
+            self.reload(only_if_missing=True)
+            with self._lock.read_locked():
+                snapshot = self._snapshot
+        elif self._versions:
+            snapshot = self._refresh_stale(snapshot)
+        return snapshot
+
+    def reload(self, only_if_missing=False):
+        """
+        Load every dataset and publish them as a new snapshot.
+
+        Loading happens outside the readers-writer lock so requests keep being
+        served from the previous snapshot meanwhile. Returns True on success;
+        on failure the previous snapshot (if any) stays in place.
+        """
+        with self._write_mutex:
+            if only_if_missing and self._snapshot is not None:
+                return True  # another thread finished the first load while we waited
+            versions = self._source_versions(self._versions)
+            try:
+                frames = {name: loader() for name, loader in self._loaders.items()}
+            except Exception as e:
+                print(f"Error loading datasets: {e}")
+                return False
+            self._publish(frames, versions)
+            return True
+
+    def update(self, name, transform):
+        """
+        Replace one dataset with transform(current_frame) and publish the result.
+
+        transform must return a new DataFrame rather than mutating its argument.
+        """
+        with self._write_mutex:
+            current = self._snapshot
+            if current is None:
+                raise ValueError("Datasets not loaded")
+            frames = {key: current[key] for key in current.names()}
+            frames[name] = transform(current[name])
+            versions = dict(current.versions)
+            # transform may have rewritten the source itself; record the version it left behind
+            versions.update(self._source_versions([name]))
+            return self._publish(frames, versions)
+
+    def _refresh_stale(self, snapshot):
+        """snapshot, or a newer one with the watched datasets whose source changed reloaded."""
+        if self._source_versions(self._versions) == {name: snapshot.versions.get(name) for name in self._versions}:
+            return snapshot
+        with self._write_mutex:
+            current = self._snapshot
+            latest = self._source_versions(self._versions)
+            stale = [name for name in self._versions if latest[name] != current.versions.get(name)]
+            if not stale:
+                return current  # another thread refreshed while we waited
+            frames = {key: current[key] for key in current.names()}
+            try:
+                frames.update({name: self._loaders[name]() for name in stale})
+            except Exception as e:
+                print(f"Error reloading {', '.join(stale)}: {e}")
+                return current
+            return self._publish(frames, {**current.versions, **{name: latest[name] for name in stale}})
+
+    def _source_versions(self, names):
+        versions = {}
+        for name in names:
+            if name in self._versions:
+                try:
+                    versions[name] = self._versions[name]()
+                except OSError:
+                    versions[name] = None
+        return versions
+
+    def _publish(self, frames, versions=None):
+        # Caller must hold self._write_mutex
+        with self._lock.write_locked():
+            self._generation += 1
+            self._snapshot = DatasetSnapshot(self._generation, frames, versions)
+            return self._snapshot
@@ -0,0 +1,316 @@
+# --- File: app/dso.py ---
+# Days Sales Outstanding (standard and countback) from invoice and payment history
+
+import threading
+import numpy as np
+import pandas as pd
+
+ALL_GROUP = 'All'
+UNKNOWN_GROUP = 'Unknown'
+# Invoice columns whose changes move sales or AR; group columns are added per ledger
+_EVENT_COLUMNS = ('invoice_date', 'payment_date', 'payment_status')
+
+
+# A ledger cell key packs the group code above _DAY_BITS bits of day number (offset to be non-negative)
+_DAY_BITS = 32
+_DAY_OFFSET = 1 << 31
+
+
+def _day_numbers(days):
+    return pd.DatetimeIndex(days).to_numpy().astype('datetime64[D]').astype(np.int64) + _DAY_OFFSET
+
+
+class _DailyLedger:
+    """
+    Daily sales and AR movements for one grouping, stored sparsely: one cell
+    per (group, day) that has movements, sorted by group and day, with each
+    group's running totals (cumulative sales and AR balance) at its cells.
+    Memory follows the days each group actually moves on rather than days x
+    groups; totals between cells are found by binary search.
+    """
+
+    def __init__(self):
+        self.groups = pd.Index([], dtype=object)
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.sales = np.zeros(0)
+        self.ar_delta = np.zeros(0)
+        self.cum_sales = np.zeros(0)
+        self.ar = np.zeros(0)
+        self._first_day = None
+
+    @property
+    def start(self):
+        """First day with movements in any group (None while empty)."""
+        return None if self._first_day is None else self._to_timestamp(self._first_day)
+
+    @property
+    def end(self):
+        return self._to_timestamp(int((self.keys & ((1 << _DAY_BITS) - 1)).max()))
+
+    def add(self, dates, groups, sales, ar):
+        """Book movements and refresh the running totals."""
+        dates = pd.DatetimeIndex(dates).normalize()
+        valid = ~dates.isna()
+        if not valid.any():
+            return
+        dates, groups = dates[valid], np.asarray(groups, dtype=object)[valid]
+        sales, ar = np.asarray(sales, dtype='float64')[valid], np.asarray(ar, dtype='float64')[valid]
+
+        new_groups = pd.Index(pd.unique(groups), dtype=object).difference(self.groups)
+        if len(new_groups):
+            self.groups = self.groups.append(new_groups)
+        days = _day_numbers(dates)
+        first = int(days.min())
+        self._first_day = first if self._first_day is None else min(self._first_day, first)
+        keys, inverse = np.unique((self.groups.get_indexer(groups).astype(np.int64) << _DAY_BITS) | days,
+                                  return_inverse=True)
+        sales = np.bincount(inverse, weights=sales, minlength=len(keys))
+        ar = np.bincount(inverse, weights=ar, minlength=len(keys))
+
+        pos = np.searchsorted(self.keys, keys)
+        found = pos < len(self.keys)
+        found[found] = self.keys[pos[found]] == keys[found]
+        self.sales[pos[found]] += sales[found]
+        self.ar_delta[pos[found]] += ar[found]
+        new = ~found
+        if new.any():
+            self.keys = np.insert(self.keys, pos[new], keys[new])
+            self.sales = np.insert(self.sales, pos[new], sales[new])
+            self.ar_delta = np.insert(self.ar_delta, pos[new], ar[new])
+            self.cum_sales = np.insert(self.cum_sales, pos[new], 0.0)
+            self.ar = np.insert(self.ar, pos[new], 0.0)
+        self._accumulate(np.unique(keys >> _DAY_BITS))
+
+    def _accumulate(self, codes):
+        # Running totals of the touched groups, from each one's first cell
+        bounds = np.searchsorted(self.keys, np.stack([codes << _DAY_BITS, (codes + 1) << _DAY_BITS]))
+        for lo, hi in bounds.T.tolist():
+            np.cumsum(self.sales[lo:hi], out=self.cum_sales[lo:hi])
+            np.cumsum(self.ar_delta[lo:hi], out=self.ar[lo:hi])
+
+    def totals_at(self, days):
+        """Cumulative sales and AR balance of every group at the end of each day, as (days x groups) arrays."""
+        codes = np.arange(len(self.groups), dtype=np.int64)
+        wanted = (codes[None, :] << _DAY_BITS) | _day_numbers(days)[:, None]
+        pos = np.searchsorted(self.keys, wanted.ravel(), side='right') - 1
+        # Before a group's first cell its totals are 0; after its last they stay flat
+        valid = pos >= 0
+        valid[valid] = (self.keys[pos[valid]] >> _DAY_BITS) == np.broadcast_to(codes, wanted.shape).ravel()[valid]
+        pos = np.where(valid, pos, 0)
+        shape = wanted.shape
+        if not len(self.keys):
+            return np.zeros(shape), np.zeros(shape)
+        return (np.where(valid, self.cum_sales[pos], 0.0).reshape(shape),
+                np.where(valid, self.ar[pos], 0.0).reshape(shape))
+
+    def series(self, col):
+        """Day numbers and cumulative sales at the cells of one group."""
+        lo, hi = np.searchsorted(self.keys, [col << _DAY_BITS, (col + 1) << _DAY_BITS])
+        return self.keys[lo:hi] & ((1 << _DAY_BITS) - 1), self.cum_sales[lo:hi]
+
+    def last_sales_day(self):
+        """Last day with sales in any group, or None."""
+        with_sales = self.keys[self.sales != 0]
+        return self._to_timestamp(int((with_sales & ((1 << _DAY_BITS) - 1)).max())) if len(with_sales) else None
+
+    @staticmethod
+    def _to_timestamp(day_number):
+        return pd.Timestamp(np.datetime64(day_number - _DAY_OFFSET, 'D'))
+
+
+class DSOEngine:
+    """
+    DSO by period and group, maintained incrementally.
+
+    Sales and AR movements are booked per day into a ledger per grouping
+    (None, or any invoice or customer column such as customer_id,
+    sales_rep_id or state). Rolling sales windows are differences of
+    cumulative sums, so any set of periods is answered with array lookups.
+
+    basis='balance' follows how dso_analytics.csv is produced: an invoice
+    adds its balance_amount to AR from its invoice_date until its
+    payment_date once Paid. basis='ledger' uses true receivables: invoice
+    total_amount in, payments.csv amounts out.
+    """
+
+    def __init__(self, invoices, customers=None, payments=None, basis='balance', sales_column='invoice_amount'):
+        if basis not in ('balance', 'ledger'):
+            raise ValueError(f"Unknown DSO basis: {basis}")
+        self.basis = basis
+        self.sales_column = sales_column
+        self.customers = customers.set_index('customer_id') if customers is not None else None
+        self._invoices = invoices.set_index('invoice_id', drop=False)
+        self._payments = None
+        self._ledgers = {}
+        self._lock = threading.Lock()
+        if basis == 'ledger' and payments is not None:
+            self._payments = payments.iloc[:0]
+            self.add_payments(payments)
+
+    # --- maintenance ---
+
+    def sync_invoices(self, invoices):
+        """
+        Bring the engine up to date with a new version of the invoices frame.
+
+        Only invoices that were added, removed or whose dates, status, amounts
+        or grouping changed are re-booked; history is not recomputed.
+        """
+        new = invoices.set_index('invoice_id', drop=False)
+        with self._lock:
+            old = self._invoices
+            columns = self._watched_columns()
+            old_hash = pd.util.hash_pandas_object(old[columns], index=False)
+            new_hash = pd.util.hash_pandas_object(new[columns], index=False)
+            old_hash.index, new_hash.index = old.index, new.index
+            aligned = old_hash.reindex(new.index)
+            changed = new.index[aligned.isna().to_numpy() | (aligned.to_numpy() != new_hash.to_numpy())]
+            removed = old.index.difference(new.index)
+            stale = old.index.intersection(changed).append(removed)
+            for by, ledger in self._ledgers.items():
+                ledger.add(*self._invoice_events(old.loc[stale], by, sign=-1.0))
+                ledger.add(*self._invoice_events(new.loc[changed], by))
+            self._invoices = new
+        return len(changed) + len(removed)
+
+    def add_payments(self, payments):
+        """Book newly received payments (ledger basis)."""
+        if self.basis != 'ledger':
+            raise ValueError("Payments are only booked separately on the ledger basis")
+        with self._lock:
+            for by, ledger in self._ledgers.items():
+                ledger.add(*self._payment_events(payments, by))
+            if len(self._payments):
+                self._payments = pd.concat([self._payments, payments], ignore_index=True)
+            else:
+                self._payments = payments.reset_index(drop=True)
+
+    # --- queries ---
+
+    def dso(self, freq='M', method='standard', by=None, start=None, end=None, window_days=None):
+        """
+        DSO for every period of freq between start and end, per group of by.
+
+        method='standard' is AR at period end / sales in the window * days in
+        the window; the window is the period itself unless window_days gives a
+        trailing window. method='countback' counts back whole days of sales
+        from period end until they cover the AR (capped at the full history).
+        Returns period, [by], sales, ar, window_days and dso columns.
+        """
+        if method not in ('standard', 'countback'):
+            raise ValueError(f"Unknown DSO method: {method}")
+        with self._lock:
+            ledger = self._ledger(by)
+            if ledger.start is None:
+                return pd.DataFrame(columns=['period'] + ([by] if by else []) + ['sales', 'ar', 'window_days', 'dso'])
+            periods = pd.period_range(start or ledger.start, end or ledger.end, freq=freq)
+            period_end = periods.end_time.normalize()
+            if window_days:
+                window_start = period_end - pd.Timedelta(days=window_days - 1)
+            else:
+                window_start = periods.start_time.normalize()
+            days = (period_end - window_start).days.to_numpy() + 1
+
+            cum_end, ar = ledger.totals_at(period_end)
+            sales = cum_end - ledger.totals_at(window_start - pd.Timedelta(days=1))[0]
+            if method == 'standard':
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    dso = np.where(sales > 0, ar * days[:, None] / sales, np.nan)
+            else:
+                dso = self._countback(ledger, period_end, cum_end, ar)
+            groups = ledger.groups
+
+        result = pd.DataFrame({
+            'period': np.repeat(periods.astype(str), len(groups)),
+            'sales': sales.ravel(),
+            'ar': ar.ravel(),
+            'window_days': np.repeat(days, len(groups)),
+            'dso': dso.ravel(),
+        })
+        if by:
+            result.insert(1, by, np.tile(groups.to_numpy(), len(periods)))
+        return result
+
+    def current_dso(self, as_of=None, window_days=90, method='standard'):
+        """Company-wide DSO on a trailing window ending at as_of (default: the last day with sales), as an int."""
+        with self._lock:
+            last = self._ledger(None).last_sales_day()
+            if last is None:
+                return 0
+        as_of = min(pd.Timestamp(as_of).normalize(), last) if as_of is not None else last
+        row = self.dso(freq='D', method=method, start=as_of, end=as_of, window_days=window_days)
+        value = row['dso'].iloc[0] if len(row) else np.nan
+        return 0 if pd.isna(value) else int(round(value))
+
+    # --- internals ---
+
+    def _watched_columns(self):
+        columns = list(_EVENT_COLUMNS) + [self.sales_column, 'balance_amount', 'total_amount', 'customer_id']
+        columns += [by for by in self._ledgers if by and by in self._invoices.columns]
+        return list(dict.fromkeys(columns))
+
+    def _ledger(self, by):
+        # Caller must hold self._lock
+        if by not in self._ledgers:
+            if by and by not in self._invoices.columns and (self.customers is None or by not in self.customers.columns):
+                raise ValueError(f"Unknown DSO grouping: {by}")
+            ledger = _DailyLedger()
+            ledger.add(*self._invoice_events(self._invoices, by))
+            if self._payments is not None and len(self._payments):
+                ledger.add(*self._payment_events(self._payments, by))
+            self._ledgers[by] = ledger
+        return self._ledgers[by]
+
+    def _group_keys(self, invoices, by):
+        if not by:
+            return np.full(len(invoices), ALL_GROUP, dtype=object)
+        if by in invoices.columns:
+            keys = invoices[by]
+        else:
+            keys = invoices['customer_id'].map(self.customers[by])
+        return keys.astype(object).where(keys.notna(), UNKNOWN_GROUP).to_numpy()
+
+    def _invoice_events(self, invoices, by, sign=1.0):
+        keys = self._group_keys(invoices, by)
+        sales = invoices[self.sales_column].fillna(0).to_numpy(dtype='float64') * sign
+        if self.basis == 'ledger':
+            amount = invoices['total_amount'].fillna(0).to_numpy(dtype='float64') * sign
+            return invoices['invoice_date'], keys, sales, amount
+
+        balance = invoices['balance_amount'].fillna(0).to_numpy(dtype='float64') * sign
+        closed = ((invoices['payment_status'] == 'Paid') & invoices['payment_date'].notna()).to_numpy()
+        dates = pd.DatetimeIndex(invoices['invoice_date']).append(pd.DatetimeIndex(invoices['payment_date'][closed]))
+        return (
+            dates,
+            np.concatenate([keys, keys[closed]]),
+            np.concatenate([sales, np.zeros(closed.sum())]),
+            np.concatenate([balance, -balance[closed]]),
+        )
+
+    def _payment_events(self, payments, by):
+        if not by:
+            keys = np.full(len(payments), ALL_GROUP, dtype=object)
+        else:
+            invoice_keys = pd.Series(self._group_keys(self._invoices, by), index=self._invoices.index)
+            keys = payments['invoice_id'].map(invoice_keys).fillna(UNKNOWN_GROUP).to_numpy(dtype=object)
+        amount = payments['payment_amount'].fillna(0).to_numpy(dtype='float64')
+        return payments['payment_date'], keys, np.zeros(len(payments)), -amount
+
+    @staticmethod
+    def _countback(ledger, period_end, cum_end, ar):
+        dso = np.zeros_like(ar)
+        end_day = _day_numbers(period_end)
+        first_day = _day_numbers([ledger.start])[0]
+        for col in range(ar.shape[1]):
+            days, cum = ledger.series(col)
+            target = cum_end[:, col] - ar[:, col]
+            open_ar = ar[:, col] > 0
+            j = np.clip(np.searchsorted(cum, target, side='right'), 0, len(cum) - 1)
+            day_sales = cum[j] - np.where(j > 0, cum[np.maximum(j - 1, 0)], 0.0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                partial = np.where(day_sales > 0, (cum[j] - target) / day_sales, 0.0)
+            counted = (end_day - days[j]) + partial
+            exhausted = target < 0  # AR exceeds all recorded sales
+            counted = np.where(exhausted, end_day - first_day + 1, counted)
+            dso[:, col] = np.where(open_ar, counted, 0.0)
+        return dso
@@ -0,0 +1,184 @@
+# --- File: app/forecast.py ---
+# Expected-collections forecast from due dates, payment plans and each customer's payment lateness
+
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# Days late (payment date - due date) are clipped to this window
+MIN_DAYS_LATE = -60
+MAX_DAYS_LATE = 180
+# A customer's lateness histogram is shrunk towards the book-wide one with this many pseudo-payments
+PRIOR_PAYMENTS = 10
+DEFAULT_HORIZON_DAYS = 90
+MAX_FORECAST_DAYS = 366
+FORECAST_FREQS = {'D': 'D', 'W': 'W-SUN'}
+# Flow groups spread per block; bounds the dense (groups x lateness) matrix
+BLOCK_ROWS = 20_000
+OPEN_PLAN_STATUSES = ('Active',)
+FORECAST_COLUMNS = ['period', 'expected_amount', 'invoice_amount', 'plan_amount', 'cumulative_amount']
+_OFFSETS = np.arange(MIN_DAYS_LATE, MAX_DAYS_LATE + 1)
+
+
+class LatenessProfile:
+    """
+    Empirical days-late distribution per customer over _OFFSETS, from paid
+    invoices. Customers with little history lean on the book-wide
+    distribution; unknown customers get it outright.
+    """
+
+    def __init__(self, payments, invoices):
+        due = invoices.set_index(invoices['invoice_id'].astype(object))['due_date']
+        due_dates = payments['invoice_id'].astype(object).map(due)
+        late = (payments['payment_date'] - due_dates).dt.days
+        valid = late.notna().to_numpy()
+        offset = np.clip(late.to_numpy()[valid], MIN_DAYS_LATE, MAX_DAYS_LATE).astype(int) - MIN_DAYS_LATE
+        codes, customers = pd.factorize(payments['customer_id'].astype(object).to_numpy()[valid])
+        width = len(_OFFSETS)
+        counts = np.bincount(codes * width + offset, minlength=len(customers) * width).reshape(len(customers), width)
+        book = counts.sum(axis=0).astype('float64')
+        self.book = book / book.sum() if book.sum() else np.full(width, 1.0 / width)
+        history = counts.sum(axis=1, keepdims=True)
+        self.matrix = np.vstack([(counts + PRIOR_PAYMENTS * self.book) / (history + PRIOR_PAYMENTS), self.book])
+        self.customers = pd.Index(customers)
+        self.payments = history.ravel()
+
+    def rows(self, customer_ids):
+        """Row of matrix per customer id; unknown customers map to the book-wide row."""
+        rows = self.customers.get_indexer(pd.Index(customer_ids, dtype=object))
+        return np.where(rows >= 0, rows, len(self.customers))
+
+    def expected_days_late(self, customer_id):
+        return float(self.matrix[self.rows([customer_id])[0]] @ _OFFSETS)
+
+
+def invoice_flows(invoices, payment_plans, as_of):
+    """Open invoice balances anchored at their due date; invoices under an open payment plan are left out."""
+    covered = set()
+    if payment_plans is not None and len(payment_plans):
+        open_plans = payment_plans['status'].astype(object).isin(OPEN_PLAN_STATUSES)
+        covered = set(payment_plans.loc[open_plans, 'invoice_id'].astype(object))
+    open_mask = ((invoices['balance_amount'].fillna(0) > 0) & (invoices['payment_status'].astype(object) != 'Paid')
+                 & ~invoices['invoice_id'].astype(object).isin(covered))
+    rows = invoices[open_mask]
+    due = rows['due_date'].fillna(as_of)
+    return pd.DataFrame({
+        'customer_id': rows['customer_id'].astype(object).to_numpy(),
+        'day': (due - as_of).dt.days.to_numpy(),
+        'amount': rows['balance_amount'].to_numpy(dtype='float64'),
+    })
+
+
+def plan_flows(payment_plans, as_of):
+    """
+    Remaining installments of open payment plans, monthly from
+    next_installment_date (the day clipped to month end); the last
+    installment takes whatever remaining_balance is left.
+    """
+    if payment_plans is None or not len(payment_plans):
+        return pd.DataFrame({'customer_id': [], 'day': [], 'amount': []})
+    plans = payment_plans[payment_plans['status'].astype(object).isin(OPEN_PLAN_STATUSES)]
+    remaining = (plans['installments'] - plans['installments_paid']).clip(lower=1).to_numpy(dtype=int)
+    balance = plans['remaining_balance'].fillna(0).to_numpy(dtype='float64')
+    keep = balance > 0
+    plans, remaining, balance = plans[keep], remaining[keep], balance[keep]
+
+    owner = np.repeat(np.arange(len(plans)), remaining)
+    step = np.arange(len(owner)) - np.repeat(np.cumsum(remaining) - remaining, remaining)
+    first = plans['next_installment_date'].fillna(as_of).to_numpy().astype('datetime64[D]')[owner]
+    base_month = first.astype('datetime64[M]')
+    month = base_month + step
+    month_start = month.astype('datetime64[D]')
+    month_length = ((month + 1).astype('datetime64[D]') - month_start).astype(int)
+    day_of_month = (first - base_month.astype('datetime64[D]')).astype(int)
+    dates = month_start + np.minimum(day_of_month, month_length - 1)
+
+    installment = plans['installment_amount'].fillna(0).to_numpy(dtype='float64')[owner]
+    paid_before = installment * step
+    amount = np.clip(balance[owner] - paid_before, 0, None)
+    last = step == remaining[owner] - 1
+    amount = np.where(last, amount, np.minimum(installment, amount))
+    return pd.DataFrame({
+        'customer_id': plans['customer_id'].astype(object).to_numpy()[owner],
+        'day': (dates - np.datetime64(as_of.date(), 'D')).astype(int),
+        'amount': amount,
+    })
+
+
+def spread_flows(flows, profile, horizon):
+    """
+    Expected receipts per day 0..horizon-1 for flows anchored at 'day'
+    (relative to as_of), plus the amount expected after the horizon and the
+    amount not expected at all.
+
+    Each flow's receipt day is its anchor plus the customer's days-late
+    distribution. A flow already d days past its anchor is still unpaid, so
+    its distribution is conditioned on being at least d days late; when no
+    history is that late the amount counts as not expected. Flows are
+    grouped by (customer, anchor day), and each block of groups is one dense
+    (groups x lateness) product scattered into the day histogram with
+    np.bincount.
+    """
+    daily = np.zeros(horizon)
+    beyond = unexpected = 0.0
+    if not len(flows):
+        return daily, beyond, unexpected
+    grouped = flows.groupby(['customer_id', 'day'], sort=False)['amount'].sum().reset_index()
+    rows = profile.rows(grouped['customer_id'])
+    anchor = grouped['day'].to_numpy(dtype=int)
+    amount = grouped['amount'].to_numpy(dtype='float64')
+    for start in range(0, len(grouped), BLOCK_ROWS):
+        block = slice(start, start + BLOCK_ROWS)
+        probs = profile.matrix[rows[block]]
+        receipt = anchor[block, None] + _OFFSETS[None, :]
+        probs = np.where(receipt >= 0, probs, 0.0)
+        mass = probs.sum(axis=1)
+        unexpected += float(amount[block][mass <= 0].sum())
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weights = np.where(mass[:, None] > 0, probs / mass[:, None], 0.0) * amount[block, None]
+        inside = (receipt >= 0) & (receipt < horizon)
+        daily += np.bincount(receipt[inside], weights=weights[inside], minlength=horizon)
+        beyond += float(weights[receipt >= horizon].sum())
+    return daily, beyond, unexpected
+
+
+def forecast_collections(invoices, payment_plans, payments, as_of=None, horizon=DEFAULT_HORIZON_DAYS,
+                         freq='D', profile=None):
+    """
+    Expected collections over the next horizon days, by day ('D') or
+    calendar week ('W'). Returns (periods, summary): periods has
+    FORECAST_COLUMNS split into open-invoice and payment-plan receipts;
+    summary has the open amount and how much falls inside the horizon,
+    after it, or is not expected given the customers' payment history.
+    """
+    if freq not in FORECAST_FREQS:
+        raise ValueError(f"freq must be one of {', '.join(FORECAST_FREQS)}")
+    if horizon < 1:
+        raise ValueError("horizon must be at least one day")
+    as_of = pd.Timestamp(as_of if as_of is not None else datetime.now().date()).normalize()
+    profile = profile or LatenessProfile(payments, invoices)
+
+    parts = {}
+    for name, flows in (('invoice', invoice_flows(invoices, payment_plans, as_of)),
+                        ('plan', plan_flows(payment_plans, as_of))):
+        parts[name] = spread_flows(flows, profile, horizon) + (float(flows['amount'].sum()),)
+
+    days = pd.date_range(as_of, periods=horizon, freq='D')
+    daily = pd.DataFrame({'invoice_amount': parts['invoice'][0], 'plan_amount': parts['plan'][0]}, index=days)
+    if freq != 'D':
+        daily = daily.groupby(days.to_period(FORECAST_FREQS[freq]).start_time).sum()
+    periods = daily.round(2).rename_axis('period').reset_index()
+    periods['expected_amount'] = (periods['invoice_amount'] + periods['plan_amount']).round(2)
+    periods['cumulative_amount'] = periods['expected_amount'].cumsum().round(2)
+
+    open_amount = parts['invoice'][3] + parts['plan'][3]
+    within = float(daily.to_numpy().sum())
+    summary = {
+        'open_amount': round(open_amount, 2),
+        'expected_within_horizon': round(within, 2),
+        'expected_after_horizon': round(parts['invoice'][1] + parts['plan'][1], 2),
+        'not_expected': round(parts['invoice'][2] + parts['plan'][2], 2),
+        'plan_amount': round(parts['plan'][3], 2),
+        'customers_with_history': int((profile.payments > 0).sum()),
+    }
+    return periods[FORECAST_COLUMNS], summary
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from config import DATA_DIR
+from app.schemas import parse_dataset
+from app.sidecars import build_sidecars, sidecars_available
+
+
+class Command(BaseCommand):
+    help = 'Convert the CSV datasets into typed columnar (Feather) sidecars'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--data-dir', default=DATA_DIR, help='Directory containing the CSV datasets')
+        parser.add_argument('--force', action='store_true', help='Rebuild sidecars even if they are fresh')
+
+    def handle(self, *args, **options):
+        if not sidecars_available():
+            raise CommandError('pyarrow is not installed; columnar sidecars are unavailable')
+
+        for filename, status in build_sidecars(options['data_dir'], parse=parse_dataset, force=options['force']):
+            style = self.style.ERROR if status.startswith('error') else self.style.SUCCESS
+            self.stdout.write(style(f"{filename}: {status}"))
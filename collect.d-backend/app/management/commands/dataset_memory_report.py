@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from config import DATA_DIR
+from app.schemas import memory_report
+
+
+class Command(BaseCommand):
+    help = 'Report per-dataset memory use before and after applying the dataset schemas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--data-dir', default=DATA_DIR, help='Directory containing the CSV datasets')
+
+    def handle(self, *args, **options):
+        report = memory_report(options['data_dir'])
+        self.stdout.write(f"{'dataset':<30}{'rows':>8}{'raw KiB':>12}{'typed KiB':>12}{'saved':>8}")
+        for row in report:
+            self.stdout.write(
+                f"{row['dataset']:<30}{row['rows']:>8}{row['raw_bytes'] / 1024:>12.1f}"
+                f"{row['typed_bytes'] / 1024:>12.1f}{row['saved_pct']:>7.1f}%"
+            )
+        raw_total = sum(row['raw_bytes'] for row in report)
+        typed_total = sum(row['typed_bytes'] for row in report)
+        self.stdout.write(f"{'TOTAL':<30}{'':>8}{raw_total / 1024:>12.1f}{typed_total / 1024:>12.1f}")
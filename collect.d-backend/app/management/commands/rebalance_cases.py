@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from config import DATA_DIR
+from app.analytics import write_dataset
+from app.assignment import apply_assignments, plan_rebalance
+from app.data_loaders import DataLoader
+
+CASES_FILE = 'collection_cases.csv'
+
+
+class Command(BaseCommand):
+    help = 'Redistribute open collection cases across collectors (dry run unless --apply)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--data-dir', default=DATA_DIR, help='Directory containing the CSV datasets')
+        parser.add_argument('--capacity', type=int, default=None, help='Open-case capacity per collector')
+        parser.add_argument('--diff', default=None, help='Write the moved cases to this CSV file')
+        parser.add_argument('--apply', action='store_true', help='Rewrite collection_cases.csv with the new assignment')
+
+    def handle(self, *args, **options):
+        loader = DataLoader(data_dir=options['data_dir'])
+        cases = loader.get_collection_cases()
+        plan = plan_rebalance(cases, capacity=options['capacity'])
+
+        self.stdout.write(f"{'':<16}{'max amount':>16}{'min amount':>16}{'cv':>8}{'max load':>10}{'max cases':>11}")
+        for label in ('current', 'proposed'):
+            m = plan[label]
+            self.stdout.write(f"{label:<16}{m['max_amount']:>16,.2f}{m['min_amount']:>16,.2f}"
+                              f"{m['cv_amount']:>8.3f}{m['max_load_ratio']:>10.2f}{m['max_open_cases']:>11}")
+        diff = plan['diff']
+        self.stdout.write(f"{len(diff)} case(s) would move")
+        if options['diff']:
+            diff.to_csv(options['diff'], index=False)
+            self.stdout.write(f"Diff written to {options['diff']}")
+
+        if options['apply'] and len(diff):
+            write_dataset(loader.data_dir, CASES_FILE, apply_assignments(cases, diff))
+            self.stdout.write(self.style.SUCCESS(f"Reassigned {len(diff)} case(s) in {CASES_FILE}"))
+        elif not options['apply']:
+            self.stdout.write(self.style.WARNING('Dry run: no changes written (use --apply)'))
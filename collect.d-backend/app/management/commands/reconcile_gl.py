@@ -0,0 +1,43 @@
+import os
+from django.core.management.base import BaseCommand
+from config import DATA_DIR
+from app.data_loaders import DataLoader
+from app.reconciliation import AMOUNT_TOLERANCE, GL_CHUNK_ROWS, RELATIVE_TOLERANCE, read_gl_chunks, reconcile
+
+
+class Command(BaseCommand):
+    help = 'Reconcile GL accounts-receivable postings against invoices and payments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--data-dir', default=DATA_DIR, help='Directory containing the CSV datasets')
+        parser.add_argument('--gl', default=None, help='GL entries CSV (default: gl_entries.csv in --data-dir)')
+        parser.add_argument('--chunk-rows', type=int, default=GL_CHUNK_ROWS, help='GL lines read per chunk')
+        parser.add_argument('--tolerance', type=float, default=AMOUNT_TOLERANCE, help='Absolute amount tolerance')
+        parser.add_argument('--relative-tolerance', type=float, default=RELATIVE_TOLERANCE,
+                            help='Tolerance as a fraction of the subledger amount')
+        parser.add_argument('--output', default=None,
+                            help='Write breaks to <output>_documents.csv and <output>_customers.csv')
+
+    def handle(self, *args, **options):
+        loader = DataLoader(data_dir=options['data_dir'])
+        gl_path = options['gl'] or os.path.join(loader.data_dir, 'gl_entries.csv')
+        result = reconcile(read_gl_chunks(gl_path, options['chunk_rows']), loader.get_invoice_data(),
+                           loader.get_payment_data(), abs_tol=options['tolerance'],
+                           rel_tol=options['relative_tolerance'])
+        summary = result['summary']
+        self.stdout.write(f"Read {summary['gl_lines']} GL lines in {summary['gl_chunks']} chunk(s); "
+                          f"{summary['gl_documents']} documents posted to AR")
+        self.stdout.write(f"GL AR {summary['gl_ar_balance']:,.2f} vs subledger {summary['subledger_ar_balance']:,.2f} "
+                          f"(difference {summary['difference']:,.2f})")
+        for break_type, count in summary['document_breaks'].items():
+            self.stdout.write(f"  {break_type:<20}{count:>8}")
+        self.stdout.write(f"  {'customer balances':<20}{summary['customer_breaks']:>8}")
+        if options['output']:
+            for name in ('documents', 'customers'):
+                result[name].to_csv(f"{options['output']}_{name}.csv", index=False)
+            self.stdout.write(f"Breaks written to {options['output']}_documents.csv and {options['output']}_customers.csv")
+
+        if sum(summary['document_breaks'].values()) or summary['customer_breaks']:
+            self.stdout.write(self.style.WARNING('Reconciliation has breaks'))
+        else:
+            self.stdout.write(self.style.SUCCESS('GL reconciles to the subledgers'))
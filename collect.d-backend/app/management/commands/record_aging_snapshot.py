@@ -0,0 +1,28 @@
+import pandas as pd
+from django.core.management.base import BaseCommand
+from config import AGING_SNAPSHOTS_DIR, DATA_DIR
+from app.data_loaders import DataLoader
+from app.roll_rates import AgingSnapshotStore
+
+
+class Command(BaseCommand):
+    help = "Store today's aging bucket of every invoice (run daily), or backfill past days from invoice dates"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--data-dir', default=DATA_DIR, help='Directory containing the CSV datasets')
+        parser.add_argument('--snapshot-dir', default=AGING_SNAPSHOTS_DIR, help='Directory holding the daily snapshots')
+        parser.add_argument('--as-of', default=None, help='Snapshot date (YYYY-MM-DD, default today)')
+        parser.add_argument('--backfill-from', default=None,
+                            help='Reconstruct every day from this date to --as-of from invoice and payment dates')
+
+    def handle(self, *args, **options):
+        invoices = DataLoader(data_dir=options['data_dir']).get_invoice_data()
+        store = AgingSnapshotStore(options['snapshot_dir'])
+        if options['backfill_from']:
+            days = store.backfill(invoices, options['backfill_from'], options['as_of'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Backfilled {days} daily snapshot(s) of {len(invoices)} invoices into {options['snapshot_dir']}"))
+            return
+        as_of = pd.Timestamp(options['as_of']) if options['as_of'] else None
+        recorded = store.record(invoices, as_of)
+        self.stdout.write(self.style.SUCCESS(f"Recorded the aging state of {recorded} invoices in {options['snapshot_dir']}"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from config import DATA_DIR
+from app.analytics import run_pipeline
+
+
+class Command(BaseCommand):
+    help = 'Regenerate dso_analytics.csv and collection_performance.csv from invoices and collection cases'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--data-dir', default=DATA_DIR, help='Directory containing the CSV datasets')
+        parser.add_argument('--full', action='store_true', help='Recompute every month instead of only new ones')
+        parser.add_argument('--as-of', default=None, help='Assessment date for collection_performance (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        summary = run_pipeline(options['data_dir'], full=options['full'], as_of=options['as_of'])
+        months = ', '.join(summary['months_computed']) or 'none'
+        self.stdout.write(self.style.SUCCESS(
+            f"dso_analytics: computed {months} ({summary['months_total']} months total); "
+            f"collection_performance: {summary['collectors']} collectors"))
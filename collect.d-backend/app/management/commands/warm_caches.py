@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from app.warmup import warm_up, format_timing_table
+
+
+class Command(BaseCommand):
+    help = 'Load all datasets concurrently and print per-dataset load timings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Size of the thread/process pool')
+        parser.add_argument('--mode', choices=['thread', 'process'], default='thread',
+                            help="'process' parses the larger CSVs in worker processes")
+
+    def handle(self, *args, **options):
+        results = warm_up(max_workers=options['workers'], mode=options['mode'])
+        self.stdout.write(format_timing_table(results))
+        failed = [r for r in results if r['error']]
+        if failed:
+            self.stdout.write(self.style.ERROR(f"{len(failed)} dataset(s) failed to load"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Warmed {len(results)} datasets"))
@@ -0,0 +1,159 @@
+# --- File: app/query.py ---
+# Server-side filtering, ordering and pagination of cached dataset frames
+
+import pandas as pd
+
+# Query parameters that are not column filters
+RESERVED_PARAMS = {'page', 'page_size', 'ordering', 'fields', 'exclude', 'format'}
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+LOOKUPS = ('in', 'ne', 'lt', 'lte', 'gt', 'gte', 'contains', 'icontains', 'isnull')
+
+
+class QueryError(ValueError):
+    """Invalid query parameters; reported to the client as HTTP 400."""
+
+
+def _coerce(series, raw):
+    """Convert a query-string value to the type of the column it is compared with."""
+    kind = series.dtype.kind
+    try:
+        if kind == 'M':
+            return pd.Timestamp(raw)
+        if kind in 'iuf':
+            return float(raw)
+        if kind == 'b':
+            return raw.lower() in ('1', 'true', 'yes')
+    except ValueError:
+        raise QueryError(f"Invalid value {raw!r} for column {series.name!r}")
+    return raw
+
+
+def _column_mask(series, lookup, raw):
+    if lookup == 'isnull':
+        mask = series.isna()
+        return mask if raw.lower() in ('1', 'true', 'yes') else ~mask
+    if lookup == 'in':
+        return series.isin([_coerce(series, value) for value in raw.split(',')])
+    if lookup in ('contains', 'icontains'):
+        return series.astype('string').str.contains(raw, case=(lookup == 'contains'), regex=False, na=False)
+
+    value = _coerce(series, raw)
+    if lookup == '':
+        return series == value
+    if lookup == 'ne':
+        return series != value
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Unordered categoricals don't support range comparisons; compare the values
+        series = series.astype(series.cat.categories.dtype)
+    try:
+        if lookup == 'lt':
+            return series < value
+        if lookup == 'lte':
+            return series <= value
+        if lookup == 'gt':
+            return series > value
+        return series >= value
+    except TypeError:
+        raise QueryError(f"Lookup {lookup!r} is not supported for column {series.name!r}")
+
+
+def parse_filters(df, params):
+    """Yield (column, lookup, raw_value) for every filter parameter, validating column names."""
+    for key in params:
+        if key in RESERVED_PARAMS or key.startswith('_'):
+            continue
+        column, _, lookup = key.partition('__')
+        if lookup and lookup not in LOOKUPS:
+            raise QueryError(f"Unknown lookup {lookup!r} in {key!r}")
+        if column not in df.columns:
+            raise QueryError(f"Unknown filter column {column!r}")
+        for raw in params.getlist(key) if hasattr(params, 'getlist') else [params[key]]:
+            yield column, lookup, raw
+
+
+def filter_frame(df, params):
+    """Rows of df matching every filter parameter (e.g. customer_id=, due_date__lt=)."""
+    mask = None
+    for column, lookup, raw in parse_filters(df, params):
+        column_mask = _column_mask(df[column], lookup, raw).to_numpy(dtype=bool, na_value=False)
+        mask = column_mask if mask is None else mask & column_mask
+    return df if mask is None else df[mask]
+
+
+def order_frame(df, ordering):
+    """Sort df by a comma-separated ordering spec such as "-due_date,customer_id"."""
+    if not ordering:
+        return df
+    columns, ascending = [], []
+    for part in ordering.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name = part.lstrip('-')
+        if name not in df.columns:
+            raise QueryError(f"Unknown ordering column {name!r}")
+        columns.append(name)
+        ascending.append(not part.startswith('-'))
+    if not columns:
+        return df
+    return df.sort_values(columns, ascending=ascending, kind='stable', na_position='last')
+
+
+def _column_list(df, params, name):
+    raw = params.get(name)
+    if not raw:
+        return None
+    columns = [col.strip() for col in raw.split(',') if col.strip()]
+    unknown = [col for col in columns if col not in df.columns]
+    if unknown:
+        raise QueryError(f"Unknown {name} column(s): {', '.join(unknown)}")
+    return columns
+
+
+def project_frame(df, params):
+    """Keep only the columns named in fields= and drop those named in exclude= (sparse fieldsets)."""
+    fields = _column_list(df, params, 'fields')
+    exclude = _column_list(df, params, 'exclude')
+    if fields is not None:
+        df = df[list(dict.fromkeys(fields))]
+    if exclude is not None:
+        df = df.drop(columns=[col for col in exclude if col in df.columns])
+    return df
+
+
+def _positive_int(params, name, default):
+    raw = params.get(name)
+    if raw in (None, ''):
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise QueryError(f"{name} must be an integer")
+    if value < 1:
+        raise QueryError(f"{name} must be at least 1")
+    return value
+
+
+def apply_query(df, params):
+    """
+    Filter, order, paginate and project df according to request query parameters.
+
+    Filters and ordering may use any column; fields=/exclude= only shape
+    what is serialized, so they are applied last, to the selected rows.
+
+    Returns (frame, total_count, page_info); page_info is None unless the
+    client asked for a page with ``page`` or ``page_size``.
+    """
+    # Validate the projection up front so a bad fields= fails before any work is done
+    project_frame(df.iloc[:0], params)
+    result = order_frame(filter_frame(df, params), params.get('ordering'))
+    total = len(result)
+    if 'page' not in params and 'page_size' not in params:
+        return project_frame(result, params), total, None
+
+    page = _positive_int(params, 'page', 1)
+    page_size = min(_positive_int(params, 'page_size', DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE)
+    start = (page - 1) * page_size
+    page_info = {'page': page, 'page_size': page_size, 'num_pages': max(1, -(-total // page_size))}
+    return project_frame(result.iloc[start:start + page_size], params), total, page_info
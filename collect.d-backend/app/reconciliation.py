@@ -0,0 +1,184 @@
+# --- File: app/reconciliation.py ---
+# Reconciling GL accounts-receivable postings against the invoice and payment subledgers
+
+import numpy as np
+import pandas as pd
+
+GL_AR_ACCOUNT = 120000
+# GL lines read per chunk; only the per-document partial sums are kept in memory
+GL_CHUNK_ROWS = 250_000
+# Partial sums are folded together once this many document rows have piled up
+COMBINE_ROWS = 1_000_000
+GL_COLUMNS = ['document_type', 'document_number', 'account_code', 'debit', 'credit', 'customer_id']
+# A document breaks when GL and subledger differ by more than the larger of these
+AMOUNT_TOLERANCE = 0.01
+RELATIVE_TOLERANCE = 0.0
+# Payments in these statuses are expected to have been posted to the GL
+POSTED_PAYMENT_STATUSES = ('Processed',)
+BREAK_TYPES = ('missing_posting', 'amount_mismatch', 'customer_mismatch', 'orphan_posting')
+BREAK_COLUMNS = ['break_type', 'document_type', 'document_number', 'customer_id', 'gl_customer_id',
+                 'gl_amount', 'subledger_amount', 'difference']
+CUSTOMER_BREAK_COLUMNS = ['customer_id', 'gl_balance', 'subledger_balance', 'difference', 'documents']
+_KEYS = ['document_type', 'document_number', 'customer_id']
+
+
+def read_gl_chunks(path, chunk_rows=GL_CHUNK_ROWS):
+    """Iterate gl_entries.csv in chunks of chunk_rows lines, reading only the columns reconciliation needs."""
+    return pd.read_csv(
+        path, usecols=GL_COLUMNS, chunksize=chunk_rows,
+        dtype={'document_type': str, 'document_number': str, 'customer_id': str,
+               'account_code': 'int64', 'debit': 'float64', 'credit': 'float64'},
+    )
+
+
+def _partial(chunk, ar_account):
+    # Net AR (debit - credit) and line count per document and customer in one chunk
+    ar = chunk[chunk['account_code'] == ar_account]
+    frame = pd.DataFrame({
+        'document_type': ar['document_type'].astype(object).to_numpy(),
+        'document_number': ar['document_number'].astype(object).to_numpy(),
+        'customer_id': ar['customer_id'].astype(object).fillna('').to_numpy(),
+        'net': ar['debit'].fillna(0).to_numpy(dtype='float64') - ar['credit'].fillna(0).to_numpy(dtype='float64'),
+        'lines': 1,
+    })
+    return frame.groupby(_KEYS, sort=False).sum()
+
+
+def _combine(partials):
+    return pd.concat(partials).groupby(level=_KEYS, sort=False).sum()
+
+
+def gl_ar_postings(chunks, ar_account=GL_AR_ACCOUNT):
+    """
+    Net AR posting per (document_type, document_number, customer_id) over an
+    iterable of GL chunks (or a single GL frame), with the number of AR lines
+    and total lines read. Each chunk is reduced to per-document partial sums
+    as it arrives, so memory is bounded by the number of documents rather
+    than the number of GL lines.
+    """
+    if isinstance(chunks, pd.DataFrame):
+        chunks = [chunks]
+    partials, pending, lines_read, chunk_count = [], 0, 0, 0
+    for chunk in chunks:
+        lines_read += len(chunk)
+        chunk_count += 1
+        partial = _partial(chunk, ar_account)
+        partials.append(partial)
+        pending += len(partial)
+        if pending > COMBINE_ROWS and len(partials) > 1:
+            partials = [_combine(partials)]
+            pending = len(partials[0])
+    if partials:
+        postings = _combine(partials).reset_index()
+    else:
+        postings = pd.DataFrame({'document_type': [], 'document_number': [], 'customer_id': [], 'net': [], 'lines': []})
+    postings['customer_id'] = postings['customer_id'].replace('', None)
+    return postings, {'gl_lines': lines_read, 'gl_chunks': chunk_count, 'ar_lines': int(postings['lines'].sum())}
+
+
+def _subledger(invoices, payments):
+    # Expected AR movement per document: invoices debit their total, posted payments credit their amount
+    documents = [pd.DataFrame({
+        'document_type': 'Invoice',
+        'document_number': invoices['invoice_id'].astype(object).to_numpy(),
+        'customer_id': invoices['customer_id'].astype(object).to_numpy(),
+        'expected': invoices['total_amount'].fillna(0).to_numpy(dtype='float64'),
+    })]
+    if payments is not None:
+        if 'status' in payments.columns:
+            payments = payments[payments['status'].astype(object).isin(POSTED_PAYMENT_STATUSES)]
+        documents.append(pd.DataFrame({
+            'document_type': 'Payment',
+            'document_number': payments['payment_id'].astype(object).to_numpy(),
+            'customer_id': payments['customer_id'].astype(object).to_numpy(),
+            'expected': payments['payment_amount'].fillna(0).to_numpy(dtype='float64'),
+        }))
+    return pd.concat(documents, ignore_index=True)
+
+
+def _exceeds(difference, expected, abs_tol, rel_tol):
+    return np.abs(difference) > np.maximum(abs_tol, np.abs(expected) * rel_tol) + 1e-9
+
+
+def document_breaks(postings, invoices, payments=None, abs_tol=AMOUNT_TOLERANCE, rel_tol=RELATIVE_TOLERANCE):
+    """
+    Document-level breaks between GL postings and the subledgers: subledger
+    documents with no AR posting, postings whose amount (signed so payments
+    are positive) differs beyond tolerance, postings against another
+    customer, and AR postings with no subledger document.
+    """
+    gl = postings.groupby(['document_type', 'document_number'], sort=False).agg(
+        gl_net=('net', 'sum'), gl_customer_id=('customer_id', 'first'))
+    sign = np.where(gl.index.get_level_values('document_type') == 'Payment', -1.0, 1.0)
+    gl['gl_amount'] = gl['gl_net'] * sign
+    sub = _subledger(invoices, payments).set_index(['document_type', 'document_number'])
+    joined = sub.join(gl[['gl_amount', 'gl_customer_id']], how='outer')
+
+    has_gl = joined['gl_amount'].notna().to_numpy()
+    has_sub = joined['expected'].notna().to_numpy()
+    difference = joined['gl_amount'].fillna(0).to_numpy() - joined['expected'].fillna(0).to_numpy()
+    break_type = np.select(
+        [
+            has_sub & ~has_gl,
+            has_gl & ~has_sub,
+            has_gl & has_sub & _exceeds(difference, joined['expected'].fillna(0).to_numpy(), abs_tol, rel_tol),
+            has_gl & has_sub & (joined['gl_customer_id'].astype(object) != joined['customer_id'].astype(object)).to_numpy(),
+        ],
+        ['missing_posting', 'orphan_posting', 'amount_mismatch', 'customer_mismatch'],
+        default='',
+    )
+    keep = break_type != ''
+    breaks = joined[keep].reset_index()
+    breaks['break_type'] = break_type[keep]
+    breaks['subledger_amount'] = breaks.pop('expected')
+    breaks['difference'] = np.round(difference[keep], 2)
+    return breaks[BREAK_COLUMNS].reset_index(drop=True)
+
+
+def customer_breaks(postings, invoices, abs_tol=AMOUNT_TOLERANCE, rel_tol=RELATIVE_TOLERANCE):
+    """
+    Customers whose net GL AR balance differs from their open invoice
+    balances. Tolerance grows with the customer's document count, since each
+    document may carry a rounding cent.
+    """
+    gl = postings.groupby('customer_id', sort=False).agg(gl_balance=('net', 'sum'), gl_documents=('net', 'size'))
+    ids = invoices['customer_id'].astype(object)
+    sub = invoices['balance_amount'].fillna(0).groupby(ids.to_numpy(), sort=False).agg(['sum', 'size'])
+    sub.columns = ['subledger_balance', 'invoice_documents']
+    joined = gl.join(sub, how='outer').fillna(0)
+    documents = np.maximum(joined['gl_documents'], joined['invoice_documents']).astype(int)
+    difference = (joined['gl_balance'] - joined['subledger_balance']).to_numpy()
+    keep = _exceeds(difference, joined['subledger_balance'].to_numpy(), abs_tol * np.maximum(documents, 1), rel_tol)
+    breaks = pd.DataFrame({
+        'customer_id': joined.index[keep],
+        'gl_balance': np.round(joined['gl_balance'].to_numpy()[keep], 2),
+        'subledger_balance': np.round(joined['subledger_balance'].to_numpy()[keep], 2),
+        'difference': np.round(difference[keep], 2),
+        'documents': documents[keep],
+    })
+    return breaks[CUSTOMER_BREAK_COLUMNS]
+
+
+def reconcile(gl, invoices, payments=None, abs_tol=AMOUNT_TOLERANCE, rel_tol=RELATIVE_TOLERANCE,
+              ar_account=GL_AR_ACCOUNT):
+    """
+    Reconcile GL AR postings (a frame, or an iterable of chunks such as
+    read_gl_chunks) against invoices and payments. Returns {'documents':
+    document breaks, 'customers': customer balance breaks, 'summary'}.
+    """
+    postings, read = gl_ar_postings(gl, ar_account)
+    documents = document_breaks(postings, invoices, payments, abs_tol, rel_tol)
+    customers = customer_breaks(postings, invoices, abs_tol, rel_tol)
+    counts = documents['break_type'].value_counts()
+    summary = dict(read)
+    summary.update({
+        'gl_documents': int(postings[['document_type', 'document_number']].drop_duplicates().shape[0]),
+        'invoices': len(invoices),
+        'payments': 0 if payments is None else len(payments),
+        'gl_ar_balance': round(float(postings['net'].sum()), 2),
+        'subledger_ar_balance': round(float(invoices['balance_amount'].fillna(0).sum()), 2),
+        'document_breaks': {name: int(counts.get(name, 0)) for name in BREAK_TYPES},
+        'customer_breaks': len(customers),
+    })
+    summary['difference'] = round(summary['gl_ar_balance'] - summary['subledger_ar_balance'], 2)
+    return {'documents': documents, 'customers': customers, 'summary': summary}
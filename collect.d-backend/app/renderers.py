@@ -0,0 +1,69 @@
+# --- File: app/renderers.py ---
+# DRF renderer that encodes DataFrames to JSON column-wise instead of row dicts
+
+import json
+import numpy as np
+import pandas as pd
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+# Significant digits a double always round-trips; floats are written with no more than this
+JSON_SIGNIFICANT_DIGITS = 15
+# pandas' default double_precision (decimals after the point)
+MAX_JSON_DECIMALS = 10
+
+
+def format_dates(df):
+    """Shallow copy of df with datetime columns as YYYY-MM-DD strings (the API's date format)."""
+    date_cols = [col for col in df.columns if df[col].dtype.kind == 'M']
+    if not date_cols:
+        return df
+    df = df.copy(deep=False)
+    for col in date_cols:
+        df[col] = df[col].dt.strftime('%Y-%m-%d')
+    return df
+
+
+def json_precision(df):
+    """
+    double_precision for df.to_json. pandas writes a fixed number of
+    decimals, so at its default of 10 an amount such as 5307713.67 comes out
+    as 5307713.6699999999; the decimals are capped so the largest float in
+    df stays within JSON_SIGNIFICANT_DIGITS.
+    """
+    values = df.select_dtypes('floating').to_numpy(dtype='float64').ravel()
+    values = np.abs(values[np.isfinite(values)])
+    if not len(values) or values.max() < 1:
+        return MAX_JSON_DECIMALS
+    digits = int(np.floor(np.log10(values.max()))) + 1
+    return int(np.clip(JSON_SIGNIFICANT_DIGITS - digits, 0, MAX_JSON_DECIMALS))
+
+
+def frame_json(df):
+    """Encode df as a JSON array of row objects; NaN/NaT/None become null."""
+    return format_dates(df).to_json(orient='records', double_precision=json_precision(df)).encode()
+
+
+class DataFrameJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that accepts DataFrames directly.
+
+    A DataFrame, or a dict whose values include DataFrames (such as a
+    pagination envelope), is encoded by pandas' vectorised writer without
+    building a Python dict per row. Any other data is rendered exactly as
+    JSONRenderer would.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, pd.DataFrame):
+            return frame_json(data)
+        if isinstance(data, dict) and any(isinstance(v, pd.DataFrame) for v in data.values()):
+            parts = []
+            for key, value in data.items():
+                encoded = frame_json(value) if isinstance(value, pd.DataFrame) else json.dumps(
+                    value, cls=encoders.JSONEncoder, ensure_ascii=self.ensure_ascii, allow_nan=False,
+                    separators=(',', ':'),
+                ).encode()
+                parts.append(json.dumps(str(key)).encode() + b':' + encoded)
+            return b'{' + b','.join(parts) + b'}'
+        return super().render(data, accepted_media_type, renderer_context)
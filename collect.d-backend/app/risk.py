@@ -0,0 +1,265 @@
+# --- File: app/risk.py ---
+# Customer risk scoring (risk_scores.csv) from invoices, payments, disputes and collection history
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# (minimum score, risk_category, recommended_action), highest band first
+RISK_BANDS = (
+    (75, 'High Risk', 'Credit Hold / Advance Payment'),
+    (50, 'Medium Risk', 'Reduce Credit Limit / Weekly Monitoring'),
+    (25, 'Low Risk', 'Monthly Review / Standard Terms'),
+    (0, 'Minimal Risk', 'Standard Terms / Potential Credit Increase'),
+)
+RISK_COLUMNS = [
+    'customer_id', 'customer_name', 'risk_score', 'risk_category', 'credit_limit', 'outstanding_amount',
+    'credit_utilization', 'overdue_rate', 'avg_days_late', 'total_invoices', 'overdue_invoices',
+    'has_disputes', 'has_collection_history', 'recommended_action', 'last_assessment_date',
+]
+# Books with at least this many customers are scored on a process pool
+PARALLEL_MIN_CUSTOMERS = 20000
+# Source columns the features read; rows are diffed on these to find touched customers
+_SOURCE_COLUMNS = {
+    'customers': ('customer_id', 'customer_name', 'credit_limit'),
+    'invoices': ('customer_id', 'invoice_id', 'payment_status', 'balance_amount', 'due_date', 'payment_date'),
+    'disputes': ('customer_id',),
+    'cases': ('customer_id', 'status'),
+    'payments': ('customer_id', 'invoice_id', 'payment_date', 'status'),
+}
+_ROW_KEYS = {'customers': 'customer_id', 'invoices': 'invoice_id', 'disputes': 'dispute_id', 'cases': 'case_id',
+             'payments': 'payment_id'}
+_SOURCE_NAMES = ('customers', 'invoices', 'disputes', 'cases', 'payments')
+# Only payments in this status settle an invoice
+SETTLED_PAYMENT_STATUS = 'Processed'
+
+
+def settlement_dates(invoices, payments=None):
+    """
+    Date each invoice was settled: its last processed payment in payments,
+    or the invoice's own payment_date when payments has no row for it.
+    """
+    settled = invoices['payment_date']
+    if payments is None or not len(payments):
+        return settled
+    if 'status' in payments.columns:
+        payments = payments[payments['status'].astype(object) == SETTLED_PAYMENT_STATUS]
+    last = payments.groupby(payments['invoice_id'].astype(object), sort=False)['payment_date'].max()
+    received = invoices['invoice_id'].astype(object).map(last)
+    return pd.to_datetime(received).fillna(settled)
+
+
+def risk_features(customers, invoices, disputes, cases, payments=None):
+    """
+    Per-customer risk inputs: outstanding balance, credit utilization,
+    overdue rate, average days late on paid invoices (from the payments
+    received, see settlement_dates), and dispute / resolved-collection-case
+    flags. Customers without invoices are left out.
+    """
+    paid = (invoices['payment_status'] == 'Paid').to_numpy()
+    days_late = (settlement_dates(invoices, payments) - invoices['due_date']).dt.days.clip(lower=0)
+    frame = pd.DataFrame({
+        'customer_id': invoices['customer_id'].astype(object).to_numpy(),
+        'overdue': (invoices['payment_status'] == 'Overdue').to_numpy(),
+        'paid': paid,
+        'balance': invoices['balance_amount'].fillna(0).to_numpy(dtype='float64'),
+        'days_late': days_late.where(paid, np.nan).to_numpy(dtype='float64'),
+    })
+    per_customer = frame.groupby('customer_id', sort=False).agg(
+        total_invoices=('overdue', 'size'),
+        overdue_invoices=('overdue', 'sum'),
+        paid_invoices=('paid', 'sum'),
+        outstanding_amount=('balance', 'sum'),
+        days_late=('days_late', 'sum'),
+    )
+
+    master = customers.drop_duplicates('customer_id')
+    features = pd.DataFrame({
+        'customer_id': master['customer_id'].astype(object).to_numpy(),
+        'customer_name': master['customer_name'].astype(object).to_numpy(),
+        'credit_limit': master['credit_limit'].to_numpy(dtype='float64'),
+    }).join(per_customer, on='customer_id', how='inner')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        features['credit_utilization'] = features['outstanding_amount'] / features['credit_limit'] * 100
+        features['overdue_rate'] = features['overdue_invoices'] / features['total_invoices'] * 100
+        features['avg_days_late'] = np.where(
+            features['paid_invoices'] > 0, features['days_late'] / features['paid_invoices'], 0.0)
+    features['credit_utilization'] = features['credit_utilization'].replace([np.inf, -np.inf], np.nan).fillna(0.0)
+    features['has_disputes'] = features['customer_id'].isin(disputes['customer_id'].astype(object))
+    resolved = cases['customer_id'][cases['status'] == 'Resolved'].astype(object)
+    features['has_collection_history'] = features['customer_id'].isin(resolved)
+    return features.drop(columns=['paid_invoices', 'days_late']).reset_index(drop=True)
+
+
+def score_features(features, as_of=None):
+    """
+    risk_scores rows from risk_features(): 20 base points, up to 25 for the
+    overdue rate, 20 for credit utilization, 15 for days late (half a point
+    per day) and 10 each for disputes and collection history, capped at 100.
+    """
+    as_of = pd.Timestamp(as_of if as_of is not None else datetime.now().date())
+    score = (
+        20
+        + features['overdue_rate'] / 100 * 25
+        + np.minimum(features['credit_utilization'] / 100 * 20, 20)
+        + np.minimum(features['avg_days_late'] * 0.5, 15)
+        + features['has_disputes'] * 10
+        + features['has_collection_history'] * 10
+    )
+    score = np.minimum(_round_half_up(score, 0), 100).astype(np.int32)
+    band = np.select([score >= minimum for minimum, _, _ in RISK_BANDS], np.arange(len(RISK_BANDS)))
+
+    scores = features.copy()
+    scores['risk_score'] = score
+    scores['risk_category'] = np.array([category for _, category, _ in RISK_BANDS], dtype=object)[band]
+    scores['recommended_action'] = np.array([action for _, _, action in RISK_BANDS], dtype=object)[band]
+    for column, decimals in (('credit_utilization', 2), ('overdue_rate', 2), ('avg_days_late', 1)):
+        scores[column] = _round_half_up(scores[column], decimals)
+    scores['has_disputes'] = np.where(scores['has_disputes'], 'Yes', 'No')
+    scores['has_collection_history'] = np.where(scores['has_collection_history'], 'Yes', 'No')
+    scores['last_assessment_date'] = as_of.strftime('%Y-%m-%d')
+    return scores[RISK_COLUMNS]
+
+
+def score_customers(customers, invoices, disputes, cases, payments=None, as_of=None):
+    """risk_scores rows for every customer in customers that has invoices, in customers order."""
+    return score_features(risk_features(customers, invoices, disputes, cases, payments), as_of)
+
+
+def score_customer(customer_id, customers, invoices, disputes, cases, payments=None, rows=None, as_of=None):
+    """
+    Score one customer. rows may map each source name to the positions of
+    the customer's rows (e.g. from a groupby's indices) so that no source
+    table is scanned. Returns a dict, or None if the customer has no invoices.
+    """
+    sources = _sources(customers, invoices, disputes, cases, payments)
+    subset = {}
+    for name, frame in sources.items():
+        if rows is not None:
+            subset[name] = frame.iloc[rows[name].get(customer_id, [])]
+        else:
+            subset[name] = frame[frame['customer_id'] == customer_id]
+    scored = score_customers(*_positional(subset), as_of=as_of)
+    return scored.iloc[0].to_dict() if len(scored) else None
+
+
+def _sources(customers, invoices, disputes, cases, payments=None):
+    # Source frames by name; payments are optional
+    sources = {'customers': customers, 'invoices': invoices, 'disputes': disputes, 'cases': cases}
+    if payments is not None:
+        sources['payments'] = payments
+    return sources
+
+
+def _positional(sources):
+    return tuple(sources.get(name) for name in _SOURCE_NAMES)
+
+
+def _round_half_up(values, decimals):
+    # Ties round away from zero, as in risk_scores.csv (numpy rounds them to even)
+    scale = 10.0 ** decimals
+    return np.floor(np.asarray(values, dtype='float64') * scale + 0.5) / scale
+
+
+def _score_shard(args):
+    """Process-pool task: score one shard of customers."""
+    *sources, as_of = args
+    return score_customers(*sources, as_of=as_of)
+
+
+def score_book(customers, invoices, disputes, cases, payments=None, as_of=None, workers=None):
+    """
+    Score the whole book. Books of at least PARALLEL_MIN_CUSTOMERS customers
+    are split into one shard per worker process (customers are assigned
+    round-robin, and each shard only receives its customers' rows); smaller
+    books are scored in-process, where the pool would cost more than it saves.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers < 2 or customers['customer_id'].nunique() < PARALLEL_MIN_CUSTOMERS:
+        return score_customers(customers, invoices, disputes, cases, payments, as_of)
+
+    ids = pd.unique(customers['customer_id'].astype(object))
+    shard_of = pd.Series(np.arange(len(ids)) % workers, index=ids)
+    sources = _sources(customers, invoices, disputes, cases, payments)
+    split = {
+        name: dict(tuple(frame[list(_SOURCE_COLUMNS[name])].groupby(
+            frame['customer_id'].astype(object).map(shard_of).fillna(-1).to_numpy())))
+        for name, frame in sources.items()
+    }
+    tasks = [
+        _positional({name: split[name].get(shard, frame[list(_SOURCE_COLUMNS[name])].iloc[:0])
+                     for name, frame in sources.items()}) + (as_of,)
+        for shard in range(workers)
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(_score_shard, tasks))
+    scores = pd.concat(parts, ignore_index=True)
+    # Restore customer-master order
+    order = pd.Index(ids).get_indexer(scores['customer_id'])
+    return scores.iloc[np.argsort(order, kind='stable')].reset_index(drop=True)
+
+
+class RiskScorer:
+    """
+    risk_scores for a book of customers, rescored incrementally.
+
+    The first run scores everyone (see score_book). sync() compares the
+    source rows with those of the previous run and rescores only the
+    customers whose customer, invoice, payment, dispute or collection-case
+    rows were added, removed or changed.
+    """
+
+    def __init__(self, customers, invoices, disputes, cases, payments=None, as_of=None, workers=None):
+        self.as_of = as_of
+        self._lock = threading.Lock()
+        self._hashes = {}
+        self._sources = {}
+        self.scores = score_book(customers, invoices, disputes, cases, payments, as_of, workers).set_index(
+            'customer_id', drop=False)
+        self._remember(**_sources(customers, invoices, disputes, cases, payments))
+
+    def sync(self, customers, invoices, disputes, cases, payments=None):
+        """Rescore the customers touched since the last run. Returns their ids."""
+        with self._lock:
+            sources = _sources(customers, invoices, disputes, cases, payments)
+            touched = pd.Index([], dtype=object)
+            for name, frame in sources.items():
+                touched = touched.union(self._touched(name, frame))
+            if len(touched):
+                subset = {name: frame[frame['customer_id'].astype(object).isin(touched)]
+                          for name, frame in sources.items()}
+                fresh = score_customers(*_positional(subset), as_of=self.as_of).set_index('customer_id', drop=False)
+                kept = self.scores.drop(index=self.scores.index.intersection(touched))
+                order = pd.Index(pd.unique(customers['customer_id'].astype(object)))
+                combined = pd.concat([kept, fresh]) if len(kept) and len(fresh) else (fresh if len(fresh) else kept)
+                self.scores = combined.iloc[np.argsort(order.get_indexer(combined.index), kind='stable')]
+            self._remember(**sources)
+            return list(touched)
+
+    def _touched(self, name, frame):
+        if name not in self._hashes:
+            # A source the previous run did not have touches every customer it mentions
+            return pd.Index(pd.unique(frame['customer_id'].astype(object)), dtype=object)
+        key = _ROW_KEYS[name]
+        indexed = frame.set_index(frame[key].astype(object).to_numpy())
+        hashes = pd.util.hash_pandas_object(indexed[list(_SOURCE_COLUMNS[name])], index=False)
+        hashes.index = indexed.index
+        previous = self._hashes[name].reindex(hashes.index)
+        changed = hashes.index[previous.isna().to_numpy() | (previous.to_numpy() != hashes.to_numpy())]
+        removed = self._hashes[name].index.difference(hashes.index)
+        # Both the old and the new owner of a changed row are affected
+        old_owner = self._sources[name].reindex(changed.append(removed)).dropna()
+        new_owner = indexed['customer_id'].astype(object).loc[changed]
+        return pd.Index(pd.unique(np.concatenate([old_owner.to_numpy(), new_owner.to_numpy()])), dtype=object)
+
+    def _remember(self, **sources):
+        for name, frame in sources.items():
+            key = _ROW_KEYS[name]
+            indexed = frame.set_index(frame[key].astype(object).to_numpy())
+            hashes = pd.util.hash_pandas_object(indexed[list(_SOURCE_COLUMNS[name])], index=False)
+            hashes.index = indexed.index
+            self._hashes[name] = hashes
+            self._sources[name] = indexed['customer_id'].astype(object)
@@ -0,0 +1,232 @@
+# --- File: app/roll_rates.py ---
+# Daily per-invoice aging snapshots and bucket-to-bucket roll rates between them
+
+import os
+import re
+import tempfile
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from .utils import AGING_BOUNDARIES, aging_buckets, aging_labels
+
+PAID_LABEL = 'Paid'
+# Snapshot states: the aging buckets (Current ... 90+ Days, N/A) for open invoices, then Paid.
+# transitions() packs a (from, to) pair into 3 + 3 bits, so there must be fewer than 8
+STATES = aging_labels(AGING_BOUNDARIES) + [PAID_LABEL]
+PAID_CODE = len(STATES) - 1
+# Code of an invoice that did not exist yet on the snapshot day
+ABSENT_CODE = -1
+IDS_FILE = 'invoice_ids.npy'
+DEFAULT_STEP_DAYS = 30
+ROLL_RATE_COLUMNS = ['from_bucket', 'to_bucket', 'invoices', 'rolled', 'roll_rate', 'cured', 'cure_rate']
+_DAY_FILE = re.compile(r'^(\d{4}-\d{2}-\d{2})\.npy$')
+
+
+def aging_state_codes(invoices, as_of, historical=False):
+    """
+    int8 state code per invoice on as_of (see STATES).
+
+    By default the invoice's current status decides Paid (payment_status
+    'Paid' or no balance left). With historical, the state is reconstructed
+    from the dates instead: invoices raised after as_of are ABSENT_CODE and
+    paid invoices count as Paid from their payment_date on, which lets
+    past snapshots be backfilled from a single invoices extract.
+    """
+    as_of = pd.Timestamp(as_of).normalize()
+    codes = aging_buckets(invoices['due_date'], as_of).cat.codes.to_numpy().astype(np.int8)
+    if historical:
+        paid = ((invoices['payment_status'].astype(object) == 'Paid') & (invoices['payment_date'] <= as_of)).to_numpy()
+        codes[paid] = PAID_CODE
+        if 'invoice_date' in invoices.columns:
+            codes[(invoices['invoice_date'] > as_of).to_numpy()] = ABSENT_CODE
+    else:
+        paid = ((invoices['payment_status'].astype(object) == 'Paid') | (invoices['balance_amount'].fillna(0) <= 0)).to_numpy()
+        codes[paid] = PAID_CODE
+    return codes
+
+
+def _save_atomic(directory, filename, array):
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        with open(tmp_path, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp_path, os.path.join(directory, filename))
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class AgingSnapshotStore:
+    """
+    One file per day holding an int8 state code per invoice (1 byte per
+    invoice per day), positionally aligned to a shared, append-only list of
+    invoice ids. Days written before newer invoices appeared are shorter and
+    read as ABSENT_CODE for them. Day files are memory-mapped on read.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._ids = None
+
+    def invoice_ids(self):
+        """Invoice ids in snapshot position order."""
+        with self._lock:
+            return self._load_ids()
+
+    def _load_ids(self):
+        # Caller must hold self._lock
+        if self._ids is None:
+            path = os.path.join(self.directory, IDS_FILE)
+            self._ids = pd.Index(np.load(path).astype(object) if os.path.exists(path) else [], dtype=object)
+        return self._ids
+
+    def version(self):
+        """Changes whenever a day file or the id list is written (files are replaced into the directory)."""
+        try:
+            return os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def dates(self):
+        """Days with a stored snapshot, oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(pd.Timestamp(m.group(1)) for m in map(_DAY_FILE.match, os.listdir(self.directory)) if m)
+
+    def record(self, invoices, as_of=None, historical=False):
+        """Store (or replace) the snapshot of invoices for as_of. Returns the number of invoices recorded."""
+        as_of = pd.Timestamp(as_of if as_of is not None else datetime.now().date()).normalize()
+        codes = aging_state_codes(invoices, as_of, historical)
+        self.record_codes(invoices['invoice_id'], codes, as_of)
+        return int((codes != ABSENT_CODE).sum())
+
+    def backfill(self, invoices, start, end=None):
+        """
+        Reconstruct and store the snapshot of every day from start to end
+        (default: today) from invoice, due and payment dates. Invoice ids are
+        resolved once and states are binned on integer day numbers, so a day
+        costs a few array passes. Returns the number of days written.
+        """
+        end = pd.Timestamp(end if end is not None else datetime.now().date()).normalize()
+        days = pd.date_range(pd.Timestamp(start).normalize(), end, freq='D')
+        positions, length = self._positions(invoices['invoice_id'])
+
+        def day_numbers(column):
+            values = invoices[column].to_numpy(dtype='datetime64[D]')
+            return np.where(np.isnat(values), np.nan, values.astype('int64').astype('float64'))
+
+        due = day_numbers('due_date')
+        paid_on = day_numbers('payment_date')
+        paid_on[(invoices['payment_status'].astype(object) != 'Paid').to_numpy()] = np.nan
+        raised = day_numbers('invoice_date') if 'invoice_date' in invoices.columns else np.full(len(invoices), -np.inf)
+        boundaries = np.asarray(AGING_BOUNDARIES, dtype='float64')
+        for day in days:
+            today = float(day.to_datetime64().astype('datetime64[D]').astype('int64'))
+            with np.errstate(invalid='ignore'):
+                codes = np.searchsorted(boundaries, today - due, side='left').astype(np.int8)
+                codes[np.isnan(due)] = len(STATES) - 2  # N/A
+                codes[paid_on <= today] = PAID_CODE
+                codes[raised > today] = ABSENT_CODE
+            self._write_day(day, positions, codes, length)
+        return len(days)
+
+    def record_codes(self, invoice_ids, codes, as_of):
+        """Store precomputed state codes for invoice_ids on as_of."""
+        positions, length = self._positions(invoice_ids)
+        self._write_day(as_of, positions, codes, length)
+
+    def _positions(self, invoice_ids):
+        # Snapshot position of each id, appending unseen ids to the shared list
+        os.makedirs(self.directory, exist_ok=True)
+        ids = pd.Index(pd.Series(invoice_ids).astype(object).to_numpy())
+        with self._lock:
+            known = self._load_ids()
+            positions = known.get_indexer(ids)
+            new = positions < 0
+            if new.any():
+                known = known.append(ids[new])
+                _save_atomic(self.directory, IDS_FILE, known.to_numpy().astype(str))
+                self._ids = known
+                positions[new] = np.arange(len(known) - new.sum(), len(known))
+            return positions, len(known)
+
+    def _write_day(self, day, positions, codes, length):
+        values = np.full(length, ABSENT_CODE, dtype=np.int8)
+        values[positions] = codes
+        _save_atomic(self.directory, f"{pd.Timestamp(day):%Y-%m-%d}.npy", values)
+
+    def load(self, day, length=None):
+        """State codes for a stored day, padded with ABSENT_CODE to length."""
+        codes = np.load(os.path.join(self.directory, f"{pd.Timestamp(day):%Y-%m-%d}.npy"), mmap_mode='r')
+        if length is not None and len(codes) < length:
+            codes = np.concatenate([codes, np.full(length - len(codes), ABSENT_CODE, dtype=np.int8)])
+        return codes
+
+    def transitions(self, start=None, end=None, step=DEFAULT_STEP_DAYS):
+        """
+        Summed transition counts over consecutive (day, day + step) pairs in
+        [start, end], as a STATES x STATES DataFrame (rows: from, columns: to).
+        Each target day snaps to the latest stored snapshot on or before it.
+        Returns (counts, pairs) where pairs lists the (from, to) days used.
+        """
+        stored = self.dates()
+        if not stored:
+            raise ValueError("No aging snapshots have been recorded")
+        stored_index = pd.DatetimeIndex(stored)
+        start = pd.Timestamp(start).normalize() if start is not None else stored[0]
+        end = pd.Timestamp(end).normalize() if end is not None else stored[-1]
+        if step < 1 or end <= start:
+            raise ValueError("Need end after start and a step of at least one day")
+        targets = pd.date_range(start, end, freq=f'{step}D')
+        snapped = stored_index.searchsorted(targets, side='right') - 1
+        days = [stored[i] for i in dict.fromkeys(snapped.tolist()) if i >= 0]
+        pairs = list(zip(days, days[1:]))
+        if not pairs:
+            raise ValueError("Fewer than two snapshots in the window")
+
+        # Crosstab without masking: ABSENT_CODE (-1) & 7 is 7, a row/column past STATES that is dropped below
+        counts = np.zeros(64, dtype=np.int64)
+        length = len(self.invoice_ids())
+        current = self.load(pairs[0][0], length).view(np.uint8) & 7
+        for _, later in pairs:
+            following = self.load(later, length).view(np.uint8) & 7
+            counts += np.bincount((current << 3) | following, minlength=64)
+            current = following
+        width = len(STATES)
+        matrix = pd.DataFrame(counts.reshape(8, 8)[:width, :width], index=pd.Index(STATES, name='from_bucket'),
+                              columns=pd.Index(STATES, name='to_bucket'))
+        # Paid invoices never leave Paid
+        return matrix.drop(index=PAID_LABEL), pairs
+
+
+def transition_rates(counts):
+    """Row-normalised transition matrix: the share of each from-bucket landing in each to-bucket."""
+    totals = counts.sum(axis=1)
+    return counts.div(totals.where(totals > 0), axis=0).fillna(0.0).round(4)
+
+
+def roll_rates(counts):
+    """
+    Per aging bucket: invoices observed, how many rolled into the next
+    bucket (90+ stays in 90+), how many were paid (cured) and the rates.
+    """
+    buckets = [label for label in STATES if label not in (PAID_LABEL, aging_labels(AGING_BOUNDARIES)[-1])]
+    rows = []
+    for i, bucket in enumerate(buckets):
+        following = buckets[min(i + 1, len(buckets) - 1)]
+        total = int(counts.loc[bucket].sum())
+        rolled = int(counts.at[bucket, following])
+        cured = int(counts.at[bucket, PAID_LABEL])
+        rows.append({
+            'from_bucket': bucket,
+            'to_bucket': following,
+            'invoices': total,
+            'rolled': rolled,
+            'roll_rate': round(rolled / total, 4) if total else 0.0,
+            'cured': cured,
+            'cure_rate': round(cured / total, 4) if total else 0.0,
+        })
+    return pd.DataFrame(rows, columns=ROLL_RATE_COLUMNS)
@@ -0,0 +1,235 @@
+# --- File: app/schemas.py ---
+# Declarative per-dataset schemas applied when the CSV datasets are parsed
+
+import os
+import pandas as pd
+
+
+class DatasetSchema:
+    """
+    Describes how one CSV dataset should be typed at load time.
+
+    - categories: low-cardinality string columns stored as pandas categoricals
+    - int32: integer counts/codes narrowed from int64 (left as float if NaNs are present)
+    - numeric: columns coerced with pd.to_numeric (invalid values become NaN)
+    - percents: "17.78%" strings converted to float percentage points (17.78),
+      and formatted back by format() for the CSV files and the API
+    - dates: date columns parsed with an explicit format
+    - fill_zero: numeric columns whose missing values mean zero
+    - overflow: column that absorbs unquoted commas in the generator output,
+      e.g. address_line1 = "24, MG Road" spills into a second CSV field
+    """
+
+    def __init__(self, filename, categories=(), int32=(), numeric=(), percents=(), dates=(),
+                 date_format='%Y-%m-%d', fill_zero=(), overflow=None):
+        self.filename = filename
+        self.categories = tuple(categories)
+        self.int32 = tuple(int32)
+        self.numeric = tuple(numeric)
+        self.percents = tuple(percents)
+        self.dates = tuple(dates)
+        self.date_format = date_format
+        self.fill_zero = tuple(fill_zero)
+        self.overflow = overflow
+
+    @property
+    def columns(self):
+        """All columns this schema makes claims about."""
+        declared = self.categories + self.int32 + self.numeric + self.percents + self.dates + self.fill_zero
+        if self.overflow:
+            declared += (self.overflow,)
+        return tuple(dict.fromkeys(declared))
+
+    def parse(self, path):
+        """Read path and apply the declared dtypes."""
+        df = self._read(path)
+        for col in self.numeric:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        for col in self.fill_zero:
+            df[col] = df[col].fillna(0)
+        for col in self.percents:
+            df[col] = parse_percent(df[col])
+        for col in self.int32:
+            values = pd.to_numeric(df[col], errors='coerce')
+            df[col] = values if values.isna().any() else values.astype('int32')
+        for col in self.dates:
+            df[col] = pd.to_datetime(df[col], format=self.date_format, errors='coerce')
+        return df
+
+    def format(self, df):
+        """df with the percent columns it has rendered back as "17.78%" strings."""
+        present = [col for col in self.percents if col in df.columns]
+        if not present:
+            return df
+        return df.assign(**{col: format_percent(df[col]) for col in present})
+
+    def _read(self, path):
+        dtype = {col: 'category' for col in self.categories}
+        if not self.overflow:
+            return pd.read_csv(path, dtype=dtype)
+
+        with open(path, newline='') as f:
+            header = f.readline().rstrip('\r\n').split(',')
+            first_row = f.readline().rstrip('\r\n')
+        extra = first_row.count(',') + 1 - len(header) if first_row else 0
+        if extra <= 0:
+            return pd.read_csv(path, dtype=dtype)
+
+        # Give the spilled fields their own names, read them as text and join them back
+        pos = header.index(self.overflow)
+        parts = [self.overflow] + [f"{self.overflow}__{i}" for i in range(1, extra + 1)]
+        names = header[:pos] + parts + header[pos + 1:]
+        dtype.update({part: str for part in parts})
+        df = pd.read_csv(path, header=0, names=names, dtype=dtype, index_col=False)
+        df[self.overflow] = df[self.overflow].str.cat([df[part] for part in parts[1:]], sep=',')
+        return df.drop(columns=parts[1:])
+
+
+def parse_percent(series):
+    """Convert "18%"-style strings to float percentage points, passing numbers through."""
+    if series.dtype.kind in 'if':
+        return series.astype('float64')
+    return pd.to_numeric(series.astype('string').str.rstrip('%'), errors='coerce').astype('float64')
+
+
+def format_percent(series):
+    """Inverse of parse_percent: percentage points as "17.78%" strings, missing values left missing."""
+    return series.map('{:.2f}%'.format, na_action='ignore').astype(object)
+
+
+DATASET_SCHEMAS = {schema.filename: schema for schema in (
+    DatasetSchema(
+        'customer_master.csv',
+        categories=('city', 'state', 'country', 'payment_terms', 'industry_sector', 'customer_category', 'status'),
+        int32=('postal_code',),
+        numeric=('credit_limit', 'available_credit'),
+        dates=('onboarding_date',),
+        overflow='address_line1',
+    ),
+    DatasetSchema(
+        'invoices.csv',
+        categories=('payment_status', 'payment_terms', 'currency', 'sales_rep_id', 'sales_rep_name', 'tax_type'),
+        numeric=('invoice_amount', 'tax_amount', 'total_amount', 'paid_amount', 'balance_amount'),
+        fill_zero=('total_amount', 'paid_amount', 'balance_amount'),
+        dates=('invoice_date', 'due_date', 'payment_date'),
+    ),
+    DatasetSchema(
+        'payments.csv',
+        categories=('payment_method', 'status'),
+        numeric=('payment_amount',),
+        dates=('payment_date',),
+    ),
+    DatasetSchema(
+        'collection_cases.csv',
+        categories=('priority', 'status', 'assigned_to', 'collector_id', 'collection_strategy'),
+        int32=('days_overdue',),
+        numeric=('amount_due',),
+        dates=('case_open_date', 'last_action_date', 'next_action_date', 'resolution_date'),
+    ),
+    DatasetSchema(
+        'disputes.csv',
+        categories=('dispute_type', 'status', 'assigned_to', 'handler_id'),
+        numeric=('dispute_amount',),
+        dates=('open_date', 'resolution_date'),
+    ),
+    DatasetSchema(
+        'risk_scores.csv',
+        categories=('risk_category', 'has_disputes', 'has_collection_history', 'recommended_action'),
+        int32=('risk_score', 'total_invoices', 'overdue_invoices'),
+        numeric=('credit_limit', 'outstanding_amount', 'avg_days_late'),
+        percents=('credit_utilization', 'overdue_rate'),
+        dates=('last_assessment_date',),
+    ),
+    DatasetSchema(
+        'customer_interactions.csv',
+        categories=('interaction_type', 'purpose', 'summary', 'initiated_by', 'handled_by', 'rep_id', 'outcome'),
+        # Rows appended by log_communication_logic carry full ISO timestamps
+        dates=('interaction_date',),
+        date_format='ISO8601',
+    ),
+    DatasetSchema(
+        'orders.csv',
+        categories=('status', 'sales_rep_id', 'currency'),
+        numeric=('order_amount', 'tax_amount', 'total_amount'),
+        dates=('order_date', 'shipment_date'),
+        overflow='shipping_address',
+    ),
+    DatasetSchema(
+        'gl_entries.csv',
+        categories=('document_type', 'account_description', 'currency', 'customer_id'),
+        int32=('account_code',),
+        numeric=('debit', 'credit'),
+        dates=('posting_date',),
+    ),
+    DatasetSchema(
+        'invoice_line_items.csv',
+        categories=('product_description',),
+        int32=('quantity',),
+        numeric=('unit_price', 'amount', 'tax_amount', 'total_amount'),
+        percents=('tax_rate',),
+    ),
+    DatasetSchema(
+        'payment_plans.csv',
+        categories=('status', 'created_by', 'handler_id'),
+        int32=('installments', 'installments_paid'),
+        numeric=('original_amount', 'installment_amount', 'remaining_balance'),
+        dates=('start_date', 'end_date', 'next_installment_date', 'last_payment_date'),
+    ),
+    DatasetSchema(
+        'dso_analytics.csv',
+        int32=('dso', 'invoices_count', 'paid_invoices', 'disputed_invoices'),
+        numeric=('total_revenue', 'total_ar', 'current_ar', 'ar_1_30_days', 'ar_31_60_days',
+                 'ar_61_90_days', 'ar_over_90_days', 'cei_percentage'),
+    ),
+    DatasetSchema(
+        'strategy_effectiveness.csv',
+        categories=('best_for_amount_range',),
+        int32=('total_cases', 'resolved_cases', 'avg_resolution_days'),
+        numeric=('total_amount_assigned', 'total_amount_collected', 'avg_case_amount'),
+        percents=('success_rate', 'recovery_rate'),
+        dates=('assessment_date',),
+    ),
+    DatasetSchema(
+        'collection_performance.csv',
+        int32=('total_cases', 'resolved_cases', 'escalated_cases'),
+        numeric=('amount_assigned', 'amount_collected', 'avg_resolution_days'),
+        percents=('resolution_rate', 'escalation_rate', 'cei_percentage'),
+        dates=('assessment_date',),
+    ),
+)}
+
+
+def get_schema(filename):
+    """Schema registered for a dataset file name, or None."""
+    return DATASET_SCHEMAS.get(os.path.basename(filename))
+
+
+def parse_dataset(path):
+    """Parse a dataset CSV, applying its registered schema when there is one."""
+    schema = get_schema(path)
+    return schema.parse(path) if schema else pd.read_csv(path)
+
+
+def memory_report(data_dir):
+    """
+    Deep memory use of every registered dataset as plain-inferred vs schema-typed frames.
+
+    Returns a list of dicts with dataset, rows, raw_bytes, typed_bytes and saved_pct.
+    """
+    report = []
+    for filename, schema in DATASET_SCHEMAS.items():
+        path = os.path.join(data_dir, filename)
+        if not os.path.exists(path):
+            continue
+        raw = pd.read_csv(path)
+        typed = schema.parse(path)
+        raw_bytes = int(raw.memory_usage(index=True, deep=True).sum())
+        typed_bytes = int(typed.memory_usage(index=True, deep=True).sum())
+        report.append({
+            'dataset': filename,
+            'rows': len(typed),
+            'raw_bytes': raw_bytes,
+            'typed_bytes': typed_bytes,
+            'saved_pct': round(100.0 * (raw_bytes - typed_bytes) / raw_bytes, 1) if raw_bytes else 0.0,
+        })
+    return report
@@ -3,99 +3,420 @@
 
 import pandas as pd
 import os
+import threading
+import time
 from datetime import datetime, timedelta
-from .utils import send_email_via_gateway # Import helpers from utils
+from .utils import send_email_via_gateway, aging_buckets # Import helpers from utils
+from .data_loaders import data_loader # Cached, schema-typed dataset loading
+from .datasets import DatasetManager # Lazy, snapshot-based dataset holder
+from .dso import DSOEngine # Incrementally maintained DSO
+from .cube import ARCube # Pre-aggregated open-AR cube
+from .risk import RiskScorer, score_customer # Customer risk scoring
+from .analytics import write_dataset # CSV + typed sidecar writer
+from .worklist import Worklist, build_accounts, ALL_AGENTS # Prioritised collections worklist
+from .assignment import plan_rebalance # Collector workload balancing
+from .cash_application import MATCH_COLUMNS, apply_batch, match_payments, summarize # Cash application
+from .reconciliation import GL_CHUNK_ROWS, read_gl_chunks, reconcile # GL-to-subledger reconciliation
+from .validation import validate_invoices # Invoice/line-item consistency checks
+from .forecast import DEFAULT_HORIZON_DAYS, LatenessProfile, forecast_collections # Expected-collections forecast
+from .roll_rates import AgingSnapshotStore, roll_rates, transition_rates # Aging roll rates
+from .simulation import build_model, simulate # Monte Carlo what-if simulation
 # Import config variables - better to pass config object from app factory
-from config import CUSTOMER_MASTER_FILE, INVOICES_FILE, INTERACTIONS_FILE
+from config import AGING_SNAPSHOTS_DIR, INTERACTIONS_FILE, VALIDATE_INVOICES_ON_LOAD
 
-# --- Global DataFrames (Load once, access via functions) ---
-# WARNING: Global variables can be tricky. Consider using Flask's app context (g)
-#          or a dedicated data manager class for better state management.
-#          Loading here assumes the service module is imported once.
-_customers_df = None
-_invoices_df = None
-_interactions_df = None
+INTERACTION_COLUMNS = [
+    'interaction_id', 'customer_id', 'customer_name', 'interaction_date',
+    'interaction_type', 'purpose', 'summary', 'initiated_by', 'handled_by',
+    'rep_id', 'related_invoice', 'outcome', 'notes'
+]
 
-def load_data():
-    """Loads or reloads data from CSV files."""
-    global _customers_df, _invoices_df, _interactions_df
+def _load_interactions():
+    """Interactions log, or an empty frame if nothing has been logged yet."""
+    if not os.path.exists(INTERACTIONS_FILE):
+        return pd.DataFrame(columns=INTERACTION_COLUMNS)
+    return data_loader.get_customer_interactions()
+
+LINE_ITEM_COLUMNS = ['line_item_id', 'invoice_id', 'amount', 'tax_rate', 'tax_amount', 'total_amount']
+
+def _load_line_items():
+    """Invoice line items, or an empty frame when the data set has none."""
     try:
-        print("Loading data in services module...")
-        if not os.path.exists(CUSTOMER_MASTER_FILE): raise FileNotFoundError(CUSTOMER_MASTER_FILE)
-        _customers_df = pd.read_csv(CUSTOMER_MASTER_FILE)
-
-        if not os.path.exists(INVOICES_FILE): raise FileNotFoundError(INVOICES_FILE)
-        _invoices_df = pd.read_csv(INVOICES_FILE)
-        _invoices_df['due_date'] = pd.to_datetime(_invoices_df['due_date'], errors='coerce')
-        _invoices_df['invoice_date'] = pd.to_datetime(_invoices_df['invoice_date'], errors='coerce')
-        _invoices_df['total_amount'] = pd.to_numeric(_invoices_df['total_amount'], errors='coerce')
-        _invoices_df['paid_amount'] = pd.to_numeric(_invoices_df['paid_amount'], errors='coerce')
-        _invoices_df['balance_amount'] = pd.to_numeric(_invoices_df['balance_amount'], errors='coerce')
-        _invoices_df.fillna({'total_amount': 0, 'paid_amount': 0, 'balance_amount': 0}, inplace=True)
-
-        if os.path.exists(INTERACTIONS_FILE):
-            _interactions_df = pd.read_csv(INTERACTIONS_FILE)
-            _interactions_df['interaction_date'] = pd.to_datetime(_interactions_df['interaction_date'], errors='coerce')
-        else:
-            _interactions_df = pd.DataFrame(columns=[
-                'interaction_id', 'customer_id', 'customer_name', 'interaction_date',
-                'interaction_type', 'purpose', 'summary', 'initiated_by', 'handled_by',
-                'rep_id', 'related_invoice', 'outcome', 'notes'
-            ])
-        print("Data loading successful in services.")
-        return True
-    except Exception as e:
-        print(f"FATAL ERROR loading data in services: {e}")
-        # Prevent app from starting or handle gracefully
+        return data_loader.get_invoice_line_items()
+    except FileNotFoundError:
+        return pd.DataFrame(columns=LINE_ITEM_COLUMNS)
+
+# --- Dataset manager (loaded lazily on first access, never at import) ---
+# Each request works on one immutable snapshot; reloads and appends publish a
+# new snapshot, so in-flight requests keep a consistent view of all frames.
+# invoices.csv is rewritten at runtime by cash application (in any worker),
+# so its file signature is watched and a changed file is picked up.
+datasets = DatasetManager({
+    'customers': data_loader.get_customer_data,
+    'invoices': data_loader.get_invoice_data,
+    'interactions': _load_interactions,
+    'disputes': data_loader.get_disputes,
+    'collection_cases': data_loader.get_collection_cases,
+    'payment_plans': data_loader.get_payment_plans,
+    'invoice_line_items': _load_line_items,
+    'payments': data_loader.get_payment_data,
+}, versions={
+    'invoices': lambda: data_loader.signature('invoices.csv'),
+})
+
+def load_data():
+    """Loads or reloads data from CSV files. Returns False (and keeps serving old data) on failure."""
+    print("Loading data in services module...")
+    if not datasets.reload():
+        print("ERROR loading data in services; previous data (if any) kept.")
         return False
+    print("Data loading successful in services.")
+    if VALIDATE_INVOICES_ON_LOAD:
+        summary = get_invoice_validation()[1]
+        if summary['flagged_invoices'] or summary['orphan_line_items']:
+            issues = ', '.join(f"{name}={count}" for name, count in summary['issues'].items() if count)
+            print(f"WARNING: {summary['flagged_invoices']} invoice(s) disagree with their line items ({issues}); "
+                  f"{summary['orphan_line_items']} line item(s) reference unknown invoices")
+    return True
+
+def _current_snapshot():
+    """The dataset snapshot for this call, loading on first use."""
+    snapshot = datasets.snapshot()
+    if snapshot is None:
+        raise ValueError("DataFrames not loaded properly")
+    return snapshot
 
-# --- Call load_data() when the module is first imported ---
-# This ensures data is loaded when the app starts (if services.py is imported)
-if not load_data():
-     print("Exiting due to data loading failure.")
-     exit()
-# ---------------------------------------------------------
+def snapshot_version():
+    """
+    Identity of the current snapshot for HTTP validators: its generation plus
+    the process and load time, since generation numbers are per process and
+    restart at 1 in every worker.
+    """
+    snapshot = _current_snapshot()
+    return (os.getpid(), snapshot.generation, snapshot.loaded_at.isoformat())
 
 def get_customers_df():
-    if _customers_df is None: load_data() # Attempt reload if None
-    return _customers_df
+    snapshot = datasets.snapshot()
+    return snapshot['customers'] if snapshot is not None else None
 
 def get_invoices_df():
-    if _invoices_df is None: load_data()
-    return _invoices_df
+    snapshot = datasets.snapshot()
+    return snapshot['invoices'] if snapshot is not None else None
 
 def get_interactions_df():
-    if _interactions_df is None: load_data()
-    return _interactions_df
-
+    snapshot = datasets.snapshot()
+    return snapshot['interactions'] if snapshot is not None else None
 
-def get_ar_dashboard_logic():
-    """Logic to prepare AR dashboard data."""
-    # Use the getter functions to ensure dataframes are loaded
-    inv_df = get_invoices_df()
-    cust_df = get_customers_df()
-    if inv_df is None or cust_df is None:
-        raise ValueError("DataFrames not loaded properly")
 
-    # Import helper here or pass it in
-    from .utils import calculate_aging_dt
+def _build_overdue_view(snapshot, as_of):
+    """Overdue invoices with customer_name from the master and an aging_bucket as of as_of."""
+    inv_df = snapshot['invoices']
+    cust_df = snapshot['customers']
 
     # Filter overdue and merge in customer_name from master, drop any existing customer_name to avoid collisions
-    overdue_invoices = inv_df[inv_df['payment_status'] == 'Overdue'].copy()
-    overdue_invoices = overdue_invoices.drop(columns=['customer_name'], errors='ignore')
-    overdue_invoices = pd.merge(
-        overdue_invoices,
+    overdue = inv_df[inv_df['payment_status'] == 'Overdue']
+    overdue = overdue.drop(columns=['customer_name'], errors='ignore')
+    overdue = pd.merge(
+        overdue,
         cust_df[['customer_id', 'customer_name']],
         on='customer_id',
         how='left'
     )
-    overdue_invoices['aging_bucket'] = overdue_invoices['due_date'].apply(calculate_aging_dt)
+    overdue['aging_bucket'] = aging_buckets(overdue['due_date'], as_of)
+    return overdue
+
+def get_overdue_view(as_of=None, snapshot=None):
+    """
+    Enriched overdue-invoice view shared by the dashboard, collections queue and reports.
+
+    Memoized per (snapshot generation, as_of date): reloads and logged
+    communications publish a new snapshot, which starts with an empty memo.
+    The returned frame is shared and must not be modified in place.
+    """
+    snapshot = snapshot or _current_snapshot()
+    as_of = pd.Timestamp(as_of if as_of is not None else datetime.now().date()).normalize()
+    return snapshot.derive(('overdue_view', as_of), lambda snap: _build_overdue_view(snap, as_of))
+
+# Forecasts kept per snapshot; the parameters come from the client, so the memo is bounded
+FORECAST_MEMO_SIZE = 32
+
+def get_forecast(as_of=None, horizon=DEFAULT_HORIZON_DAYS, freq='D', snapshot=None):
+    """
+    (periods, summary) from forecast_collections, memoized per (snapshot
+    generation, as_of, horizon, freq) for the FORECAST_MEMO_SIZE most
+    recently requested combinations; the lateness profile is shared by every
+    forecast of the same snapshot.
+    """
+    snapshot = snapshot or _current_snapshot()
+    as_of = pd.Timestamp(as_of if as_of is not None else datetime.now().date()).normalize()
+    profile = snapshot.derive('lateness_profile',
+                              lambda snap: LatenessProfile(snap['payments'], snap['invoices']))
+    return snapshot.derive(('forecast', as_of, horizon, freq), lambda snap: forecast_collections(
+        snap['invoices'], snap['payment_plans'], snap['payments'], as_of, horizon, freq, profile=profile),
+        maxsize=FORECAST_MEMO_SIZE)
+
+def get_forecast_logic(as_of=None, horizon=DEFAULT_HORIZON_DAYS, freq='D'):
+    """Expected collections per day or week over the horizon, with the summary."""
+    snapshot = _current_snapshot()
+    periods, summary = get_forecast(as_of, horizon, freq, snapshot=snapshot)
+    return {
+        'as_of': pd.Timestamp(as_of if as_of is not None else datetime.now().date()).strftime('%Y-%m-%d'),
+        'freq': freq,
+        'horizon_days': horizon,
+        'generation': snapshot.generation,
+        'summary': summary,
+        'periods': periods,
+    }
+
+aging_snapshots = AgingSnapshotStore(AGING_SNAPSHOTS_DIR)
+
+def record_aging_snapshot(as_of=None):
+    """Persist today's (or as_of's) aging state of every invoice in the current snapshot."""
+    return aging_snapshots.record(_current_snapshot()['invoices'], as_of)
+
+def get_roll_rates_logic(start=None, end=None, step=30):
+    """Bucket-to-bucket transition counts and rates, and per-bucket roll rates, over step-day pairs in the window."""
+    counts, pairs = aging_snapshots.transitions(start, end, step)
+    return {
+        'step_days': step,
+        'pairs': [[earlier.strftime('%Y-%m-%d'), later.strftime('%Y-%m-%d')] for earlier, later in pairs],
+        'roll_rates': roll_rates(counts),
+        'transition_counts': counts.reset_index(),
+        'transition_rates': transition_rates(counts).reset_index(),
+    }
+
+def get_simulation_model(snapshot=None):
+    """Simulator inputs from the snapshot's cases, strategy and collector history, open AR and DSO; built once per snapshot."""
+    snapshot = snapshot or _current_snapshot()
+
+    def build(snap):
+        invoices = snap['invoices']
+        open_ar = invoices.loc[invoices['payment_status'].astype(object) != 'Paid', 'balance_amount'].sum()
+        return build_model(snap['collection_cases'], data_loader.get_strategy_effectiveness(),
+                           data_loader.get_collection_performance(), open_ar=open_ar,
+                           dso=get_dso_engine(snap).current_dso())
+
+    return snapshot.derive('simulation_model', build)
+
+def simulate_scenario_logic(**scenario):
+    """Monte Carlo what-if of a strategy and/or staffing change against the current book (see simulation.simulate)."""
+    return simulate(get_simulation_model(), **scenario)
+
+def get_invoice_validation(snapshot=None):
+    """(flagged invoices, summary) from validate_invoices, computed once per snapshot."""
+    snapshot = snapshot or _current_snapshot()
+    return snapshot.derive('invoice_validation',
+                           lambda snap: validate_invoices(snap['invoices'], snap['invoice_line_items']))
+
+def get_invoice_validation_logic(limit=100):
+    """Validation summary and the first limit invoices whose headers disagree with their line items."""
+    flagged, summary = get_invoice_validation()
+    return {'summary': summary, 'invoices': flagged.head(limit)}
+
+# One DSO engine per process, moved forward incrementally as invoices change
+_dso_lock = threading.Lock()
+_dso_state = {}
+
+def get_dso_engine(snapshot=None):
+    """DSOEngine reflecting the snapshot's invoices; only changed invoices are re-booked between snapshots."""
+    snapshot = snapshot or _current_snapshot()
+    invoices, customers = snapshot['invoices'], snapshot['customers']
+    with _dso_lock:
+        engine = _dso_state.get('engine')
+        if engine is None or _dso_state['customers'] is not customers:
+            engine = DSOEngine(invoices, customers=customers)
+        elif _dso_state['invoices'] is not invoices:
+            engine.sync_invoices(invoices)
+        _dso_state.update(engine=engine, invoices=invoices, customers=customers)
+        return engine
+
+# One AR cube per process, kept in step with the snapshot's invoices and today's date
+_cube_lock = threading.Lock()
+_cube_state = {}
+
+def get_ar_cube(snapshot=None):
+    """ARCube over the snapshot's open invoices, aged as of today; only changes are re-booked."""
+    snapshot = snapshot or _current_snapshot()
+    invoices, customers = snapshot['invoices'], snapshot['customers']
+    with _cube_lock:
+        cube = _cube_state.get('cube')
+        if cube is None or _cube_state['customers'] is not customers:
+            cube = ARCube(invoices, customers)
+        elif _cube_state['invoices'] is not invoices:
+            cube.sync_invoices(invoices)
+        cube.advance()
+        _cube_state.update(cube=cube, invoices=invoices, customers=customers)
+        return cube
+
+# One risk scorer per process; after the first run only touched customers are rescored
+_risk_lock = threading.Lock()
+_risk_state = {}
+RISK_SCORES_FILE = 'risk_scores.csv'
+
+def _risk_sources(snapshot):
+    return (snapshot['customers'], snapshot['invoices'], snapshot['disputes'], snapshot['collection_cases'],
+            snapshot['payments'])
+
+def recompute_risk_scores(full=False, write=True, snapshot=None):
+    """
+    Risk-scoring job: score the whole book on the first run (or when full),
+    otherwise only the customers whose source rows changed since the last
+    run. With write, changed scores are saved to risk_scores.csv.
+    """
+    started = time.perf_counter()
+    snapshot = snapshot or _current_snapshot()
+    with _risk_lock:
+        scorer = _risk_state.get('scorer')
+        if scorer is None or full:
+            scorer = RiskScorer(*_risk_sources(snapshot))
+            mode, scored = 'full', len(scorer.scores)
+        else:
+            mode, scored = 'incremental', len(scorer.sync(*_risk_sources(snapshot)))
+        _risk_state['scorer'] = scorer
+        written = bool(write and scored)
+        if written:
+            write_dataset(data_loader.data_dir, RISK_SCORES_FILE, scorer.scores.reset_index(drop=True))
+        return {
+            'mode': mode,
+            'scored_customers': scored,
+            'total_customers': len(scorer.scores),
+            'written': written,
+            'seconds': round(time.perf_counter() - started, 3),
+        }
 
-    aging_summary = overdue_invoices.groupby('aging_bucket')['total_amount'].sum()
+def _customer_rows(snapshot):
+    # Row positions per customer in each risk source, so one customer is scored without scanning
+    return {
+        name: frame.groupby(frame['customer_id'].astype(object), sort=False).indices
+        for name, frame in zip(('customers', 'invoices', 'disputes', 'cases', 'payments'), _risk_sources(snapshot))
+    }
+
+def get_customer_risk_logic(customer_id, snapshot=None):
+    """Current risk score of one customer, computed from that customer's rows only. None if unknown."""
+    snapshot = snapshot or _current_snapshot()
+    rows = snapshot.derive(('customer_rows',), _customer_rows)
+    return score_customer(customer_id, *_risk_sources(snapshot), rows=rows)
+
+# One collections worklist per process. Logged interactions re-score their
+# customer in place; other dataset changes (or a new day) rebuild it.
+_worklist_lock = threading.Lock()
+_worklist_state = {}
+_WORKLIST_SOURCES = ('invoices', 'customers', 'collection_cases', 'payment_plans')
+
+def get_worklist(snapshot=None):
+    """Worklist over the snapshot's overdue invoices, prioritised as of today."""
+    snapshot = snapshot or _current_snapshot()
+    as_of = pd.Timestamp(datetime.now().date())
+    sources = {name: snapshot[name] for name in _WORKLIST_SOURCES}
+    risk_scores = data_loader.get_risk_scores()
+    with _worklist_lock:
+        worklist = _worklist_state.get('worklist')
+        current = (
+            worklist is not None and worklist.as_of == as_of
+            and _worklist_state['risk_scores'] is risk_scores
+            and all(_worklist_state[name] is frame for name, frame in sources.items())
+            # Interaction frames published by log_communication_logic are already applied
+            and _worklist_state['interactions'] is snapshot['interactions']
+        )
+        if not current:
+            accounts = build_accounts(
+                get_overdue_view(as_of, snapshot=snapshot), risk_scores, snapshot['interactions'],
+                snapshot['collection_cases'], snapshot['payment_plans'], as_of)
+            worklist = Worklist(accounts, as_of)
+            _worklist_state.update(sources, worklist=worklist, risk_scores=risk_scores,
+                                   interactions=snapshot['interactions'])
+        return worklist
+
+def get_worklist_logic(agent_id=None, limit=20):
+    """The next limit accounts for agent_id (everyone when None), highest priority first."""
+    worklist = get_worklist()
+    agent = agent_id or ALL_AGENTS
+    return {
+        'agent_id': agent_id,
+        'as_of': worklist.as_of.strftime('%Y-%m-%d'),
+        'total': worklist.size(agent),
+        'results': worklist.top(agent, limit),
+    }
+
+def _record_worklist_interaction(snapshot, customer_id, when, outcome):
+    # Apply a logged interaction to the live worklist instead of rebuilding it
+    with _worklist_lock:
+        worklist = _worklist_state.get('worklist')
+        if worklist is None:
+            return
+        worklist.record_interaction(customer_id, when, outcome)
+        _worklist_state['interactions'] = snapshot['interactions']
+
+def get_workload_logic(capacity=None, diff_limit=100):
+    """Current vs. rebalanced collector load (dry run) and the first diff_limit proposed moves."""
+    cases = _current_snapshot()['collection_cases']
+    plan = plan_rebalance(cases, capacity=capacity)
+    diff = plan['diff']
+    return {
+        'current': plan['current'],
+        'proposed': plan['proposed'],
+        'moves': len(diff),
+        'diff': diff.head(diff_limit).to_dict(orient='records'),
+    }
+
+def apply_payment_batch_logic(payments, dry_run=False):
+    """
+    Match a batch of incoming payments to open invoices and, unless dry_run,
+    write the updated balances and statuses to invoices.csv and publish them
+    as a new invoices snapshot. Batches are matched against invoices.csv
+    under a file lock (see cash_application.apply_batch), so concurrent
+    batches in any worker never apply against a stale balance; other workers
+    pick the new file up on their next snapshot.
+    """
+    outcome = {}
+
+    def apply(_):
+        updated, outcome['matches'], outcome['unmatched'] = apply_batch(data_loader, payments)
+        return updated
+
+    if dry_run:
+        outcome['matches'], outcome['unmatched'] = match_payments(_current_snapshot()['invoices'], payments)
+    else:
+        _current_snapshot()  # make sure there is a snapshot to update
+        datasets.update('invoices', apply)
+    matches, unmatched = outcome['matches'], outcome['unmatched']
+    return {
+        'dry_run': dry_run,
+        'summary': summarize(matches, unmatched),
+        'matches': matches[MATCH_COLUMNS + ['payment_date']],
+        'unmatched': unmatched[['payment_id', 'payment_amount', 'invoice_id', 'customer_id', 'reference_number']],
+    }
+
+def reconcile_gl_logic(abs_tol=None, limit=100, chunk_rows=GL_CHUNK_ROWS):
+    """
+    Reconcile gl_entries.csv (read in chunks) against the current invoices
+    snapshot and payments.csv. Returns the summary and the first limit
+    document and customer breaks.
+    """
+    started = time.perf_counter()
+    gl_path = os.path.join(data_loader.data_dir, 'gl_entries.csv')
+    if not os.path.exists(gl_path):
+        raise FileNotFoundError("Data file not found: gl_entries.csv")
+    options = {} if abs_tol is None else {'abs_tol': abs_tol}
+    snapshot = _current_snapshot()
+    result = reconcile(read_gl_chunks(gl_path, chunk_rows), snapshot['invoices'], snapshot['payments'], **options)
+    result['summary']['seconds'] = round(time.perf_counter() - started, 3)
+    return {
+        'summary': result['summary'],
+        'documents': result['documents'].head(limit),
+        'customers': result['customers'].head(limit),
+    }
+
+
+def get_ar_dashboard_logic():
+    """Logic to prepare AR dashboard data."""
+    snapshot = _current_snapshot()
+    overdue_invoices = get_overdue_view(snapshot=snapshot)
+
+    aging_summary = overdue_invoices.groupby('aging_bucket', observed=True)['total_amount'].sum()
     all_buckets = {"Current": 0, "1-30 Days": 0, "31-60 Days": 0, "61-90 Days": 0, "90+ Days": 0, "N/A": 0}
     all_buckets.update(aging_summary.to_dict())
     total_overdue_amount = overdue_invoices['total_amount'].sum()
-    mock_dso = 45
+    calculated_dso = get_dso_engine(snapshot).current_dso()
 
     output_cols = ['invoice_id', 'due_date', 'total_amount', 'customer_name', 'customer_id', 'aging_bucket']
     output_invoices = overdue_invoices[output_cols].copy()
@@ -106,31 +427,14 @@ def get_ar_dashboard_logic():
         "overdue_invoices": output_invoices_dict,
         "aging_summary_amount": all_buckets,
         "total_overdue_amount": total_overdue_amount,
-        "calculated_dso": mock_dso
+        "calculated_dso": calculated_dso
     }
 
 def get_delinquent_accounts_logic():
     """Logic to get delinquent accounts for collections."""
-    inv_df = get_invoices_df()
-    cust_df = get_customers_df()
-    if inv_df is None or cust_df is None:
-        raise ValueError("DataFrames not loaded properly")
-
-    from .utils import calculate_aging_dt # Import helper
-
-    # Filter overdue invoices and merge in customer_name cleanly
-    delinquent = inv_df[inv_df['payment_status'] == 'Overdue'].copy()
-    delinquent = delinquent.drop(columns=['customer_name'], errors='ignore')
+    delinquent = get_overdue_view()
     if delinquent.empty: return []
 
-    delinquent = pd.merge(
-        delinquent,
-        cust_df[['customer_id', 'customer_name']],
-        on='customer_id',
-        how='left'
-    )
-    delinquent['aging_bucket'] = delinquent['due_date'].apply(calculate_aging_dt)
-
     output_columns = ['invoice_id', 'due_date', 'total_amount', 'customer_name', 'customer_id', 'aging_bucket']
     if not all(col in delinquent.columns for col in output_columns):
          raise ValueError("Missing expected columns in delinquent DataFrame for service logic")
@@ -144,9 +448,7 @@ def log_communication_logic(customer_id, channel, agent_id, notes, disposition=N
     """
     Logic to log communication - includes appending to CSV (still risky).
     """
-    global _interactions_df # Need to modify the global DataFrame
-    cust_df = get_customers_df()
-    if cust_df is None: raise ValueError("Customers DataFrame not loaded")
+    cust_df = _current_snapshot()['customers']
 
     try:
         timestamp = datetime.now().isoformat()
@@ -166,10 +468,11 @@ def log_communication_logic(customer_id, channel, agent_id, notes, disposition=N
         header_needed = not os.path.exists(INTERACTIONS_FILE) or os.path.getsize(INTERACTIONS_FILE) == 0
         pd.DataFrame([new_log_data]).to_csv(INTERACTIONS_FILE, mode='a', header=header_needed, index=False)
 
-        # Update in-memory DataFrame
+        # Publish a new snapshot with the row appended (existing snapshots are never mutated)
         new_log_df = pd.DataFrame([new_log_data])
         new_log_df['interaction_date'] = pd.to_datetime(new_log_df['interaction_date'], errors='coerce')
-        _interactions_df = pd.concat([_interactions_df, new_log_df], ignore_index=True)
+        snapshot = datasets.update('interactions', lambda df: pd.concat([df, new_log_df], ignore_index=True))
+        _record_worklist_interaction(snapshot, customer_id, timestamp, disposition)
 
         print(f"Service logged communication to {INTERACTIONS_FILE} for {customer_id}")
         return True, "Logged successfully"
@@ -180,11 +483,10 @@ def log_communication_logic(customer_id, channel, agent_id, notes, disposition=N
 
 def trigger_automated_reminders_logic():
     """Logic for finding and triggering automated reminders."""
-    inv_df = get_invoices_df()
-    cust_df = get_customers_df()
-    inter_df = get_interactions_df() # Use interactions to check recent sends
-    if inv_df is None or cust_df is None or inter_df is None:
-        raise ValueError("DataFrames not loaded properly for reminders")
+    snapshot = _current_snapshot()
+    inv_df = snapshot['invoices']
+    cust_df = snapshot['customers']
+    inter_df = snapshot['interactions'] # Use interactions to check recent sends
 
     print(f"{datetime.now()}: Service running automated reminders logic...")
     # Determine the date for invoices due exactly 5 days ago
@@ -202,11 +504,11 @@ def trigger_automated_reminders_logic():
 
     # Check recent reminders
     recent_cutoff = (datetime.now() - timedelta(days=3)).isoformat()
-    # Ensure interaction_date is datetime before comparison
-    inter_df['interaction_date_dt'] = pd.to_datetime(inter_df['interaction_date'], errors='coerce')
+    # Ensure interaction_date is datetime before comparison (without mutating the shared frame)
+    interaction_dates = pd.to_datetime(inter_df['interaction_date'], errors='coerce')
     recent_reminders = inter_df[
         (inter_df['interaction_type'] == 'Automated Email Reminder') &
-        (inter_df['interaction_date_dt'] >= pd.Timestamp(recent_cutoff)) # Compare Timestamps
+        (interaction_dates >= pd.Timestamp(recent_cutoff)) # Compare Timestamps
     ]['customer_id'].unique()
 
     reminders_to_send = reminders_needed[~reminders_needed['customer_id'].isin(recent_reminders)]
@@ -233,17 +535,12 @@ def trigger_automated_reminders_logic():
 
 def get_report_summary_logic():
     """Logic for report summary data."""
-    inv_df = get_invoices_df()
-    if inv_df is None: raise ValueError("Invoices DataFrame not loaded")
-
-    from .utils import calculate_aging_dt # Import helper
-
-    overdue = inv_df[inv_df['payment_status'] == 'Overdue'].copy()
+    snapshot = _current_snapshot()
+    overdue = get_overdue_view(snapshot=snapshot)
     if overdue.empty:
          return {"aging_summary": {}, "total_overdue_amount": 0, "total_overdue_count": 0, "calculated_dso": 0}
 
-    overdue['aging_bucket'] = overdue['due_date'].apply(calculate_aging_dt)
-    aging_summary_agg = overdue.groupby('aging_bucket')['total_amount'].agg(['sum', 'count'])
+    aging_summary_agg = overdue.groupby('aging_bucket', observed=True)['total_amount'].agg(['sum', 'count'])
     all_buckets_template = {"Current": {'sum': 0, 'count': 0}, "1-30 Days": {'sum': 0, 'count': 0},
                             "31-60 Days": {'sum': 0, 'count': 0}, "61-90 Days": {'sum': 0, 'count': 0},
                             "90+ Days": {'sum': 0, 'count': 0}, "N/A": {'sum': 0, 'count': 0}}
@@ -251,13 +548,13 @@ def get_report_summary_logic():
 
     total_overdue_amount = overdue['total_amount'].sum()
     total_overdue_count = len(overdue)
-    mock_dso = 45
+    calculated_dso = get_dso_engine(snapshot).current_dso()
 
     return {
         "aging_summary": all_buckets_template,
         "total_overdue_amount": total_overdue_amount,
         "total_overdue_count": total_overdue_count,
-        "calculated_dso": mock_dso
+        "calculated_dso": calculated_dso
     }
 
 
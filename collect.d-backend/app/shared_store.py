@@ -0,0 +1,134 @@
+# --- File: app/shared_store.py ---
+# Datasets published once as memory-mapped Arrow IPC files and shared by all workers
+
+import fcntl
+import glob
+import os
+import tempfile
+import threading
+import pandas as pd
+import pyarrow as pa
+from .sidecars import read_dataset
+
+# Strings stay Arrow-backed so they are views of the shared mapping rather than
+# per-worker Python objects; numeric and datetime columns without nulls are
+# converted zero-copy by to_pandas(split_blocks=True).
+_ZERO_COPY_TYPES = {
+    pa.string(): pd.StringDtype('pyarrow'),
+    pa.large_string(): pd.StringDtype('pyarrow'),
+}.get
+
+
+class SharedDatasetStore:
+    """
+    Publishes each dataset once per source version into ``root`` and attaches
+    every process to it through a read-only memory map.
+
+    A generation is one Arrow IPC file named after the CSV's (mtime, size)
+    signature. The first worker to need it parses the CSV and publishes it
+    under an exclusive per-dataset lock; the rest attach to the same file.
+    While attached, a process holds a shared flock on the file. When a newer
+    generation is published, older ones are unlinked as soon as no process
+    holds such a lock (existing mappings stay valid after unlink on POSIX).
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._attached = {}  # stem -> (path, open file holding a LOCK_SH)
+        self._lock = threading.Lock()
+
+    def generation_path(self, csv_path, signature):
+        stem = os.path.splitext(os.path.basename(csv_path))[0]
+        mtime_ns, size = signature
+        return os.path.join(self.root, f"{stem}.{mtime_ns}-{size}.arrow")
+
+    def load(self, csv_path, signature, parse=pd.read_csv):
+        """Return a DataFrame backed by the shared generation for csv_path, publishing it if needed."""
+        path = self.generation_path(csv_path, signature)
+        while True:
+            if not os.path.exists(path):
+                self._publish(csv_path, path, parse)
+            handle = self._open_shared(path)
+            if handle is not None:
+                break
+            # Retired between our exists() check and open(); publish again
+
+        try:
+            source = pa.memory_map(path, 'r')
+            table = pa.ipc.open_file(source).read_all()
+            df = table.to_pandas(split_blocks=True, types_mapper=_ZERO_COPY_TYPES)
+        except Exception:
+            handle.close()
+            raise
+        self._attach(self._stem(path), path, handle)
+        return df
+
+    def retire_stale(self, stem, current):
+        """Unlink generations of stem other than current once no process is attached to them."""
+        retired = []
+        for path in glob.glob(os.path.join(self.root, f"{stem}.*.arrow")):
+            if path == current:
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    os.remove(path)
+                    retired.append(path)
+            except (BlockingIOError, FileNotFoundError):
+                continue  # still has readers, or already retired by another worker
+        return retired
+
+    def detach_all(self):
+        """Release this process' reader locks (e.g. on worker shutdown)."""
+        with self._lock:
+            for _, handle in self._attached.values():
+                handle.close()
+            self._attached.clear()
+
+    def _publish(self, csv_path, path, parse):
+        stem = self._stem(path)
+        with open(os.path.join(self.root, f"{stem}.lock"), 'a') as publish_lock:
+            fcntl.flock(publish_lock, fcntl.LOCK_EX)
+            if os.path.exists(path):
+                return  # another worker published while we waited
+            df = read_dataset(csv_path, parse=parse)
+            table = pa.Table.from_pandas(df, preserve_index=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+            os.close(fd)
+            try:
+                with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        self.retire_stale(stem, path)
+
+    def _open_shared(self, path):
+        """Open path holding a shared lock, or None if it was retired before we could lock it."""
+        try:
+            handle = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+        fcntl.flock(handle, fcntl.LOCK_SH)
+        try:
+            if os.stat(path).st_ino == os.fstat(handle.fileno()).st_ino:
+                return handle
+        except FileNotFoundError:
+            pass
+        handle.close()
+        return None
+
+    def _attach(self, stem, path, handle):
+        with self._lock:
+            previous = self._attached.get(stem)
+            self._attached[stem] = (path, handle)
+        if previous is not None:
+            previous[1].close()
+            if previous[0] != path:
+                self.retire_stale(stem, path)
+
+    @staticmethod
+    def _stem(path):
+        return os.path.basename(path).split('.', 1)[0]
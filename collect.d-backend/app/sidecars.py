@@ -0,0 +1,107 @@
+# --- File: app/sidecars.py ---
+# Typed columnar (Arrow IPC / Feather v2) sidecars for the CSV datasets
+
+import os
+import tempfile
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - sidecars are an optimisation only
+    pa = None
+    feather = None
+
+SIDECAR_DIRNAME = '.columnar'
+# Bump when the shape of what we store changes so stale sidecars are rebuilt
+SIDECAR_VERSION = 2
+
+
+def sidecars_available():
+    """True when pyarrow is installed and sidecars can be read and written."""
+    return feather is not None
+
+
+def sidecar_path(csv_path, variant=None):
+    """Location of the columnar sidecar for a CSV file."""
+    data_dir, filename = os.path.split(os.path.abspath(csv_path))
+    stem = os.path.splitext(filename)[0]
+    if variant:
+        stem = f"{stem}.{variant}"
+    return os.path.join(data_dir, SIDECAR_DIRNAME, f"{stem}.v{SIDECAR_VERSION}.feather")
+
+
+def is_fresh(csv_path, variant=None):
+    """True when a sidecar exists and is at least as new as its CSV."""
+    path = sidecar_path(csv_path, variant)
+    if not os.path.exists(path):
+        return False
+    return os.stat(path).st_mtime_ns >= os.stat(csv_path).st_mtime_ns
+
+
+def write_sidecar(csv_path, df, variant=None):
+    """Atomically write df as the sidecar of csv_path. Returns the sidecar path."""
+    path = sidecar_path(csv_path, variant)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    os.close(fd)
+    try:
+        # Uncompressed so the file can later be memory-mapped without decoding
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+def read_sidecar(csv_path, variant=None):
+    """Read the sidecar of csv_path back into a DataFrame with its dtypes and index."""
+    return feather.read_table(sidecar_path(csv_path, variant), memory_map=True).to_pandas()
+
+
+def read_dataset(csv_path, parse=pd.read_csv, variant=None):
+    """
+    Load csv_path through its columnar sidecar.
+
+    A fresh sidecar is read directly; otherwise the CSV is parsed with
+    ``parse`` and the sidecar is (re)built lazily for the next load. Without
+    pyarrow, or if the sidecar cannot be written, this is just ``parse``.
+    """
+    if not sidecars_available():
+        return parse(csv_path)
+    if is_fresh(csv_path, variant):
+        try:
+            return read_sidecar(csv_path, variant)
+        except (OSError, pa.ArrowException) as e:
+            print(f"Ignoring unreadable sidecar for {csv_path}: {e}")
+    df = parse(csv_path)
+    try:
+        write_sidecar(csv_path, df, variant)
+    except (OSError, pa.ArrowException) as e:
+        print(f"Could not write sidecar for {csv_path}: {e}")
+    return df
+
+
+def build_sidecars(data_dir, parse=pd.read_csv, force=False):
+    """
+    Convert every CSV in data_dir into its sidecar.
+
+    Returns a list of (filename, status) tuples where status is one of
+    'built', 'fresh' or an error message.
+    """
+    results = []
+    for filename in sorted(os.listdir(data_dir)):
+        if not filename.endswith('.csv'):
+            continue
+        csv_path = os.path.join(data_dir, filename)
+        if not force and is_fresh(csv_path):
+            results.append((filename, 'fresh'))
+            continue
+        try:
+            write_sidecar(csv_path, parse(csv_path))
+            results.append((filename, 'built'))
+        except Exception as e:
+            results.append((filename, f"error: {e}"))
+    return results
@@ -0,0 +1,211 @@
+# --- File: app/simulation.py ---
+# Monte Carlo what-if simulation of collection strategies and staffing on recoveries and DSO
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from .assignment import CLOSED_STATUSES
+
+DEFAULT_TRIALS = 10_000
+MAX_TRIALS = 200_000
+DEFAULT_HORIZON_DAYS = 90
+DEFAULT_CONFIDENCE = 0.95
+# Resolution hazard prior: as if each strategy had PRIOR_RESOLUTIONS cases resolved in PRIOR_MEAN_DAYS each
+PRIOR_RESOLUTIONS = 2.0
+PRIOR_MEAN_DAYS = 60.0
+# Share of the amount due collected when a case resolves, shrunk towards RECOVERY_PRIOR_MEAN
+RECOVERY_PRIOR_MEAN = 0.9
+RECOVERY_PRIOR_CASES = 10
+RECOVERY_CONCENTRATION = 50
+# Collector resolution rates are shrunk towards the book rate with this many pseudo-cases
+COLLECTOR_PRIOR_CASES = 20
+# Resolution hazard scales with (collectors after / collectors before) ** STAFFING_ELASTICITY
+STAFFING_ELASTICITY = 0.5
+# Trials x cases simulated per batch (bounds batch memory); batches are the unit of seeding and of work
+BATCH_CELLS = 2_000_000
+# Below this many trial x case cells the simulation runs in-process
+PARALLEL_MIN_CELLS = 10_000_000
+METRICS = ('recovered_amount', 'resolved_cases', 'dso')
+
+
+class ScenarioError(ValueError):
+    """Invalid scenario parameters; reported to the client as HTTP 400."""
+
+
+def build_model(cases, strategies=None, performance=None, open_ar=0.0, dso=0.0, as_of=None):
+    """
+    Arrays the simulator samples from, built from history:
+
+    - per strategy, a Gamma posterior on the daily resolution hazard from
+      collection_cases (resolutions over case-days of exposure) and a mean
+      recovery share from strategy_effectiveness (collected / assigned of
+      resolved cases), both shrunk towards the priors above;
+    - per open case, its amount, current strategy and a collector factor
+      from collection_performance (the collector's shrunk resolution rate
+      relative to the book's).
+    """
+    as_of = pd.Timestamp(as_of if as_of is not None else datetime.now().date()).normalize()
+    status = cases['status'].astype(object)
+    strategy = cases['collection_strategy'].astype(object).fillna('Unknown')
+    names = list(dict.fromkeys(
+        (list(strategies['strategy_name'].astype(object)) if strategies is not None else []) + list(strategy.unique())))
+    code = pd.Index(names).get_indexer(strategy)
+
+    resolved = status.eq('Resolved').to_numpy()
+    ended = cases['resolution_date'] if 'resolution_date' in cases.columns else pd.Series(pd.NaT, index=cases.index)
+    exposure = ((ended.where(resolved, as_of).fillna(as_of) - cases['case_open_date']).dt.days.clip(lower=0)
+                .fillna(0).to_numpy(dtype='float64'))
+    resolutions = np.bincount(code, weights=resolved, minlength=len(names))
+    case_days = np.bincount(code, weights=exposure, minlength=len(names))
+
+    recovery = np.full(len(names), RECOVERY_PRIOR_MEAN)
+    if strategies is not None and len(strategies):
+        stats = strategies.set_index(strategies['strategy_name'].astype(object)).reindex(names)
+        done = stats['resolved_cases'].fillna(0).to_numpy(dtype='float64')
+        assigned = (stats['avg_case_amount'].fillna(0) * stats['resolved_cases'].fillna(0)).to_numpy(dtype='float64')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            observed = np.clip(np.where(assigned > 0, stats['total_amount_collected'].fillna(0).to_numpy() / assigned, 0), 0, 1)
+        recovery = (done * observed + RECOVERY_PRIOR_CASES * RECOVERY_PRIOR_MEAN) / (done + RECOVERY_PRIOR_CASES)
+
+    open_cases = ~status.isin(CLOSED_STATUSES).to_numpy()
+    collector = cases['collector_id'].astype(object).to_numpy()
+    factor = np.ones(len(cases))
+    if performance is not None and len(performance):
+        perf = performance.set_index(performance['collector_id'].astype(object))
+        total = perf['total_cases'].fillna(0).to_numpy(dtype='float64')
+        done = perf['resolved_cases'].fillna(0).to_numpy(dtype='float64')
+        if done.sum() > 0:  # without any resolutions every collector is average
+            book_rate = done.sum() / total.sum()
+            shrunk = (done + COLLECTOR_PRIOR_CASES * book_rate) / (total + COLLECTOR_PRIOR_CASES)
+            factor = pd.Series(collector).map(pd.Series(shrunk / book_rate, index=perf.index)).fillna(1.0).to_numpy()
+
+    return {
+        'strategies': names,
+        'hazard_shape': resolutions + PRIOR_RESOLUTIONS,
+        'hazard_rate': case_days + PRIOR_RESOLUTIONS * PRIOR_MEAN_DAYS,
+        'recovery_mean': recovery,
+        'amount': cases['amount_due'].fillna(0).to_numpy(dtype='float64')[open_cases],
+        'strategy': code[open_cases],
+        'collector_factor': factor[open_cases],
+        'collectors': int(pd.Series(collector[open_cases]).nunique()),
+        'open_ar': float(open_ar),
+        'dso': float(dso),
+    }
+
+
+def scenario_codes(model, strategy=None, apply_to=None):
+    """Strategy code per open case under the scenario: strategy replaces apply_to (or every strategy)."""
+    codes = model['strategy'].copy()
+    if strategy is None:
+        return codes
+    if strategy not in model['strategies']:
+        raise ScenarioError(f"Unknown strategy: {strategy}")
+    target = model['strategies'].index(strategy)
+    if apply_to is None:
+        codes[:] = target
+    elif apply_to not in model['strategies']:
+        raise ScenarioError(f"Unknown strategy: {apply_to}")
+    else:
+        codes[codes == model['strategies'].index(apply_to)] = target
+    return codes
+
+
+def _simulate_batch(args):
+    """
+    Process-pool task: one batch of trials for the baseline and the scenario.
+
+    Both use the same draws (common random numbers), so their difference
+    reflects the change rather than sampling noise. Each trial draws
+    strategy hazards and recovery shares from their posteriors; each case
+    resolves when its exponential clock, scaled by its hazard, rings within
+    the horizon.
+    """
+    model, codes, staffing, horizon, trials, seed = args
+    rng = np.random.default_rng(seed)
+    hazards = rng.gamma(model['hazard_shape'], 1.0 / model['hazard_rate'], size=(trials, len(model['strategies'])))
+    mean = np.clip(model['recovery_mean'], 0.01, 0.99)
+    shares = rng.beta(mean * RECOVERY_CONCENTRATION, (1 - mean) * RECOVERY_CONCENTRATION,
+                      size=(trials, len(model['strategies'])))
+    clocks = rng.exponential(size=(trials, len(model['amount'])))
+    results = {}
+    for name, case_codes, scale in (('baseline', model['strategy'], 1.0), ('scenario', codes, staffing)):
+        rate = hazards[:, case_codes] * model['collector_factor'] * scale
+        resolved = clocks <= rate * horizon
+        recovered = (resolved * shares[:, case_codes]) @ model['amount'] if len(model['amount']) else np.zeros(trials)
+        results[name] = {'recovered_amount': recovered, 'resolved_cases': resolved.sum(axis=1).astype('float64')}
+    return results
+
+
+def _interval(values, confidence):
+    low, high = np.quantile(values, [(1 - confidence) / 2, (1 + confidence) / 2])
+    return {'mean': round(float(values.mean()), 2), 'low': round(float(low), 2),
+            'median': round(float(np.median(values)), 2), 'high': round(float(high), 2)}
+
+
+def simulate(model, strategy=None, apply_to=None, collectors_delta=0, horizon=DEFAULT_HORIZON_DAYS,
+             trials=DEFAULT_TRIALS, seed=None, confidence=DEFAULT_CONFIDENCE, workers=None):
+    """
+    Monte Carlo what-if over the open cases in model: baseline (current
+    strategies and staffing) against the scenario (strategy for every case,
+    or for those on apply_to, and collectors_delta more or fewer
+    collectors). Returns mean, median and confidence interval of recovered
+    amount, resolved cases and DSO within the horizon for both, and of
+    their difference.
+
+    DSO is scaled by the open AR left after recoveries, holding billing and
+    other collections constant. Trials run in fixed-size batches, each with
+    its own child of SeedSequence(seed), so a seed reproduces the result
+    whether the batches run in-process or spread over a process pool (used
+    from PARALLEL_MIN_CELLS trial x case cells).
+    """
+    if not 1 <= trials <= MAX_TRIALS:
+        raise ScenarioError(f"trials must be between 1 and {MAX_TRIALS}")
+    if horizon < 1 or not 0 < confidence < 1:
+        raise ScenarioError("horizon must be positive and confidence between 0 and 1")
+    if seed is not None and int(seed) < 0:
+        raise ScenarioError("seed must be a non-negative integer")
+    collectors = max(model['collectors'], 1)
+    if collectors + collectors_delta < 1:
+        raise ScenarioError("The scenario needs at least one collector")
+    codes = scenario_codes(model, strategy, apply_to)
+    staffing = ((collectors + collectors_delta) / collectors) ** STAFFING_ELASTICITY
+    seed = int(seed) if seed is not None else int(np.random.SeedSequence().entropy % (2 ** 32))
+
+    cases = max(len(model['amount']), 1)
+    batch_trials = max(1, min(trials, BATCH_CELLS // cases))
+    sizes = [batch_trials] * (trials // batch_trials) + ([trials % batch_trials] if trials % batch_trials else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(model, codes, staffing, horizon, size, child) for size, child in zip(sizes, seeds)]
+    workers = workers or os.cpu_count() or 1
+    if workers < 2 or len(tasks) < 2 or trials * cases < PARALLEL_MIN_CELLS:
+        parts = [_simulate_batch(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            parts = list(pool.map(_simulate_batch, tasks))
+
+    outcome = {}
+    for name in ('baseline', 'scenario'):
+        values = {metric: np.concatenate([part[name][metric] for part in parts]) for metric in METRICS[:2]}
+        remaining = np.clip(model['open_ar'] - values['recovered_amount'], 0, None)
+        values['dso'] = model['dso'] * remaining / model['open_ar'] if model['open_ar'] > 0 else np.zeros(trials)
+        outcome[name] = values
+    return {
+        'seed': seed,
+        'trials': trials,
+        'horizon_days': horizon,
+        'confidence': confidence,
+        'open_cases': len(model['amount']),
+        'open_amount': round(float(model['amount'].sum()), 2),
+        'collectors': collectors,
+        'scenario': {'strategy': strategy, 'apply_to': apply_to, 'collectors_delta': collectors_delta},
+        'results': {
+            name: {metric: _interval(outcome[name][metric], confidence) for metric in METRICS}
+            for name in ('baseline', 'scenario')
+        },
+        'difference': {
+            metric: _interval(outcome['scenario'][metric] - outcome['baseline'][metric], confidence)
+            for metric in METRICS
+        },
+    }
@@ -0,0 +1,77 @@
+# --- File: app/streaming.py ---
+# Chunked NDJSON / CSV serialization of dataset frames for streaming responses
+
+import csv
+import io
+import json
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+from .renderers import format_dates, json_precision
+
+# Rows serialized per chunk; bounds the per-request memory of a streamed export
+STREAM_CHUNK_ROWS = 5000
+
+STREAM_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def iter_ndjson(df, chunk_size=None):
+    """Yield df as newline-delimited JSON, one encoded chunk of rows at a time."""
+    chunk_size = chunk_size or STREAM_CHUNK_ROWS
+    precision = json_precision(df)
+    for start in range(0, len(df), chunk_size):
+        chunk = format_dates(df.iloc[start:start + chunk_size])
+        yield chunk.to_json(orient='records', lines=True, double_precision=precision).rstrip('\n').encode() + b'\n'
+
+
+def iter_csv(df, chunk_size=None):
+    """Yield df as CSV with a header row, one encoded chunk of rows at a time."""
+    chunk_size = chunk_size or STREAM_CHUNK_ROWS
+    yield df.iloc[:0].to_csv(index=False).encode()
+    for start in range(0, len(df), chunk_size):
+        chunk = format_dates(df.iloc[start:start + chunk_size])
+        yield chunk.to_csv(index=False, header=False).encode()
+
+
+def stream_frame(df, fmt, filename=None, headers=None):
+    """StreamingHttpResponse serializing df in row chunks as 'ndjson' or 'csv'."""
+    chunks = iter_ndjson(df) if fmt == 'ndjson' else iter_csv(df)
+    response = StreamingHttpResponse(chunks, content_type=STREAM_FORMATS[fmt])
+    if filename:
+        response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    for name, value in (headers or {}).items():
+        response[name] = value
+    return response
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Lets DRF negotiate ?format=ndjson. Dataset rows are streamed by the view;
+    this only renders the small non-streamed payloads such as errors.
+    """
+    media_type = STREAM_FORMATS['ndjson']
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(json.dumps(row, default=str) + '\n' for row in rows).encode()
+
+
+class CSVRenderer(BaseRenderer):
+    """Lets DRF negotiate ?format=csv; non-streamed payloads are written as CSV rows."""
+    media_type = STREAM_FORMATS['csv']
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        if not rows:
+            return b''
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+        return out.getvalue().encode()
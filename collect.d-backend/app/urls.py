@@ -2,7 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     CustomerViewSet, InvoiceViewSet, PaymentViewSet,
-    CollectionViewSet, ReportViewSet,
+    CollectionViewSet, ReportViewSet, RiskViewSet,
     CustomerDataView,
     InvoiceDataView,
     PaymentDataView,
@@ -25,6 +25,7 @@ router.register(r'invoices', InvoiceViewSet, basename='invoices')
 router.register(r'payments', PaymentViewSet, basename='payments')
 router.register(r'collections', CollectionViewSet, basename='collections')
 router.register(r'reports', ReportViewSet, basename='reports')
+router.register(r'risk', RiskViewSet, basename='risk')
 
 urlpatterns = [
     path('', include(router.urls)),
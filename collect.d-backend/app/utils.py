@@ -2,8 +2,13 @@
 # Helper functions used across the application
 
 from datetime import datetime, time, timedelta
+import numpy as np
 import pandas as pd
 
+# Upper bounds (in days past due) of the aging buckets before the open-ended last one
+AGING_BOUNDARIES = (0, 30, 60, 90)
+AGING_NA_LABEL = "N/A"
+
 def calculate_aging_dt(due_date):
     """Calculates aging bucket based on due date."""
     if pd.isna(due_date): return "N/A"
@@ -21,6 +26,43 @@ def calculate_aging_dt(due_date):
     else:
         return "90+ Days"
 
+def aging_labels(boundaries=AGING_BOUNDARIES):
+    """
+    Bucket labels for boundaries, e.g. (0, 15, 45) -> Current, 1-15 Days,
+    16-45 Days, 46+ Days, N/A. The default boundaries keep the legacy "90+
+    Days" label (of calculate_aging_dt and the dashboards) for 91+ days.
+    """
+    labels = ["Current"]
+    for low, high in zip(boundaries, boundaries[1:]):
+        labels.append(f"{low + 1}-{high} Days")
+    last = boundaries[-1] if tuple(boundaries) == AGING_BOUNDARIES else boundaries[-1] + 1
+    labels.append(f"{last}+ Days")
+    labels.append(AGING_NA_LABEL)
+    return labels
+
+def days_past_due(due_dates, as_of=None):
+    """Whole days from each due date to as_of (default: today) as float64, NaN where missing."""
+    as_of = pd.Timestamp(as_of if as_of is not None else datetime.now().date()).normalize()
+    due = pd.to_datetime(due_dates).dt.normalize()
+    return ((as_of - due) / pd.Timedelta(days=1)).to_numpy(dtype='float64', na_value=np.nan)
+
+def aging_buckets(due_dates, as_of=None, boundaries=AGING_BOUNDARIES):
+    """
+    Vectorised calculate_aging_dt: an ordered categorical aging bucket per due date.
+
+    Days past due are computed once against a single as_of date and binned
+    right-inclusively on boundaries (<= first is "Current", above the last is
+    the open-ended bucket); missing dates fall in "N/A".
+    """
+    days = days_past_due(due_dates, as_of)
+    labels = aging_labels(boundaries)
+    codes = np.searchsorted(np.asarray(boundaries, dtype='float64'), days, side='left')
+    codes[np.isnan(days)] = len(labels) - 1
+    return pd.Series(
+        pd.Categorical.from_codes(codes, categories=labels, ordered=True),
+        index=due_dates.index, name='aging_bucket',
+    )
+
 def check_call_timing_compliance():
     """Basic RBI Call Timing Check (8 AM - 7 PM IST)."""
     now_time = datetime.now().time() # Use IST-aware time in production
@@ -0,0 +1,102 @@
+# --- File: app/validation.py ---
+# Vectorised consistency checks between invoice headers and their line items
+
+import numpy as np
+import pandas as pd
+from .schemas import parse_percent
+
+# Each line may carry a rounding cent, so tolerance grows with the number of lines
+CENT_TOLERANCE = 0.01
+ISSUES = ('no_line_items', 'amount_mismatch', 'tax_mismatch', 'total_mismatch', 'line_tax_mismatch', 'rate_mismatch')
+VALIDATION_COLUMNS = ['invoice_id', 'issues', 'line_count', 'invoice_amount', 'line_amount', 'tax_amount',
+                      'line_tax_amount', 'expected_tax_amount', 'total_amount', 'line_total_amount']
+
+
+def header_tax_rates(invoices):
+    """Rate in percentage points from tax_type ("GST18" -> 18.0); NaN when there is none."""
+    if 'tax_type' not in invoices.columns:
+        return np.full(len(invoices), np.nan)
+    tax_type = invoices['tax_type']
+    if isinstance(tax_type.dtype, pd.CategoricalDtype):
+        # Parse each category once rather than each row
+        rates = pd.Series(tax_type.cat.categories.astype(str)).str.extract(r'(\d+(?:\.\d+)?)')[0].astype('float64')
+        codes = tax_type.cat.codes.to_numpy()
+        return np.where(codes >= 0, rates.to_numpy()[codes], np.nan)
+    return tax_type.astype('string').str.extract(r'(\d+(?:\.\d+)?)')[0].astype('float64').to_numpy()
+
+
+def validate_invoices(invoices, line_items, tolerance=CENT_TOLERANCE):
+    """
+    Invoices whose headers disagree with their line items.
+
+    Line items are grouped per invoice in one pass (invoice positions from a
+    hash lookup, then np.bincount per column), and every check is an array
+    comparison, so the cost is linear in lines with no Python-level loop.
+    Flags no_line_items, header invoice_amount / tax_amount / total_amount
+    differing from the line sums, line tax differing from amount x tax_rate
+    (line_tax_mismatch) and lines whose tax_rate differs from the header's
+    tax_type (rate_mismatch). Returns (flagged, summary): flagged has
+    VALIDATION_COLUMNS with issues as a comma-separated list.
+    """
+    n = len(invoices)
+    position = pd.Index(invoices['invoice_id'].astype(object)).get_indexer(line_items['invoice_id'].astype(object))
+    linked = position >= 0
+    pos = position[linked]
+
+    def line_sum(values):
+        return np.bincount(pos, weights=np.asarray(values, dtype='float64')[linked], minlength=n)
+
+    amount = line_items['amount'].fillna(0).to_numpy(dtype='float64')
+    rate = parse_percent(line_items['tax_rate']).to_numpy(dtype='float64')
+    header_rate = header_tax_rates(invoices)
+    line_count = np.bincount(pos, minlength=n)
+    sums = {
+        'line_amount': line_sum(amount),
+        'line_tax_amount': line_sum(line_items['tax_amount'].fillna(0)),
+        'line_total_amount': line_sum(line_items['total_amount'].fillna(0)),
+        'expected_tax_amount': line_sum(np.nan_to_num(amount * rate / 100)),
+    }
+    off_rate = np.zeros(len(pos), dtype=bool)
+    known = ~np.isnan(header_rate[pos])
+    off_rate[known] = np.abs(rate[linked][known] - header_rate[pos][known]) > 1e-6
+    rate_mismatches = np.bincount(pos, weights=off_rate, minlength=n)
+
+    header = {column: invoices[column].fillna(0).to_numpy(dtype='float64')
+              for column in ('invoice_amount', 'tax_amount', 'total_amount')}
+    limit = tolerance * np.maximum(line_count, 1) + 1e-9
+    has_lines = line_count > 0
+    flags = {
+        'no_line_items': ~has_lines,
+        'amount_mismatch': has_lines & (np.abs(header['invoice_amount'] - sums['line_amount']) > limit),
+        'tax_mismatch': has_lines & (np.abs(header['tax_amount'] - sums['line_tax_amount']) > limit),
+        'total_mismatch': has_lines & (np.abs(header['total_amount'] - sums['line_total_amount']) > limit),
+        'line_tax_mismatch': has_lines & (np.abs(sums['line_tax_amount'] - sums['expected_tax_amount']) > limit),
+        'rate_mismatch': rate_mismatches > 0,
+    }
+    flagged_mask = np.logical_or.reduce(list(flags.values())) if n else np.zeros(0, dtype=bool)
+    rows = np.flatnonzero(flagged_mask)
+
+    issues = pd.Series('', index=rows, dtype=object)
+    for name in ISSUES:
+        hit = flags[name][rows]
+        issues[hit] = issues[hit] + name + ','
+    flagged = pd.DataFrame({
+        'invoice_id': invoices['invoice_id'].astype(object).to_numpy()[rows],
+        'issues': issues.str.rstrip(',').to_numpy(),
+        'line_count': line_count[rows],
+        'invoice_amount': header['invoice_amount'][rows],
+        'line_amount': np.round(sums['line_amount'][rows], 2),
+        'tax_amount': header['tax_amount'][rows],
+        'line_tax_amount': np.round(sums['line_tax_amount'][rows], 2),
+        'expected_tax_amount': np.round(sums['expected_tax_amount'][rows], 2),
+        'total_amount': header['total_amount'][rows],
+        'line_total_amount': np.round(sums['line_total_amount'][rows], 2),
+    })[VALIDATION_COLUMNS]
+    summary = {
+        'invoices': n,
+        'line_items': len(line_items),
+        'orphan_line_items': int((~linked).sum()),
+        'flagged_invoices': len(flagged),
+        'issues': {name: int(flags[name].sum()) for name in ISSUES},
+    }
+    return flagged, summary
@@ -1,13 +1,65 @@
+import os
+from datetime import date
+import pandas as pd
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
 from rest_framework.views import APIView
 from rest_framework import status
+from rest_framework.settings import api_settings
+from . import services
+from .cube import DIMENSIONS as CUBE_DIMENSIONS
+from .forecast import DEFAULT_HORIZON_DAYS, FORECAST_FREQS, MAX_FORECAST_DAYS
+from .simulation import (DEFAULT_CONFIDENCE as SIMULATION_CONFIDENCE, DEFAULT_HORIZON_DAYS as SIMULATION_HORIZON_DAYS,
+                         DEFAULT_TRIALS as SIMULATION_TRIALS, ScenarioError)
 from .data_loaders import data_loader
+from .query import apply_query, QueryError
+from .schemas import get_schema
+from .conditional import conditional_get
+from .streaming import NDJSONRenderer, CSVRenderer, STREAM_FORMATS, stream_frame
 
 User = get_user_model()
 
+def _query_date(request, name):
+    """Date query parameter as a naive, normalized Timestamp (None when absent); ValueError if it is not a date."""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    date = pd.Timestamp(value)
+    if pd.isna(date):
+        raise ValueError(f"{name} must be a date (YYYY-MM-DD)")
+    # A timezone-aware value keeps its local calendar date
+    return (date.tz_localize(None) if date.tzinfo is not None else date).normalize()
+
+def _summary_get(request, build, validators=(), bad_request=()):
+    """
+    Conditional GET for a computed summary: 304 while the data behind it is
+    unchanged, otherwise Response(build()). validators identify that data
+    (the query string is added by conditional_get); the current dataset
+    snapshot is always one of them. Exceptions in bad_request become 400s,
+    anything else a 500.
+    """
+    def respond():
+        try:
+            return Response(build())
+        except bad_request as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    try:
+        version = services.snapshot_version()
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return conditional_get(request, respond, validators=[version, *validators])
+
+def _file_version(filename):
+    try:
+        return data_loader.signature(filename)
+    except FileNotFoundError:
+        return None
+
 class CustomerViewSet(viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -32,6 +84,17 @@ class InvoiceViewSet(viewsets.ViewSet):
     def list(self, request):
         return Response([])
 
+    @action(detail=False, methods=['get'])
+    def validation(self, request):
+        """Invoices whose header totals or tax disagree with their line items (?limit=100)."""
+        try:
+            limit = int(request.query_params.get('limit', 100))
+            if limit < 0:
+                raise ValueError
+        except ValueError:
+            return Response({'error': 'limit must be a non-negative integer'}, status=status.HTTP_400_BAD_REQUEST)
+        return _summary_get(request, lambda: services.get_invoice_validation_logic(limit))
+
     def create(self, request):
         return Response({})
 
@@ -50,6 +113,33 @@ class PaymentViewSet(viewsets.ViewSet):
     def list(self, request):
         return Response([])
 
+    @action(detail=False, methods=['post'])
+    def apply(self, request):
+        """
+        Cash application: match a payment batch to open invoices and apply it.
+        Accepts a bank-file CSV upload ('file'), JSON {"payments": [...]} or
+        a top-level JSON list of payments; dry_run (in the body or
+        ?dry_run=true) only reports the matches.
+        """
+        try:
+            data = request.data
+            if isinstance(data, list):
+                rows, options = data, request.query_params
+            elif hasattr(data, 'get'):
+                rows, options = data.get('payments'), data
+            else:
+                raise ValueError("Expected a JSON object or list of payments")
+            dry_run = str(options.get('dry_run', request.query_params.get('dry_run', False))).lower() in ('1', 'true', 'yes')
+            upload = request.FILES.get('file')
+            payments = pd.read_csv(upload) if upload else pd.DataFrame(rows or [])
+            if payments.empty:
+                raise ValueError("No payments supplied")
+            return Response(services.apply_payment_batch_logic(payments, dry_run=dry_run))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
     def create(self, request):
         return Response({})
 
@@ -68,6 +158,33 @@ class CollectionViewSet(viewsets.ViewSet):
     def list(self, request):
         return Response([])
 
+    @action(detail=False, methods=['get'])
+    def worklist(self, request):
+        """Highest-priority overdue accounts: ?agent=REP000039&limit=25 (all agents when agent is omitted)."""
+        try:
+            limit = int(request.query_params.get('limit', 20))
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            return Response({'error': 'limit must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+        return _summary_get(
+            request, lambda: services.get_worklist_logic(request.query_params.get('agent') or None, limit),
+            validators=[date.today(), _file_version('risk_scores.csv')])
+
+    @action(detail=False, methods=['get'])
+    def workload(self, request):
+        """Collector load-balance metrics, current and after a dry-run rebalance (?capacity=&diff_limit=)."""
+        try:
+            capacity = request.query_params.get('capacity')
+            capacity = int(capacity) if capacity else None
+            diff_limit = int(request.query_params.get('diff_limit', 100))
+            if diff_limit < 0 or (capacity is not None and capacity < 1):
+                raise ValueError
+        except ValueError:
+            return Response({'error': 'capacity must be a positive integer and diff_limit a non-negative integer'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return _summary_get(request, lambda: services.get_workload_logic(capacity, diff_limit))
+
     def create(self, request):
         return Response({})
 
@@ -86,6 +203,116 @@ class ReportViewSet(viewsets.ViewSet):
     def list(self, request):
         return Response([])
 
+    @action(detail=False, methods=['get'])
+    def cube(self, request):
+        """
+        Open AR from the pre-aggregated cube: ?group_by=state,aging_bucket
+        plus optional filters such as sales_rep_id=REP000027,REP000034.
+        """
+        group_by = [dim.strip() for dim in request.query_params.get('group_by', '').split(',') if dim.strip()]
+        filters = {
+            dim: request.query_params.get(dim).split(',')
+            for dim in CUBE_DIMENSIONS if request.query_params.get(dim)
+        }
+
+        def build():
+            cube = services.get_ar_cube()
+            cells = cube.query(group_by, filters)
+            for cell in cells:
+                cell['balance'] = round(cell['balance'], 2)
+            balance, count = cube.totals(filters)
+            return {
+                'as_of': cube.as_of.strftime('%Y-%m-%d'),
+                'group_by': group_by,
+                'filters': filters,
+                'cells': cells,
+                'total_balance': round(balance, 2),
+                'total_count': count,
+            }
+
+        # The cube is aged as of today; unknown dimensions are the client's error
+        return _summary_get(request, build, validators=[date.today()], bad_request=ValueError)
+
+    @action(detail=False, methods=['get'])
+    def forecast(self, request):
+        """Expected collections: ?freq=D|W&horizon=90&as_of=YYYY-MM-DD"""
+        freq = request.query_params.get('freq', 'D').upper()
+        try:
+            horizon = int(request.query_params.get('horizon', DEFAULT_HORIZON_DAYS))
+            as_of = _query_date(request, 'as_of')
+            if freq not in FORECAST_FREQS or not 1 <= horizon <= MAX_FORECAST_DAYS:
+                raise ValueError(f"freq must be D or W and horizon between 1 and {MAX_FORECAST_DAYS}")
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return _summary_get(request, lambda: services.get_forecast_logic(as_of, horizon, freq),
+                            validators=[as_of or date.today()])
+
+    @action(detail=False, methods=['get'], url_path='roll-rates')
+    def roll_rates(self, request):
+        """Aging roll rates from the daily snapshots: ?start=2025-01-01&end=2025-06-30&step=30"""
+        try:
+            step = int(request.query_params.get('step', 30))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        start = request.query_params.get('start') or None
+        end = request.query_params.get('end') or None
+
+        def respond():
+            try:
+                return Response(services.get_roll_rates_logic(start, end, step))
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            except Exception as e:
+                return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        # Roll rates read the aging snapshot files only, not the dataset snapshot
+        return conditional_get(request, respond, validators=[services.aging_snapshots.version()])
+
+    @action(detail=False, methods=['post'])
+    def simulate(self, request):
+        """
+        What-if of a collection strategy and/or staffing change, e.g.
+        {"strategy": "Intensive Collection", "apply_to": "Standard Follow-up",
+        "collectors_delta": 5, "horizon_days": 90, "trials": 10000, "seed": 42}.
+        The seed used is returned so a run can be reproduced.
+        """
+        data = request.data
+        if not isinstance(data, dict):
+            return Response({'error': 'Expected a JSON object of scenario parameters'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            params = {
+                'strategy': data.get('strategy') or None,
+                'apply_to': data.get('apply_to') or None,
+                'collectors_delta': int(data.get('collectors_delta', 0)),
+                'horizon': int(data.get('horizon_days', SIMULATION_HORIZON_DAYS)),
+                'trials': int(data.get('trials', SIMULATION_TRIALS)),
+                'seed': int(data['seed']) if data.get('seed') is not None else None,
+                'confidence': float(data.get('confidence', SIMULATION_CONFIDENCE)),
+            }
+        except (TypeError, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            return Response(services.simulate_scenario_logic(**params))
+        except ScenarioError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['get'])
+    def reconciliation(self, request):
+        """GL AR postings vs. invoices and payments: ?tolerance=0.01&limit=100"""
+        try:
+            limit = int(request.query_params.get('limit', 100))
+            tolerance = request.query_params.get('tolerance')
+            tolerance = float(tolerance) if tolerance is not None else None
+            if limit < 0 or (tolerance is not None and tolerance < 0):
+                raise ValueError("limit and tolerance must not be negative")
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return _summary_get(request, lambda: services.reconcile_gl_logic(abs_tol=tolerance, limit=limit),
+                            validators=[_file_version('gl_entries.csv')])
+
     def create(self, request):
         return Response({})
 
@@ -98,114 +325,145 @@ class ReportViewSet(viewsets.ViewSet):
     def destroy(self, request, pk=None):
         return Response({})
 
-class CustomerDataView(APIView):
-    def get(self, request):
-        try:
-            data = data_loader.get_customer_data()
-            return Response(data.to_dict('records'))
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-class InvoiceDataView(APIView):
-    def get(self, request):
-        try:
-            data = data_loader.get_invoice_data()
-            return Response(data.to_dict('records'))
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-class PaymentDataView(APIView):
-    def get(self, request):
-        try:
-            data = data_loader.get_payment_data()
-            return Response(data.to_dict('records'))
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-class CollectionCasesView(APIView):
-    def get(self, request):
-        try:
-            data = data_loader.get_collection_cases()
-            return Response(data.to_dict('records'))
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-class DisputesView(APIView):
-    def get(self, request):
-        try:
-            data = data_loader.get_disputes()
-            return Response(data.to_dict('records'))
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-class RiskScoresView(APIView):
-    def get(self, request):
-        try:
-            data = data_loader.get_risk_scores()
-            return Response(data.to_dict('records'))
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-class CustomerInteractionsView(APIView):
-    def get(self, request):
-        try:
-            data = data_loader.get_customer_interactions()
-            return Response(data.to_dict('records'))
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-class OrdersView(APIView):
-    def get(self, request):
-        try:
-            data = data_loader.get_orders()
-            return Response(data.to_dict('records'))
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+class RiskViewSet(viewsets.ViewSet):
+    permission_classes = [permissions.IsAuthenticated]
 
-class GLEntriesView(APIView):
-    def get(self, request):
+    def retrieve(self, request, pk=None):
+        """Fast path: score one customer from its own invoices, disputes and cases."""
         try:
-            data = data_loader.get_gl_entries()
-            return Response(data.to_dict('records'))
+            score = services.get_customer_risk_logic(pk)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-class InvoiceLineItemsView(APIView):
-    def get(self, request):
+        if score is None:
+            return Response({'error': f"No invoices for customer {pk}"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(score)
+
+    @action(detail=False, methods=['post'])
+    def recompute(self, request):
+        """Rescore customers touched since the last run ({"full": true} rescores everyone)."""
+        full = str(request.data.get('full', False)).lower() in ('1', 'true', 'yes')
+        write = str(request.data.get('write', True)).lower() in ('1', 'true', 'yes')
         try:
-            data = data_loader.get_invoice_line_items()
-            return Response(data.to_dict('records'))
+            return Response(services.recompute_risk_scores(full=full, write=write))
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class PaymentPlansView(APIView):
-    def get(self, request):
-        try:
-            data = data_loader.get_payment_plans()
-            return Response(data.to_dict('records'))
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+class DatasetView(APIView):
+    """
+    Read-only view over one DataLoader dataset.
+
+    Supports per-column filters (customer_id=, payment_status__in=,
+    due_date__lt=, ...), ordering=, page/page_size pagination and
+    fields=/exclude= column projection, all evaluated on the cached frame
+    before serialization. Paginated responses
+    are wrapped in {count, page, page_size, num_pages, results}; otherwise
+    the filtered rows are returned as a list with an X-Total-Count header.
+
+    Percent columns are filtered as numbers and served as "17.78%" strings,
+    as in the CSV files. Rows are handed to the renderer as a DataFrame; DataFrameJSONRenderer
+    encodes them column-wise without building per-row dicts.
+    ?format=ndjson and ?format=csv (or the matching Accept header) stream the
+    selected rows in chunks instead of building one response body.
+
+    Responses carry a strong ETag built from the file's (mtime, size) and the
+    query string, plus Last-Modified; a matching If-None-Match or
+    If-Modified-Since gets a 304 before the dataset is touched.
+    """
+    loader_method = None  # name of the DataLoader getter, e.g. 'get_invoice_data'
+    dataset_file = None  # CSV behind it, whose signature versions the responses
+    renderer_classes = list(api_settings.DEFAULT_RENDERER_CLASSES) + [NDJSONRenderer, CSVRenderer]
+
+    def get_frame(self):
+        return getattr(data_loader, self.loader_method)()
 
-class DSOAnalyticsView(APIView):
     def get(self, request):
         try:
-            data = data_loader.get_dso_analytics()
-            return Response(data.to_dict('records'))
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-class StrategyEffectivenessView(APIView):
-    def get(self, request):
+            signature = data_loader.signature(self.dataset_file)
+        except FileNotFoundError:
+            return self.respond(request)
+        return conditional_get(
+            request, lambda: self.respond(request),
+            validators=[self.dataset_file, signature],
+            last_modified=signature[0] // 1_000_000_000,
+        )
+
+    def respond(self, request):
         try:
-            data = data_loader.get_strategy_effectiveness()
-            return Response(data.to_dict('records'))
+            data = self.get_frame()
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-class CollectionPerformanceView(APIView):
-    def get(self, request):
         try:
-            data = data_loader.get_collection_performance()
-            return Response(data.to_dict('records'))
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR) 
\ No newline at end of file
+            rows, total, page_info = apply_query(data, request.query_params)
+        except QueryError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        # Filters compare percent columns as numbers; the payload keeps the files' "17.78%" strings
+        schema = get_schema(self.dataset_file)
+        if schema is not None:
+            rows = schema.format(rows)
+
+        fmt = request.accepted_renderer.format
+        if fmt in STREAM_FORMATS:
+            return stream_frame(
+                rows, fmt,
+                filename=os.path.splitext(self.dataset_file)[0],
+                headers={'X-Total-Count': str(total)},
+            )
+        if page_info is None:
+            return Response(rows, headers={'X-Total-Count': str(total)})
+        return Response({'count': total, **page_info, 'results': rows})
+
+class CustomerDataView(DatasetView):
+    loader_method = 'get_customer_data'
+    dataset_file = 'customer_master.csv'
+
+class InvoiceDataView(DatasetView):
+    loader_method = 'get_invoice_data'
+    dataset_file = 'invoices.csv'
+
+class PaymentDataView(DatasetView):
+    loader_method = 'get_payment_data'
+    dataset_file = 'payments.csv'
+
+class CollectionCasesView(DatasetView):
+    loader_method = 'get_collection_cases'
+    dataset_file = 'collection_cases.csv'
+
+class DisputesView(DatasetView):
+    loader_method = 'get_disputes'
+    dataset_file = 'disputes.csv'
+
+class RiskScoresView(DatasetView):
+    loader_method = 'get_risk_scores'
+    dataset_file = 'risk_scores.csv'
+
+class CustomerInteractionsView(DatasetView):
+    loader_method = 'get_customer_interactions'
+    dataset_file = 'customer_interactions.csv'
+
+class OrdersView(DatasetView):
+    loader_method = 'get_orders'
+    dataset_file = 'orders.csv'
+
+class GLEntriesView(DatasetView):
+    loader_method = 'get_gl_entries'
+    dataset_file = 'gl_entries.csv'
+
+class InvoiceLineItemsView(DatasetView):
+    loader_method = 'get_invoice_line_items'
+    dataset_file = 'invoice_line_items.csv'
+
+class PaymentPlansView(DatasetView):
+    loader_method = 'get_payment_plans'
+    dataset_file = 'payment_plans.csv'
+
+class DSOAnalyticsView(DatasetView):
+    loader_method = 'get_dso_analytics'
+    dataset_file = 'dso_analytics.csv'
+
+class StrategyEffectivenessView(DatasetView):
+    loader_method = 'get_strategy_effectiveness'
+    dataset_file = 'strategy_effectiveness.csv'
+
+class CollectionPerformanceView(DatasetView):
+    loader_method = 'get_collection_performance'
+    dataset_file = 'collection_performance.csv'
@@ -0,0 +1,109 @@
+# --- File: app/warmup.py ---
+# Concurrent start-up loading of every dataset into the DataLoader cache
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from .data_loaders import data_loader, frame_nbytes
+from .schemas import parse_dataset
+from .sidecars import read_dataset, is_fresh, sidecars_available
+
+# Files at least this large are parsed in worker processes in 'process' mode
+PROCESS_MODE_MIN_BYTES = 1024 * 1024
+WARM_UP_MODES = ('thread', 'process')
+
+
+def _build_sidecar(csv_path):
+    """Process-pool task: parse a CSV and write its sidecar; the frame itself is not sent back."""
+    started = time.perf_counter()
+    read_dataset(csv_path, parse=parse_dataset)
+    return time.perf_counter() - started
+
+
+def _load(loader, filename):
+    started = time.perf_counter()
+    df = loader.load_csv(filename)
+    return {
+        'dataset': filename,
+        'rows': len(df),
+        'bytes': frame_nbytes(df),
+        'seconds': time.perf_counter() - started,
+        'error': None,
+    }
+
+
+def warm_up(loader=None, filenames=None, max_workers=None, mode='thread', include_services=True):
+    """
+    Load all datasets concurrently and return a per-dataset timing list.
+
+    mode='thread' parses every file on a bounded thread pool (pandas' C parser
+    releases the GIL for most of the work). mode='process' first parses the
+    larger files in a process pool, which writes their columnar sidecars, and
+    then loads everything through the thread pool from those sidecars.
+    Failures are reported per dataset and never raised; an unknown mode is
+    reported and falls back to 'thread'.
+    """
+    if mode not in WARM_UP_MODES:
+        print(f"Warm-up: unknown mode {mode!r} (expected one of {', '.join(WARM_UP_MODES)}); using 'thread'")
+        mode = 'thread'
+    loader = loader or data_loader
+    if filenames is None:
+        filenames = sorted(f for f in os.listdir(loader.data_dir) if f.endswith('.csv'))
+    max_workers = max_workers or min(8, len(filenames) or 1, os.cpu_count() or 1)
+    prebuilt = {}
+
+    if mode == 'process' and sidecars_available():
+        large = [
+            f for f in filenames
+            if os.path.getsize(os.path.join(loader.data_dir, f)) >= PROCESS_MODE_MIN_BYTES
+            and not is_fresh(os.path.join(loader.data_dir, f))
+        ]
+        if large:
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(large))) as pool:
+                futures = {pool.submit(_build_sidecar, os.path.join(loader.data_dir, f)): f for f in large}
+                for future in as_completed(futures):
+                    try:
+                        prebuilt[futures[future]] = future.result()
+                    except Exception as e:
+                        print(f"Warm-up: could not prebuild {futures[future]}: {e}")
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='warmup') as pool:
+        futures = {pool.submit(_load, loader, f): f for f in filenames}
+        for future in as_completed(futures):
+            filename = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'dataset': filename, 'rows': 0, 'bytes': 0, 'seconds': 0.0, 'error': str(e)}
+            result['seconds'] += prebuilt.get(filename, 0.0)
+            results.append(result)
+
+    if include_services:
+        # app.services builds its snapshot from the now-warm DataLoader cache
+        from . import services
+        services.load_data()
+
+    return sorted(results, key=lambda r: r['seconds'], reverse=True)
+
+
+def format_timing_table(results):
+    """Render warm_up() results as a fixed-width text table."""
+    lines = [f"{'dataset':<30}{'rows':>8}{'KiB':>10}{'ms':>10}  status"]
+    for r in results:
+        lines.append(
+            f"{r['dataset']:<30}{r['rows']:>8}{r['bytes'] / 1024:>10.1f}{r['seconds'] * 1000:>10.1f}  "
+            f"{'error: ' + r['error'] if r['error'] else 'ok'}"
+        )
+    return '\n'.join(lines)
+
+
+def warm_up_from_env():
+    """Entry point for the WSGI/ASGI modules, controlled by COLLECTD_WARM_CACHES / COLLECTD_WARM_MODE."""
+    if os.getenv('COLLECTD_WARM_CACHES', 'True') != 'True':
+        return None
+    started = time.perf_counter()
+    results = warm_up(mode=os.getenv('COLLECTD_WARM_MODE', 'thread'))
+    print(format_timing_table(results))
+    print(f"Dataset warm-up finished in {time.perf_counter() - started:.2f}s")
+    return results
@@ -0,0 +1,195 @@
+# --- File: app/worklist.py ---
+# Prioritised collections worklist with per-agent top-K retrieval
+
+import heapq
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+ALL_AGENTS = None
+UNASSIGNED_AGENT = 'Unassigned'
+# Points per factor; a full score is 100
+WEIGHTS = {'amount': 30, 'days_overdue': 30, 'risk': 20, 'last_contact': 20}
+# Amount at which the (log-scaled) amount factor saturates
+AMOUNT_SCALE = 10_000_000
+DAYS_OVERDUE_CAP = 120
+LAST_CONTACT_CAP = 30
+RISK_WEIGHTS = {'High Risk': 1.0, 'Medium Risk': 2 / 3, 'Low Risk': 1 / 3, 'Minimal Risk': 0.0}
+UNKNOWN_RISK_WEIGHT = 0.5
+# Accounts with an active promise to pay keep only this share of their score
+PROMISE_FACTOR = 0.5
+PROMISE_OUTCOMES = ('Promise to Pay', 'Promised Payment')
+PROMISE_DAYS = 7
+ITEM_COLUMNS = [
+    'invoice_id', 'customer_id', 'customer_name', 'agent_id', 'total_amount', 'due_date', 'days_overdue',
+    'aging_bucket', 'risk_category', 'last_contact_date', 'promise_active', 'priority_score',
+]
+
+
+def last_contacts(interactions):
+    """Latest interaction date per customer, and the date of the latest promise to pay."""
+    dates = pd.to_datetime(interactions['interaction_date'], errors='coerce').dt.normalize()
+    frame = pd.DataFrame({'customer_id': interactions['customer_id'].astype(object).to_numpy(), 'date': dates.to_numpy()})
+    last_contact = frame.groupby('customer_id')['date'].max()
+    promised = interactions['outcome'].isin(PROMISE_OUTCOMES).to_numpy()
+    last_promise = frame[promised].groupby('customer_id')['date'].max()
+    return last_contact, last_promise
+
+
+def priority_scores(amount, days_overdue, risk_category, days_since_contact, promise_active):
+    """Vectorised priority score (0-100) from the account factors; never-contacted accounts count as stale."""
+    amount = np.clip(np.nan_to_num(np.asarray(amount, dtype='float64')), 0, None)
+    days_overdue = np.clip(np.nan_to_num(np.asarray(days_overdue, dtype='float64')), 0, DAYS_OVERDUE_CAP)
+    since_contact = np.asarray(days_since_contact, dtype='float64')
+    since_contact = np.clip(np.where(np.isnan(since_contact), LAST_CONTACT_CAP, since_contact), 0, LAST_CONTACT_CAP)
+    risk = pd.Series(risk_category, dtype=object).map(RISK_WEIGHTS).fillna(UNKNOWN_RISK_WEIGHT).to_numpy(dtype='float64')
+    score = (
+        WEIGHTS['amount'] * np.minimum(np.log1p(amount) / np.log1p(AMOUNT_SCALE), 1.0)
+        + WEIGHTS['days_overdue'] * days_overdue / DAYS_OVERDUE_CAP
+        + WEIGHTS['risk'] * risk
+        + WEIGHTS['last_contact'] * since_contact / LAST_CONTACT_CAP
+    )
+    score = np.where(np.asarray(promise_active, dtype=bool), score * PROMISE_FACTOR, score)
+    return np.round(score, 2)
+
+
+def build_accounts(overdue, risk_scores, interactions, cases, payment_plans, as_of):
+    """
+    Worklist rows for the overdue invoices in overdue (with customer_name
+    and aging_bucket, as from services.get_overdue_view): the owning agent
+    (the collector on the invoice's collection case, else its sales rep),
+    risk category, last contact, active promise and priority score.
+    """
+    as_of = pd.Timestamp(as_of).normalize()
+    customer_ids = overdue['customer_id'].astype(object)
+    collector = cases.drop_duplicates('invoice_id', keep='last').set_index('invoice_id')['collector_id'].astype(object)
+    agent = overdue['invoice_id'].map(collector).astype(object)
+    agent = agent.where(agent.notna(), overdue['sales_rep_id'].astype(object))
+    risk = risk_scores.drop_duplicates('customer_id').set_index('customer_id')['risk_category'].astype(object)
+    last_contact, last_promise = last_contacts(interactions)
+    active_plans = payment_plans[
+        (payment_plans['status'] == 'Active') & (payment_plans['next_installment_date'] >= as_of)
+    ]['invoice_id']
+
+    accounts = pd.DataFrame({
+        'invoice_id': overdue['invoice_id'].astype(object).to_numpy(),
+        'customer_id': customer_ids.to_numpy(),
+        'customer_name': overdue['customer_name'].astype(object).to_numpy(),
+        'agent_id': agent.fillna(UNASSIGNED_AGENT).to_numpy(),
+        'total_amount': overdue['total_amount'].to_numpy(dtype='float64'),
+        'due_date': overdue['due_date'].to_numpy(),
+        'days_overdue': (as_of - overdue['due_date']).dt.days.to_numpy(),
+        'aging_bucket': overdue['aging_bucket'].astype(object).to_numpy(),
+        'risk_category': customer_ids.map(risk).to_numpy(),
+        'last_contact_date': customer_ids.map(last_contact).to_numpy(),
+        'last_promise_date': customer_ids.map(last_promise).to_numpy(),
+    })
+    accounts['promise_active'] = (
+        overdue['invoice_id'].isin(active_plans).to_numpy()
+        | ((as_of - accounts['last_promise_date']).dt.days <= PROMISE_DAYS).to_numpy()
+    )
+    accounts['priority_score'] = priority_scores(
+        accounts['total_amount'], accounts['days_overdue'], accounts['risk_category'],
+        (as_of - accounts['last_contact_date']).dt.days, accounts['promise_active'])
+    return accounts
+
+
+class Worklist:
+    """
+    Overdue accounts ranked by priority score, per agent and overall.
+
+    Each agent (and ALL_AGENTS) has a max-heap of (score, sequence, account)
+    entries. Re-scoring an account pushes a new entry and leaves the old one
+    to be discarded lazily, so an update costs O(log N) and top(agent, k)
+    pops only k valid entries plus any stale ones: O(K log N) rather than a
+    sort of the agent's queue.
+    """
+
+    def __init__(self, accounts, as_of=None):
+        self.as_of = pd.Timestamp(as_of if as_of is not None else datetime.now().date()).normalize()
+        self._accounts = accounts.reset_index(drop=True)
+        self._by_customer = self._accounts.groupby('customer_id', sort=False).indices
+        self._sizes = self._accounts['agent_id'].value_counts().to_dict()
+        self._lock = threading.Lock()
+        self._build_heaps()
+
+    def __len__(self):
+        return len(self._accounts)
+
+    def agents(self):
+        return sorted(self._sizes)
+
+    def size(self, agent=ALL_AGENTS):
+        return len(self._accounts) if agent is ALL_AGENTS else self._sizes.get(agent, 0)
+
+    def top(self, agent=ALL_AGENTS, k=20):
+        """The k highest-priority accounts for agent (ALL_AGENTS for everyone), as dicts."""
+        with self._lock:
+            heap = self._heaps.get(agent)
+            if not heap:
+                return []
+            taken = []
+            while heap and len(taken) < k:
+                entry = heapq.heappop(heap)
+                if entry[1] == self._sequence[entry[2]]:
+                    taken.append(entry)
+                else:
+                    self._stale -= 1
+            for entry in taken:
+                heapq.heappush(heap, entry)
+            rows = self._accounts.iloc[[position for _, _, position in taken]][ITEM_COLUMNS]
+        records = rows.astype(object).where(rows.notna(), None).to_dict(orient='records')
+        for record in records:
+            for column in ('due_date', 'last_contact_date'):
+                if record[column] is not None:
+                    record[column] = record[column].strftime('%Y-%m-%d')
+        return records
+
+    def record_interaction(self, customer_id, when=None, outcome=None):
+        """
+        Re-score a customer's accounts after a logged interaction: the last
+        contact moves to when, and a promise-to-pay outcome starts a promise.
+        Returns the number of accounts re-scored.
+        """
+        when = pd.Timestamp(when if when is not None else datetime.now()).normalize()
+        with self._lock:
+            positions = self._by_customer.get(customer_id)
+            if positions is None or not len(positions):
+                return 0
+            accounts = self._accounts
+            col = accounts.columns.get_loc
+            contact = accounts['last_contact_date'].iloc[positions]
+            accounts.iloc[positions, col('last_contact_date')] = contact.where(contact >= when, when)
+            if outcome in PROMISE_OUTCOMES:
+                accounts.iloc[positions, col('last_promise_date')] = when
+                if (self.as_of - when).days <= PROMISE_DAYS:
+                    accounts.iloc[positions, col('promise_active')] = True
+            rows = accounts.iloc[positions]
+            scores = priority_scores(
+                rows['total_amount'], rows['days_overdue'], rows['risk_category'],
+                (self.as_of - rows['last_contact_date']).dt.days, rows['promise_active'])
+            accounts.iloc[positions, col('priority_score')] = scores
+            for position, score, agent in zip(positions.tolist(), scores.tolist(), rows['agent_id'].tolist()):
+                self._counter += 1
+                self._sequence[position] = self._counter
+                for key in (ALL_AGENTS, agent):
+                    heapq.heappush(self._heaps[key], (-score, self._counter, position))
+                    self._stale += 1  # the entry it replaces is now stale
+            if self._stale > 2 * len(accounts):
+                self._build_heaps()
+            return len(positions)
+
+    def _build_heaps(self):
+        # One entry per account in its agent's heap and in the overall heap
+        scores = self._accounts['priority_score'].to_numpy()
+        agents = self._accounts['agent_id'].to_numpy()
+        self._sequence = list(range(len(scores)))
+        self._counter = len(scores)
+        self._stale = 0
+        self._heaps = {}
+        for agent in (ALL_AGENTS, *self._sizes):
+            positions = np.arange(len(scores)) if agent is ALL_AGENTS else np.flatnonzero(agents == agent)
+            heap = list(zip((-scores[positions]).tolist(), positions.tolist(), positions.tolist()))
+            heapq.heapify(heap)
+            self._heaps[agent] = heap
@@ -0,0 +1,45 @@
+# --- File: benchmarks/bench_aging.py ---
+# Compare row-wise calculate_aging_dt with the vectorised aging_buckets
+#
+# Usage: python benchmarks/bench_aging.py [--rows N] [--repeat N]
+
+import argparse
+import os
+import sys
+import timeit
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np
+import pandas as pd
+from app.utils import aging_buckets, calculate_aging_dt
+
+
+def synthetic_due_dates(rows, seed=0):
+    """Due dates spread over the last 200 days and next 30, with 1% missing."""
+    rng = np.random.default_rng(seed)
+    today = pd.Timestamp.now().normalize()
+    due = today - pd.to_timedelta(rng.integers(-30, 200, rows), unit='D')
+    due = pd.Series(due)
+    due[rng.random(rows) < 0.01] = pd.NaT
+    return due
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    due = synthetic_due_dates(args.rows)
+    assert (due.apply(calculate_aging_dt) == aging_buckets(due).astype(str)).all()
+
+    rowwise = min(timeit.repeat(lambda: due.apply(calculate_aging_dt), number=1, repeat=args.repeat))
+    vectorised = min(timeit.repeat(lambda: aging_buckets(due), number=1, repeat=args.repeat))
+    print(f"{'rows':<12}{'apply ms':>12}{'vectorised ms':>16}{'speedup':>10}")
+    print(f"{args.rows:<12}{rowwise * 1000:>12.1f}{vectorised * 1000:>16.1f}{rowwise / vectorised:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
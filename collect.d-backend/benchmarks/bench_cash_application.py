@@ -0,0 +1,82 @@
+# --- File: benchmarks/bench_cash_application.py ---
+# Time matching and applying a synthetic bank file against a synthetic open-invoice book
+#
+# Usage: python benchmarks/bench_cash_application.py [--invoices N] [--payments N] [--customers N]
+
+import argparse
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np
+import pandas as pd
+from app.cash_application import apply_matches, match_payments, summarize
+
+
+def synthetic_book(invoices, customers, seed=0):
+    """Open invoices spread over customers, with unique PO references."""
+    rng = np.random.default_rng(seed)
+    today = pd.Timestamp.now().normalize()
+    balance = np.round(rng.lognormal(11, 1.2, invoices), 2)
+    return pd.DataFrame({
+        'invoice_id': [f"INV{i:08d}" for i in range(invoices)],
+        'customer_id': [f"CUST{c:06d}" for c in rng.integers(0, customers, invoices)],
+        'reference_number': [f"PO-{i:08d}" for i in rng.permutation(invoices)],
+        'due_date': today - pd.to_timedelta(rng.integers(-30, 180, invoices), unit='D'),
+        'total_amount': balance,
+        'paid_amount': 0.0,
+        'balance_amount': balance,
+        'payment_status': 'Unpaid',
+        'payment_date': pd.NaT,
+    })
+
+
+def synthetic_bank_file(book, payments, seed=1):
+    """Payments quoting the invoice, the PO reference, just the amount, a short-paid amount, or several invoices."""
+    rng = np.random.default_rng(seed)
+    picks = book.iloc[rng.choice(len(book), size=min(payments, len(book)), replace=False)].reset_index(drop=True)
+    kind = rng.choice(5, size=len(picks), p=[0.4, 0.25, 0.2, 0.1, 0.05])
+    batch = pd.DataFrame({
+        'payment_id': [f"BANK{i:08d}" for i in range(len(picks))],
+        'invoice_id': np.where(kind == 0, picks['invoice_id'], None),
+        'reference_number': np.where(kind == 1, picks['reference_number'], None),
+        'customer_id': np.where(kind >= 2, picks['customer_id'], None),
+        'payment_amount': np.where(kind == 3, picks['balance_amount'] - 0.75, picks['balance_amount']),
+    })
+    # Combination payments cover the customer's two oldest invoices
+    oldest = book.sort_values('due_date').groupby('customer_id')['balance_amount'].apply(lambda s: s.head(2).sum())
+    combo = kind == 4
+    batch.loc[combo, 'payment_amount'] = batch.loc[combo, 'customer_id'].map(oldest).to_numpy()
+    return batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--invoices', type=int, default=200_000)
+    parser.add_argument('--payments', type=int, default=100_000)
+    parser.add_argument('--customers', type=int, default=20_000)
+    args = parser.parse_args()
+
+    book = synthetic_book(args.invoices, args.customers)
+    bank_file = synthetic_bank_file(book, args.payments)
+
+    started = time.perf_counter()
+    matches, unmatched = match_payments(book, bank_file)
+    matched_at = time.perf_counter()
+    apply_matches(book, matches)
+    applied_at = time.perf_counter()
+
+    summary = summarize(matches, unmatched)
+    print(f"{'method':<18}{'payments':>10}")
+    for method, stats in summary['by_method'].items():
+        print(f"{method:<18}{stats['payments']:>10}")
+    print(f"{'unmatched':<18}{summary['unmatched_payments']:>10}")
+    print(f"match {(matched_at - started) * 1000:.0f} ms, apply {(applied_at - matched_at) * 1000:.0f} ms "
+          f"for {len(bank_file)} payments against {len(book)} invoices")
+
+
+if __name__ == '__main__':
+    main()
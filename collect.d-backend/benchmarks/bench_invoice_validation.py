@@ -0,0 +1,64 @@
+# --- File: benchmarks/bench_invoice_validation.py ---
+# Time the invoice/line-item consistency check on a synthetic book
+#
+# Usage: python benchmarks/bench_invoice_validation.py [--invoices N] [--lines-per-invoice N]
+
+import argparse
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np
+import pandas as pd
+from app.validation import validate_invoices
+
+
+def synthetic_book(invoices, lines_per_invoice, seed=0):
+    """Consistent invoices and line items, with about 1% of headers perturbed."""
+    rng = np.random.default_rng(seed)
+    rates = rng.choice([5.0, 12.0, 18.0, 28.0], invoices)
+    owner = np.repeat(np.arange(invoices), rng.integers(1, 2 * lines_per_invoice, invoices))
+    amount = np.round(rng.lognormal(11, 1.2, len(owner)), 2)
+    tax = np.round(amount * rates[owner] / 100, 2)
+    ids = np.array([f"INV{i:08d}" for i in range(invoices)], dtype=object)
+    line_items = pd.DataFrame({
+        'invoice_id': ids[owner],
+        'amount': amount,
+        'tax_rate': rates[owner],
+        'tax_amount': tax,
+        'total_amount': amount + tax,
+    })
+    header_amount = np.round(np.bincount(owner, weights=amount, minlength=invoices), 2)
+    header_tax = np.round(np.bincount(owner, weights=tax, minlength=invoices), 2)
+    header_amount[rng.random(invoices) < 0.01] += 10
+    header = pd.DataFrame({
+        'invoice_id': ids,
+        'invoice_amount': header_amount,
+        'tax_amount': header_tax,
+        'total_amount': header_amount + header_tax,
+        'tax_type': pd.Categorical([f"GST{int(r)}" for r in rates]),
+    })
+    return header, line_items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--invoices', type=int, default=1_000_000)
+    parser.add_argument('--lines-per-invoice', type=int, default=3)
+    args = parser.parse_args()
+
+    invoices, line_items = synthetic_book(args.invoices, args.lines_per_invoice)
+    started = time.perf_counter()
+    flagged, summary = validate_invoices(invoices, line_items)
+    elapsed = time.perf_counter() - started
+    for name, count in summary['issues'].items():
+        print(f"{name:<20}{count:>10}")
+    print(f"validated {len(line_items)} lines of {len(invoices)} invoices in {elapsed * 1000:.0f} ms "
+          f"({len(flagged)} flagged)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# --- File: benchmarks/bench_renderers.py ---
+# Compare record-dict JSON rendering with DataFrameJSONRenderer on real datasets
+#
+# Usage: python benchmarks/bench_renderers.py [--repeat N] [--scale K]
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'collect_d.settings')
+
+import django
+django.setup()
+
+import pandas as pd
+from rest_framework.renderers import JSONRenderer
+from app.data_loaders import data_loader
+from app.renderers import DataFrameJSONRenderer, format_dates
+
+DATASETS = {
+    'invoices': 'get_invoice_data',
+    'gl_entries': 'get_gl_entries',
+}
+
+
+def render_records(df):
+    """The previous path: one dict per row, then DRF's JSONRenderer."""
+    records = format_dates(df).astype(object)
+    records = records.where(records.notna(), None).to_dict('records')
+    return JSONRenderer().render(records)
+
+
+def render_columnar(df):
+    return DataFrameJSONRenderer().render(df)
+
+
+def best_ms(func, df, repeat):
+    return min(timeit.repeat(lambda: func(df), number=1, repeat=repeat)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scale', type=int, default=1, help='concatenate each dataset K times')
+    args = parser.parse_args()
+
+    print(f"{'dataset':<14}{'rows':>10}{'records ms':>12}{'columnar ms':>13}{'speedup':>9}")
+    for name, getter in DATASETS.items():
+        df = getattr(data_loader, getter)()
+        if args.scale > 1:
+            df = pd.concat([df] * args.scale, ignore_index=True)
+        # Byte layout differs (whitespace, float formatting); the decoded payloads must not
+        assert json.loads(render_records(df)) == json.loads(render_columnar(df)), name
+        before = best_ms(render_records, df, args.repeat)
+        after = best_ms(render_columnar, df, args.repeat)
+        print(f"{name:<14}{len(df):>10}{before:>12.1f}{after:>13.1f}{before / after:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
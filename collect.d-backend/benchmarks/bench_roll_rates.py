@@ -0,0 +1,70 @@
+# --- File: benchmarks/bench_roll_rates.py ---
+# Time recording daily aging snapshots and computing roll rates over them
+#
+# Usage: python benchmarks/bench_roll_rates.py [--invoices N] [--days N] [--step N] [--dir PATH]
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np
+import pandas as pd
+from app.roll_rates import AgingSnapshotStore, roll_rates
+
+
+def synthetic_invoices(invoices, days, seed=0):
+    """Invoices raised over the window, about 70% of them paid some time after their due date."""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2025-01-01')
+    invoice_date = start + pd.to_timedelta(rng.integers(-60, days, invoices), unit='D')
+    due_date = invoice_date + pd.to_timedelta(rng.choice([15, 30, 45, 60], invoices), unit='D')
+    paid = rng.random(invoices) < 0.7
+    payment_date = due_date + pd.to_timedelta(rng.integers(-20, 120, invoices), unit='D')
+    return pd.DataFrame({
+        'invoice_id': [f"INV{i:08d}" for i in range(invoices)],
+        'invoice_date': invoice_date,
+        'due_date': due_date,
+        'payment_status': np.where(paid, 'Paid', 'Unpaid'),
+        'payment_date': payment_date.where(paid),
+    }), start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--invoices', type=int, default=1_000_000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--step', type=int, default=30)
+    parser.add_argument('--dir', default=None, help='Snapshot directory (default: a temporary one, removed afterwards)')
+    args = parser.parse_args()
+
+    directory = args.dir or tempfile.mkdtemp(prefix='aging-snapshots-')
+    try:
+        invoices, start = synthetic_invoices(args.invoices, args.days)
+        store = AgingSnapshotStore(directory)
+        started = time.perf_counter()
+        store.backfill(invoices, start, start + pd.Timedelta(days=args.days - 1))
+        recorded = time.perf_counter()
+        counts, pairs = store.transitions(step=args.step)
+        monthly = time.perf_counter()
+        store.transitions(step=1)
+        daily = time.perf_counter()
+
+        print(roll_rates(counts).to_string(index=False))
+        size = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory))
+        print(f"recorded {args.days} days x {args.invoices} invoices in {recorded - started:.1f} s "
+              f"({size / 1e6:.0f} MB on disk)")
+        print(f"roll rates over {len(pairs)} {args.step}-day pairs in {(monthly - recorded) * 1000:.0f} ms, "
+              f"over {args.days - 1} daily pairs in {(daily - monthly) * 1000:.0f} ms")
+    finally:
+        if not args.dir:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
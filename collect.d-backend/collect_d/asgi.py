@@ -13,4 +13,10 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'collect_d.settings')
 
-application = get_asgi_application() 
\ No newline at end of file
+application = get_asgi_application()
+
+# Load every dataset concurrently before the first request is served
+# (disable with COLLECTD_WARM_CACHES=False)
+from app.warmup import warm_up_from_env
+
+warm_up_from_env()
@@ -12,5 +12,18 @@ CUSTOMER_MASTER_FILE = os.path.join(DATA_DIR, 'customer_master.csv')
 INVOICES_FILE = os.path.join(DATA_DIR, 'invoices.csv')
 INTERACTIONS_FILE = os.path.join(DATA_DIR, 'customer_interactions.csv')
 
+# Total memory budget (bytes) for parsed datasets kept in the DataLoader cache
+DATA_CACHE_MAX_BYTES = int(os.environ.get('COLLECTD_DATA_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+# When set (e.g. /dev/shm/collectd under gunicorn), datasets are published once into this
+# directory as Arrow IPC files and memory-mapped by every worker instead of parsed per worker
+SHARED_DATASETS_DIR = os.environ.get('COLLECTD_SHARED_DATASETS_DIR')
+
+# Check invoice headers against invoice_line_items.csv whenever the service datasets are (re)loaded
+VALIDATE_INVOICES_ON_LOAD = os.environ.get('COLLECTD_VALIDATE_ON_LOAD', '1') != '0'
+
+# Daily per-invoice aging snapshots used for roll-rate analytics
+AGING_SNAPSHOTS_DIR = os.environ.get('COLLECTD_AGING_SNAPSHOTS_DIR', os.path.join(DATA_DIR, 'aging_snapshots'))
+
 # Add other configurations like secret keys, database URIs (for later phases) etc.
 # SECRET_KEY = os.environ.get('SECRET_KEY', 'a-default-dev-secret-key') # Example
@@ -0,0 +1,36 @@
+import os
+import sys
+
+# Make the backend packages importable and point config.DATA_DIR at generated_data
+# before any test module imports config
+THIS_DIR = os.path.dirname(__file__)
+BACKEND_DIR = os.path.abspath(os.path.join(THIS_DIR, '..'))
+PROJECT_ROOT = os.path.abspath(os.path.join(BACKEND_DIR, '..'))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault('COLLECTD_DATA_DIR', os.path.join(PROJECT_ROOT, 'generated_data'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'collect_d.settings')
+
+import django
+django.setup()
+
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+
+@pytest.fixture
+def api_request():
+    """
+    Build authenticated DRF requests for calling views directly:
+    api_request('get', '/api/reports/cube/', {'group_by': 'state'}) or
+    api_request('post', path, payload, format='json').
+    """
+    factory = APIRequestFactory()
+    user = get_user_model()(username='tester')
+
+    def build(method, path, data=None, **kwargs):
+        request = getattr(factory, method)(path, data, **kwargs)
+        force_authenticate(request, user=user)
+        return request
+
+    return build
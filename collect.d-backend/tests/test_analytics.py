@@ -0,0 +1,78 @@
+import os
+import shutil
+import numpy as np
+import pytest
+import pandas as pd
+from config import DATA_DIR
+from app import sidecars
+from app.analytics import collection_performance, monthly_dso_analytics, run_pipeline
+from app.data_loaders import DataLoader
+
+SOURCE_FILES = ('invoices.csv', 'disputes.csv', 'collection_cases.csv')
+
+
+@pytest.fixture
+def loader():
+    return DataLoader()
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for filename in SOURCE_FILES:
+        shutil.copy(os.path.join(DATA_DIR, filename), tmp_path / filename)
+    return str(tmp_path)
+
+
+def test_monthly_analytics_match_generated_file(loader):
+    result = monthly_dso_analytics(loader.get_invoice_data(), loader.get_disputes())
+    expected = loader.get_dso_analytics()
+    assert list(result['month']) == list(expected['month'])
+    # The generator leaves disputed_invoices at 0; the pipeline counts disputed invoices
+    for column in expected.columns.drop(['month', 'disputed_invoices']):
+        np.testing.assert_allclose(result[column], expected[column], atol=0.011, err_msg=column)
+    assert result['disputed_invoices'].sum() > 0
+
+
+def test_recent_months_match_the_full_history_run(loader):
+    invoices, disputes = loader.get_invoice_data(), loader.get_disputes()
+    full = monthly_dso_analytics(invoices, disputes).set_index('month')
+    recent = monthly_dso_analytics(invoices, disputes, pd.period_range('2025-02', '2025-04', freq='M')).set_index('month')
+    pd.testing.assert_frame_equal(recent, full.loc[recent.index], check_exact=False, atol=1e-6)
+
+
+def test_collection_performance_matches_generated_file(loader):
+    result = collection_performance(loader.get_collection_cases(), as_of='2025-04-17')
+    expected = loader.get_collection_performance()
+    assert list(result['collector_id']) == list(expected['collector_id'].astype(str))
+    assert list(result['collector_name']) == list(expected['collector_name'].astype(str))
+    for column in expected.columns.drop(['collector_id', 'collector_name', 'assessment_date']):
+        np.testing.assert_allclose(result[column], expected[column], atol=0.011, err_msg=column)
+
+
+def test_run_pipeline_only_recomputes_new_months(data_dir):
+    first = run_pipeline(data_dir, as_of='2025-04-17')
+    assert first['months_computed'][0] == '2024-10' and first['months_computed'][-1] == '2025-04'
+
+    second = run_pipeline(data_dir, as_of='2025-04-17')
+    assert second['months_computed'] == ['2025-04']
+
+    invoices_path = os.path.join(data_dir, 'invoices.csv')
+    invoices = pd.read_csv(invoices_path)
+    extra = invoices.iloc[[0]].assign(invoice_id='INV-NEW', invoice_date='2025-05-03', due_date='2025-06-02',
+                                      payment_status='Pending', payment_date=np.nan)
+    pd.concat([invoices, extra]).to_csv(invoices_path, index=False)
+    third = run_pipeline(data_dir, as_of='2025-04-17')
+    assert third['months_computed'] == ['2025-04', '2025-05']
+    assert third['months_total'] == 8
+
+
+def test_pipeline_output_is_served_from_typed_sidecar(data_dir):
+    run_pipeline(data_dir, as_of='2025-04-17')
+    loader = DataLoader(data_dir=data_dir)
+    analytics = loader.get_dso_analytics()
+    performance = loader.get_collection_performance()
+    assert analytics['dso'].dtype == 'int32'
+    assert performance['resolution_rate'].dtype == 'float64'
+    if sidecars.sidecars_available():
+        assert sidecars.is_fresh(os.path.join(data_dir, 'dso_analytics.csv'))
+        assert sidecars.is_fresh(os.path.join(data_dir, 'collection_performance.csv'))
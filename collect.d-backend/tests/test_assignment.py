@@ -0,0 +1,78 @@
+import json
+import numpy as np
+import pandas as pd
+from app.assignment import apply_assignments, plan_rebalance, rebalance
+from app.data_loaders import data_loader
+from app.views import CollectionViewSet
+
+
+def make_cases():
+    # R1 holds almost everything; R3 has resolved history
+    return pd.DataFrame({
+        'case_id': [f'CASE{i}' for i in range(8)],
+        'invoice_id': [f'INV{i}' for i in range(8)],
+        'customer_id': ['C1'] * 8,
+        'collector_id': ['R1', 'R1', 'R1', 'R1', 'R1', 'R2', 'R3', 'R3'],
+        'assigned_to': ['Ann', 'Ann', 'Ann', 'Ann', 'Ann', 'Bob', 'Cid', 'Cid'],
+        'status': ['Open', 'Open', 'Escalated', 'Open', 'In Progress', 'Open', 'Resolved', 'Resolved'],
+        'priority': ['Critical', 'Low', 'High', 'Medium', 'Low', 'Low', 'High', 'High'],
+        'amount_due': [500.0, 100.0, 300.0, 200.0, 100.0, 50.0, 80.0, 70.0],
+    })
+
+
+def test_rebalance_spreads_load_and_keeps_critical_cases():
+    cases = make_cases()
+    plan = plan_rebalance(cases)
+    assert plan['proposed']['cv_amount'] < plan['current']['cv_amount']
+    assert plan['proposed']['max_amount'] < plan['current']['max_amount']
+
+    assignments, profiles = rebalance(cases)
+    assert len(assignments) == 6  # resolved cases are never moved
+    assert assignments.set_index('case_id').at['CASE0', 'proposed_collector_id'] == 'R1'
+    # Resolution history earns R3 a larger share of the open amount
+    assert profiles.at['R3', 'share'] > profiles.at['R2', 'share']
+
+
+def test_capacity_is_respected():
+    assignments, _ = rebalance(make_cases(), capacity=2)
+    assert assignments['proposed_collector_id'].value_counts().max() <= 2
+
+
+def test_apply_assignments_updates_only_moved_cases():
+    cases = make_cases()
+    diff = plan_rebalance(cases)['diff']
+    assert len(diff) and set(diff['from_collector_id']) == {'R1'}
+    updated = apply_assignments(cases, diff)
+    moved = updated['case_id'].isin(diff['case_id'])
+    assert list(updated.loc[moved, 'collector_id']) == list(diff.set_index('case_id').loc[updated.loc[moved, 'case_id'], 'to_collector_id'])
+    assert (updated.loc[~moved, 'collector_id'] == cases.loc[~moved, 'collector_id']).all()
+    assert list(updated.loc[updated['collector_id'] == 'R3', 'assigned_to'].unique()) == ['Cid']
+
+
+def test_rebalance_generated_cases():
+    cases = data_loader.get_collection_cases()
+    plan = plan_rebalance(cases)
+    assert plan['proposed']['cv_amount'] < plan['current']['cv_amount'] / 2
+    assert plan['proposed']['max_open_cases'] <= int(np.ceil(len(cases) / cases['collector_id'].nunique() * 1.25))
+    total = sum(c['amount_assigned'] for c in plan['proposed']['collectors'])
+    assert abs(total - cases['amount_due'].sum()) < 1.0
+
+    # Applying the plan leaves nothing to move on the next run
+    assert len(plan_rebalance(apply_assignments(cases, plan['diff']))['diff']) == 0
+
+
+def test_workload_endpoint(api_request):
+    request = api_request('get', '/api/collections/workload/', {'diff_limit': 3})
+    response = CollectionViewSet.as_view({'get': 'workload'})(request)
+    response.render()
+    assert response.status_code == 200
+    body = json.loads(response.content)
+    assert body['moves'] > 0 and len(body['diff']) == 3
+    assert body['proposed']['cv_amount'] < body['current']['cv_amount']
+
+    view = CollectionViewSet.as_view({'get': 'workload'})
+    for params in ({'diff_limit': -1}, {'capacity': 0}, {'capacity': -5}, {'diff_limit': 'x'}):
+        assert view(api_request('get', '/api/collections/workload/', params)).status_code == 400
+    empty = view(api_request('get', '/api/collections/workload/', {'diff_limit': 0}))
+    empty.render()
+    assert empty.status_code == 200 and json.loads(empty.content)['diff'] == []
@@ -0,0 +1,143 @@
+import json
+import os
+import shutil
+import pandas as pd
+import pytest
+from app import services
+from app.cash_application import apply_batch, apply_cash, match_payments
+from app.data_loaders import DataLoader
+from app.views import PaymentViewSet
+
+
+def make_invoices():
+    return pd.DataFrame({
+        'invoice_id': ['INV1', 'INV2', 'INV3', 'INV4', 'INV5', 'INV6', 'INV7'],
+        'customer_id': ['C1', 'C1', 'C2', 'C2', 'C3', 'C3', 'C3'],
+        'reference_number': ['PO-1', 'PO-2', 'PO-3', 'PO-4', 'PO-5', 'PO-6', 'PO-7'],
+        'due_date': pd.to_datetime(['2025-01-01', '2025-02-01', '2025-01-15', '2025-03-01',
+                                    '2025-01-01', '2025-02-01', '2025-03-01']),
+        'total_amount': [1000.0, 500.0, 800.0, 800.0, 300.0, 200.0, 150.0],
+        'paid_amount': 0.0,
+        'balance_amount': [1000.0, 500.0, 800.0, 800.0, 300.0, 200.0, 150.0],
+        'payment_status': pd.Categorical(['Overdue', 'Unpaid', 'Unpaid', 'Unpaid', 'Overdue', 'Unpaid', 'Unpaid']),
+        'payment_date': pd.NaT,
+    })
+
+
+def test_each_stage_matches():
+    payments = pd.DataFrame({
+        'payment_id': ['P1', 'P2', 'P3', 'P4', 'P5'],
+        'invoice_id': ['INV1', None, None, None, None],
+        'reference_number': [None, 'PO-2', None, None, None],
+        'customer_id': [None, None, 'C2', 'C2', 'C3'],
+        'payment_amount': [1000.0, 200.0, 800.0, 799.5, 350.0],
+    })
+    matches, unmatched = match_payments(make_invoices(), payments)
+    got = {(row.payment_id, row.invoice_id): row.method for row in matches.itertuples()}
+    assert got == {
+        ('P1', 'INV1'): 'invoice_id',
+        ('P2', 'INV2'): 'reference',
+        ('P3', 'INV3'): 'customer_amount',  # oldest of the two equal balances
+        ('P4', 'INV4'): 'tolerance',
+        ('P5', 'INV6'): 'combination',
+        ('P5', 'INV7'): 'combination',
+    }
+    assert unmatched.empty
+    tolerance = matches.set_index('payment_id').loc['P4']
+    assert tolerance['applied_amount'] == 800.0 and tolerance['difference'] == pytest.approx(-0.5)
+
+
+def test_apply_updates_balances_and_statuses():
+    payments = pd.DataFrame({
+        'invoice_id': ['INV1', 'INV2', None],
+        'customer_id': [None, None, 'C9'],
+        'payment_amount': [1000.0, 100.0, 42.0],
+        'payment_date': ['2025-04-01', '2025-04-02', '2025-04-03'],
+    })
+    updated, matches, unmatched = apply_cash(make_invoices(), payments)
+    rows = updated.set_index('invoice_id')
+    assert rows.at['INV1', 'balance_amount'] == 0 and rows.at['INV1', 'payment_status'] == 'Paid'
+    assert rows.at['INV1', 'payment_date'] == pd.Timestamp('2025-04-01')
+    assert rows.at['INV2', 'balance_amount'] == 400 and rows.at['INV2', 'paid_amount'] == 100
+    assert rows.at['INV2', 'payment_status'] == 'Partial' and pd.isna(rows.at['INV2', 'payment_date'])
+    assert isinstance(updated['payment_status'].dtype, pd.CategoricalDtype)
+    assert list(unmatched['payment_amount']) == [42.0]
+
+
+def test_overpayment_and_duplicate_payments_on_one_invoice():
+    payments = pd.DataFrame({'invoice_id': ['INV2', 'INV2'], 'payment_amount': [300.0, 300.0]})
+    updated, matches, _ = apply_cash(make_invoices(), payments)
+    assert list(matches['applied_amount']) == [300.0, 200.0]
+    assert list(matches['difference']) == [0.0, 100.0]
+    assert updated.set_index('invoice_id').at['INV2', 'balance_amount'] == 0
+
+
+def test_missing_amount_column_is_rejected():
+    with pytest.raises(ValueError):
+        match_payments(make_invoices(), pd.DataFrame({'invoice_id': ['INV1']}))
+
+
+def test_apply_endpoint_dry_run_leaves_store_untouched(api_request):
+    invoices = services.get_invoices_df()
+    target = invoices[invoices['balance_amount'] > 0].iloc[0]
+    payload = {'dry_run': True, 'payments': [
+        {'payment_id': 'BANK1', 'invoice_id': target['invoice_id'], 'payment_amount': float(target['balance_amount'])}]}
+    request = api_request('post', '/api/payments/apply/', payload, format='json')
+    response = PaymentViewSet.as_view({'post': 'apply'})(request)
+    response.render()
+    assert response.status_code == 200
+    body = json.loads(response.content)
+    assert body['summary']['matched_payments'] == 1
+    assert body['matches'][0]['invoice_id'] == target['invoice_id']
+    assert services.get_invoices_df() is invoices
+
+
+def test_apply_batch_persists_and_publishes_updated_invoices(tmp_path, monkeypatch):
+    shutil.copy(os.path.join(services.data_loader.data_dir, 'invoices.csv'), tmp_path / 'invoices.csv')
+    monkeypatch.setattr(services.data_loader, 'data_dir', str(tmp_path))
+    before = services.get_invoices_df()
+    target = before[(before['balance_amount'] > 0) & (before['payment_status'] == 'Overdue')].iloc[0]
+    batch = pd.DataFrame({'invoice_id': [target['invoice_id']], 'payment_amount': [float(target['balance_amount'])]})
+    result = services.apply_payment_batch_logic(batch)
+    assert result['summary']['matched_invoices'] == 1
+    after = services.get_invoices_df().set_index('invoice_id')
+    assert after.at[target['invoice_id'], 'payment_status'] == 'Paid'
+    assert after.at[target['invoice_id'], 'balance_amount'] == 0
+    assert not services.get_overdue_view()['invoice_id'].eq(target['invoice_id']).any()
+
+    # Persisted: a fresh loader (another worker) sees the payment, and the same
+    # batch applied from a stale snapshot is matched against the written balance
+    on_disk = DataLoader(data_dir=str(tmp_path)).get_invoice_data().set_index('invoice_id')
+    assert on_disk.at[target['invoice_id'], 'balance_amount'] == 0
+    services.datasets.update('invoices', lambda df: before)
+    again = services.apply_payment_batch_logic(batch)
+    assert again['summary']['matched_payments'] == 0
+
+
+def test_snapshot_picks_up_invoices_rewritten_by_another_worker(tmp_path, monkeypatch):
+    shutil.copy(os.path.join(services.data_loader.data_dir, 'invoices.csv'), tmp_path / 'invoices.csv')
+    monkeypatch.setattr(services.data_loader, 'data_dir', str(tmp_path))
+    before = services.get_invoices_df()
+    target = before[before['balance_amount'] > 1].iloc[0]
+    # Another process applies a batch through its own loader
+    apply_batch(DataLoader(data_dir=str(tmp_path)),
+                pd.DataFrame({'invoice_id': [target['invoice_id']], 'payment_amount': [1.0]}))
+    current = services.get_invoices_df().set_index('invoice_id')
+    assert current.at[target['invoice_id'], 'paid_amount'] == pytest.approx(target['paid_amount'] + 1)
+
+
+def test_apply_endpoint_rejects_empty_batch(api_request):
+    request = api_request('post', '/api/payments/apply/', {'payments': []}, format='json')
+    assert PaymentViewSet.as_view({'post': 'apply'})(request).status_code == 400
+
+
+def test_apply_endpoint_accepts_top_level_list(api_request):
+    invoices = services.get_invoices_df()
+    target = invoices[invoices['balance_amount'] > 0].iloc[0]
+    payload = [{'invoice_id': target['invoice_id'], 'payment_amount': float(target['balance_amount'])}]
+    request = api_request('post', '/api/payments/apply/?dry_run=true', payload, format='json')
+    response = PaymentViewSet.as_view({'post': 'apply'})(request)
+    response.render()
+    assert response.status_code == 200
+    assert json.loads(response.content)['dry_run'] is True
+    assert services.get_invoices_df() is invoices
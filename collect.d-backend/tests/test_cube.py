@@ -0,0 +1,102 @@
+import json
+import pytest
+from app.cube import ARCube
+from app.data_loaders import data_loader
+from app.utils import aging_buckets
+from app.views import ReportViewSet
+
+AS_OF = '2025-05-01'
+
+
+def open_invoices(invoices, customers, as_of=AS_OF):
+    frame = invoices[invoices['balance_amount'] > 0].drop(columns=['customer_name'])
+    frame = frame.merge(customers[['customer_id', 'state', 'industry_sector', 'customer_category']], on='customer_id')
+    frame['aging_bucket'] = aging_buckets(frame['due_date'], as_of)
+    return frame
+
+
+def expected(frame, group_by):
+    grouped = frame.groupby(group_by, observed=True)['balance_amount'].agg(['sum', 'count'])
+    return {tuple(str(v) for v in (key if isinstance(key, tuple) else (key,))): (row['sum'], row['count'])
+            for key, row in grouped.iterrows()}
+
+
+def as_dict(cells, group_by):
+    return {tuple(str(cell[dim]) for dim in group_by): (cell['balance'], cell['count']) for cell in cells}
+
+
+def assert_same(cells, reference, group_by):
+    actual = as_dict(cells, group_by)
+    assert actual.keys() == reference.keys()
+    for key, (balance, count) in reference.items():
+        assert actual[key][0] == pytest.approx(balance) and actual[key][1] == count
+
+
+@pytest.fixture(scope='module')
+def data():
+    return data_loader.get_invoice_data(), data_loader.get_customer_data()
+
+
+@pytest.mark.parametrize('group_by,filters', [
+    (['aging_bucket'], {}),
+    (['state', 'aging_bucket'], {'industry_sector': ['IT Services']}),
+    (['sales_rep_id'], {'customer_category': ['Large'], 'aging_bucket': ['90+ Days']}),
+    (['customer_id', 'aging_bucket'], {'state': ['Delhi']}),
+])
+def test_cube_matches_groupby(data, group_by, filters):
+    invoices, customers = data
+    frame = open_invoices(invoices, customers)
+    for dim, labels in filters.items():
+        frame = frame[frame[dim].astype(str).isin(labels)]
+    cube = ARCube(invoices, customers, as_of=AS_OF)
+    assert_same(cube.query(group_by, filters), expected(frame, group_by), group_by)
+
+
+def test_sync_and_advance_only_move_changes(data):
+    invoices, customers = data
+    cube = ARCube(invoices.iloc[:-50], customers, as_of=AS_OF)
+
+    updated = invoices.copy()
+    open_ids = updated.index[updated['balance_amount'] > 0][:10]
+    updated.loc[open_ids, 'balance_amount'] = 0.0  # ten invoices get paid
+    assert cube.sync_invoices(updated) == 60
+    assert cube.advance('2025-06-15') > 0
+
+    group_by = ['sales_rep_id', 'aging_bucket']
+    fresh = ARCube(updated, customers, as_of='2025-06-15')
+    assert_same(cube.query(group_by), expected(open_invoices(updated, customers, '2025-06-15'), group_by), group_by)
+    assert cube.totals() == pytest.approx(fresh.totals())
+
+
+def test_customer_cells_are_stored_sparsely(data):
+    invoices, customers = data
+    cube = ARCube(invoices, customers, as_of=AS_OF)
+    frame = open_invoices(invoices, customers)
+    assert len(cube._customer_cells.keys) == len(frame.drop_duplicates(['customer_id', 'sales_rep_id', 'aging_bucket']))
+
+    customer_id = frame['customer_id'].iloc[0]
+    paid = invoices.copy()
+    paid.loc[paid['customer_id'] == customer_id, 'balance_amount'] = 0.0
+    cube.sync_invoices(paid)
+    assert cube.totals({'customer_id': [customer_id]}) == (0.0, 0)
+    assert len(cube._customer_cells.keys) == len(
+        open_invoices(paid, customers).drop_duplicates(['customer_id', 'sales_rep_id', 'aging_bucket']))
+
+
+def test_unknown_dimension_is_rejected(data):
+    cube = ARCube(*data, as_of=AS_OF)
+    with pytest.raises(ValueError):
+        cube.query(['region'])
+    with pytest.raises(ValueError):
+        cube.query(['customer_id', 'state'])
+
+
+def test_cube_endpoint(api_request):
+    request = api_request('get', '/api/reports/cube/', {'group_by': 'state', 'customer_category': 'Large'})
+    response = ReportViewSet.as_view({'get': 'cube'})(request)
+    response.render()
+    assert response.status_code == 200
+    body = json.loads(response.content)
+    assert body['filters'] == {'customer_category': ['Large']}
+    assert sum(cell['count'] for cell in body['cells']) == body['total_count']
+    assert all(set(cell) == {'state', 'balance', 'count'} for cell in body['cells'])
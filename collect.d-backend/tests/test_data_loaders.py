@@ -0,0 +1,51 @@
+import os
+import pytest
+import pandas as pd
+from app.data_loaders import DataLoader, DatasetCache
+
+
+def write_csv(path, rows):
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+def test_load_csv_is_cached_until_file_changes(tmp_path):
+    write_csv(tmp_path / 'ledger.csv', {'invoice_id': ['INV1', 'INV2'], 'total_amount': [10.0, 20.0]})
+    loader = DataLoader(data_dir=str(tmp_path), cache=DatasetCache())
+
+    first = loader.load_csv('ledger.csv')
+    second = loader.load_csv('ledger.csv')
+    assert first is second
+    assert loader.cache_stats()['hits'] == 1
+    assert loader.cache_stats()['misses'] == 1
+
+    write_csv(tmp_path / 'ledger.csv', {'invoice_id': ['INV1', 'INV2', 'INV3'], 'total_amount': [10.0, 20.0, 5.0]})
+    # Force a distinct mtime even on coarse-grained filesystems
+    stat = os.stat(tmp_path / 'ledger.csv')
+    os.utime(tmp_path / 'ledger.csv', ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    third = loader.load_csv('ledger.csv')
+    assert len(third) == 3
+    assert loader.cache_stats()['misses'] == 2
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    for name in ('a.csv', 'b.csv', 'c.csv'):
+        write_csv(tmp_path / name, {'value': list(range(1000))})
+    probe = pd.read_csv(tmp_path / 'a.csv')
+    budget = int(probe.memory_usage(deep=True).sum() * 2.5)
+    loader = DataLoader(data_dir=str(tmp_path), cache=DatasetCache(max_bytes=budget))
+
+    loader.load_csv('a.csv')
+    loader.load_csv('b.csv')
+    loader.load_csv('a.csv')  # a becomes most recently used
+    loader.load_csv('c.csv')  # evicts b
+
+    stats = loader.cache_stats()
+    assert set(stats['datasets']) == {'a.csv', 'c.csv'}
+    assert stats['evictions'] == 1
+    assert stats['current_bytes'] <= budget
+
+
+def test_missing_file_raises(tmp_path):
+    loader = DataLoader(data_dir=str(tmp_path), cache=DatasetCache())
+    with pytest.raises(FileNotFoundError):
+        loader.load_csv('missing.csv')
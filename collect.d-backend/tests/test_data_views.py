@@ -0,0 +1,145 @@
+import io
+import json
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from app.data_loaders import data_loader
+from app import streaming
+from app.views import InvoiceDataView, CustomerDataView, GLEntriesView, CustomerInteractionsView, RiskScoresView
+
+
+@pytest.fixture
+def call(api_request):
+    """Call a dataset view with GET params and request headers; the response is not rendered."""
+    def call(view_class, params=None, **headers):
+        return view_class.as_view()(api_request('get', '/api/data/', params or {}, **headers))
+    return call
+
+
+@pytest.fixture
+def get(call):
+    def get(view_class, params=None):
+        response = call(view_class, params)
+        response.render()
+        return response
+    return get
+
+
+def test_unpaginated_response_is_full_list_with_total_header(get):
+    response = get(CustomerDataView)
+    assert response.status_code == 200
+    rows = json.loads(response.content)
+    assert len(rows) == len(data_loader.get_customer_data())
+    assert response['X-Total-Count'] == str(len(rows))
+
+
+def test_paginated_filtered_response(get):
+    invoices = data_loader.get_invoice_data()
+    expected = invoices[invoices['payment_status'] == 'Overdue']
+    response = get(InvoiceDataView, {'payment_status': 'Overdue', 'ordering': 'due_date', 'page': 1, 'page_size': 5})
+    assert response.status_code == 200
+    body = json.loads(response.content)
+    assert body['count'] == len(expected)
+    assert len(body['results']) == min(5, len(expected))
+    due_dates = [row['due_date'] for row in body['results']]
+    assert due_dates == sorted(due_dates)
+
+
+def test_percent_columns_filter_numerically_and_serialize_as_strings(get):
+    response = get(RiskScoresView, {'overdue_rate__gt': '50', 'fields': 'customer_id,overdue_rate,credit_utilization'})
+    assert response.status_code == 200
+    rows = json.loads(response.content)
+    assert rows and all(row['overdue_rate'].endswith('%') for row in rows)
+    assert all(float(row['overdue_rate'].rstrip('%')) > 50 for row in rows)
+    first = pd.read_csv(os.path.join(data_loader.data_dir, 'risk_scores.csv'), dtype=str).iloc[0]
+    row = json.loads(get(RiskScoresView, {'customer_id': first['customer_id']}).content)[0]
+    assert row['credit_utilization'] == first['credit_utilization']
+
+
+def test_unknown_filter_column_is_rejected(get):
+    response = get(InvoiceDataView, {'no_such_column': '1'})
+    assert response.status_code == 400
+
+
+def test_fields_projection(get):
+    response = get(CustomerDataView, {'fields': 'customer_id,customer_name', 'page_size': 3})
+    assert response.status_code == 200
+    results = json.loads(response.content)['results']
+    assert all(set(row) == {'customer_id', 'customer_name'} for row in results)
+
+
+def test_ndjson_streams_every_filtered_row(call):
+    gl = data_loader.get_gl_entries()
+    response = call(GLEntriesView, {'format': 'ndjson'})
+    assert response.status_code == 200
+    assert response.streaming
+    lines = b''.join(response.streaming_content).decode().splitlines()
+    assert len(lines) == len(gl)
+    assert set(json.loads(lines[0])) == set(gl.columns)
+
+
+def test_ndjson_amounts_render_without_float_noise():
+    frame = pd.DataFrame({'outstanding_amount': [5307713.67, np.nan]})
+    assert b''.join(streaming.iter_ndjson(frame)) == b'{"outstanding_amount":5307713.67}\n{"outstanding_amount":null}\n'
+
+
+def test_csv_stream_round_trips(monkeypatch, call):
+    monkeypatch.setattr(streaming, 'STREAM_CHUNK_ROWS', 7)
+    interactions = data_loader.get_customer_interactions()
+    response = call(CustomerInteractionsView, {'format': 'csv', 'fields': 'customer_id'})
+    assert response['Content-Type'].startswith('text/csv')
+    body = b''.join(response.streaming_content).decode()
+    parsed = pd.read_csv(io.StringIO(body))
+    assert list(parsed.columns) == ['customer_id']
+    assert len(parsed) == len(interactions)
+
+
+def test_stream_errors_are_not_streamed(get):
+    response = get(GLEntriesView, {'format': 'ndjson', 'no_such_column': '1'})
+    assert response.status_code == 400
+    assert json.loads(response.content)['error']
+
+
+def test_etag_revalidation_skips_loading(monkeypatch, call, get):
+    first = get(InvoiceDataView, {'payment_status': 'Overdue'})
+    etag = first['ETag']
+    assert etag.startswith('"') and first['Last-Modified']
+
+    def fail():
+        raise AssertionError("dataset loaded for a 304")
+    monkeypatch.setattr(data_loader, 'get_invoice_data', fail)
+    response = call(InvoiceDataView, {'payment_status': 'Overdue'}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response['ETag'] == etag
+
+    response = call(
+        InvoiceDataView, {'payment_status': 'Overdue'}, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+    assert response.status_code == 304
+
+
+def test_etag_depends_on_query_and_format(call, get):
+    plain = get(InvoiceDataView, {'payment_status': 'Overdue'})['ETag']
+    assert get(InvoiceDataView, {'payment_status': 'Paid'})['ETag'] != plain
+    csv_view = call(InvoiceDataView, {'payment_status': 'Overdue', 'format': 'csv'})
+    assert csv_view['ETag'] != plain
+    assert get(InvoiceDataView, {'payment_status': 'Overdue'})['ETag'] == plain
+
+
+def test_summary_endpoints_revalidate_on_snapshot_generation(monkeypatch, api_request):
+    from app import services
+    from app.views import CollectionViewSet
+    view = CollectionViewSet.as_view({'get': 'workload'})
+
+    def call(**headers):
+        return view(api_request('get', '/api/collections/workload/', {'diff_limit': 5}, **headers))
+
+    etag = call()['ETag']
+    real = services.get_workload_logic
+    monkeypatch.setattr(services, 'get_workload_logic', lambda *args: pytest.fail("summary rebuilt for a 304"))
+    assert call(HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    monkeypatch.setattr(services, 'get_workload_logic', real)
+    services.datasets.update('collection_cases', lambda df: df.copy())
+    response = call(HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200 and response['ETag'] != etag
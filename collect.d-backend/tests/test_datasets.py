@@ -0,0 +1,113 @@
+import threading
+import pandas as pd
+from app.datasets import DatasetManager, ReadWriteLock
+
+
+def test_datasets_load_lazily_once():
+    calls = []
+
+    def load_invoices():
+        calls.append(1)
+        return pd.DataFrame({'invoice_id': ['INV1']})
+
+    manager = DatasetManager({'invoices': load_invoices})
+    assert not calls
+    assert manager.snapshot()['invoices'].shape == (1, 1)
+    manager.snapshot()
+    assert len(calls) == 1
+    assert manager.generation == 1
+
+
+def test_reload_keeps_old_snapshot_consistent():
+    version = {'n': 1}
+    manager = DatasetManager({
+        'customers': lambda: pd.DataFrame({'v': [version['n']]}),
+        'invoices': lambda: pd.DataFrame({'v': [version['n']]}),
+    })
+    before = manager.snapshot()
+    version['n'] = 2
+    assert manager.reload() is True
+    after = manager.snapshot()
+
+    assert before['customers']['v'][0] == before['invoices']['v'][0] == 1
+    assert after['customers']['v'][0] == after['invoices']['v'][0] == 2
+    assert after.generation == before.generation + 1
+
+
+def test_failed_reload_keeps_previous_snapshot():
+    state = {'fail': False}
+
+    def load():
+        if state['fail']:
+            raise FileNotFoundError('invoices.csv')
+        return pd.DataFrame({'v': [1]})
+
+    manager = DatasetManager({'invoices': load})
+    first = manager.snapshot()
+    state['fail'] = True
+    assert manager.reload() is False
+    assert manager.snapshot() is first
+
+
+def test_update_publishes_new_frame_without_mutating_old():
+    manager = DatasetManager({'interactions': lambda: pd.DataFrame({'id': ['INT1']})})
+    before = manager.snapshot()
+    manager.update('interactions', lambda df: pd.concat([df, pd.DataFrame({'id': ['INT2']})], ignore_index=True))
+    assert len(before['interactions']) == 1
+    assert len(manager.snapshot()['interactions']) == 2
+
+
+def test_writer_waits_for_readers():
+    lock = ReadWriteLock()
+    events = []
+    lock.acquire_read()
+
+    def writer():
+        with lock.write_locked():
+            events.append('write')
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    thread.join(timeout=0.1)
+    assert events == []
+    events.append('read-done')
+    lock.release_read()
+    thread.join(timeout=1)
+    assert events == ['read-done', 'write']
+
+
+def test_derived_values_are_memoized_per_snapshot():
+    manager = DatasetManager({'a': lambda: pd.DataFrame({'x': [1, 2, 3]})})
+    calls = []
+
+    def total(snapshot):
+        calls.append(snapshot.generation)
+        return snapshot['a']['x'].sum()
+
+    first = manager.snapshot()
+    assert first.derive('total', total) == 6
+    assert first.derive('total', total) == 6
+    assert calls == [1]
+
+    second = manager.update('a', lambda df: df.assign(x=df['x'] * 10))
+    assert second.derive('total', total) == 60
+    assert calls == [1, 2]
+
+
+def test_watched_dataset_reloads_when_its_source_changes():
+    source = {'version': 1}
+    loads = []
+
+    def load():
+        loads.append(source['version'])
+        return pd.DataFrame({'v': [source['version']]})
+
+    manager = DatasetManager({'invoices': load, 'customers': lambda: pd.DataFrame({'c': [1]})},
+                             versions={'invoices': lambda: source['version']})
+    first = manager.snapshot()
+    assert manager.snapshot() is first
+    source['version'] = 2
+    second = manager.snapshot()
+    assert second['invoices']['v'][0] == 2 and second.generation == first.generation + 1
+    assert second['customers'] is first['customers']
+    assert manager.snapshot() is second and loads == [1, 2]
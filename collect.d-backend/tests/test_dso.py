@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.data_loaders import data_loader
+from app.dso import DSOEngine
+
+
+def toy_invoices():
+    return pd.DataFrame({
+        'invoice_id': ['I1', 'I2', 'I3'],
+        'customer_id': ['C1', 'C2', 'C1'],
+        'sales_rep_id': ['R1', 'R1', 'R2'],
+        'invoice_date': pd.to_datetime(['2024-01-01', '2024-01-10', '2024-01-20']),
+        'due_date': pd.to_datetime(['2024-01-31', '2024-02-09', '2024-02-19']),
+        'payment_date': pd.to_datetime(['2024-01-15', None, None]),
+        'payment_status': ['Paid', 'Unpaid', 'Unpaid'],
+        'invoice_amount': [310.0, 620.0, 310.0],
+        'total_amount': [310.0, 620.0, 310.0],
+        'balance_amount': [0.0, 620.0, 310.0],
+    })
+
+
+def test_matches_dso_analytics():
+    expected = data_loader.get_dso_analytics()
+    engine = DSOEngine(data_loader.get_invoice_data(), customers=data_loader.get_customer_data())
+    result = engine.dso(freq='M', start=expected['month'].iloc[0], end=expected['month'].iloc[-1])
+    merged = result.merge(expected, left_on='period', right_on='month')
+    assert len(merged) == len(expected)
+    assert np.allclose(merged['sales'], merged['total_revenue'])
+    assert np.allclose(merged['ar'], merged['total_ar'])
+    assert (merged['dso_x'].round() == merged['dso_y']).all()
+
+
+def test_standard_and_countback_by_group():
+    engine = DSOEngine(toy_invoices())
+    january = engine.dso(freq='M', start='2024-01', end='2024-01')
+    # AR 930 on January sales of 1240 over 31 days
+    assert january['dso'].iloc[0] == pytest.approx(930 * 31 / 1240)
+    countback = engine.dso(freq='M', method='countback', start='2024-01', end='2024-01')
+    # Back from Jan 31: I3 (310) covers Jan 20-31, I2 (620) covers the rest
+    assert countback['dso'].iloc[0] == pytest.approx(21 + 1.0)
+
+    by_rep = engine.dso(freq='M', by='sales_rep_id', start='2024-01', end='2024-01').set_index('sales_rep_id')
+    assert by_rep.loc['R1', 'ar'] == 620 and by_rep.loc['R2', 'ar'] == 310
+    assert by_rep['sales'].sum() == january['sales'].iloc[0]
+
+
+def test_sync_rebooks_only_changes():
+    invoices = toy_invoices()
+    engine = DSOEngine(invoices.iloc[:2])
+    engine.dso(by='customer_id')  # build a grouped ledger so it is kept up to date too
+
+    updated = invoices.copy()
+    updated.loc[1, ['payment_status', 'balance_amount']] = ['Paid', 0.0]
+    updated.loc[1, 'payment_date'] = pd.Timestamp('2024-02-05')
+    assert engine.sync_invoices(updated) == 2  # I2 paid, I3 new
+    for by in (None, 'customer_id'):
+        fresh = DSOEngine(updated).dso(freq='W', by=by, start='2024-01', end='2024-03')
+        pd.testing.assert_frame_equal(engine.dso(freq='W', by=by, start='2024-01', end='2024-03'), fresh)
+
+
+def test_ledger_basis_uses_payments():
+    invoices = toy_invoices()
+    payments = pd.DataFrame({
+        'invoice_id': ['I1', 'I2'],
+        'payment_date': pd.to_datetime(['2024-01-15', '2024-02-20']),
+        'payment_amount': [310.0, 200.0],
+    })
+    engine = DSOEngine(invoices, payments=payments.iloc[:1], basis='ledger')
+    engine.add_payments(payments.iloc[1:])
+    february = engine.dso(freq='M', start='2024-02', end='2024-02')
+    assert february['ar'].iloc[0] == 620 + 310 - 200
+
+
+def test_grouped_ledger_stores_only_days_with_movements():
+    engine = DSOEngine(toy_invoices())
+    engine.dso(by='customer_id')
+    ledger = engine._ledgers['customer_id']
+    # C1: Jan 1 (I1 billed), Jan 15 (I1 paid), Jan 20 (I3 billed); C2: Jan 10
+    assert len(ledger.keys) == 4
+    assert ledger.start == pd.Timestamp('2024-01-01') and ledger.end == pd.Timestamp('2024-01-20')
+    june = engine.dso(freq='M', by='customer_id', start='2024-06', end='2024-06').set_index('customer_id')
+    assert june.loc['C1', 'ar'] == 310 and june.loc['C2', 'ar'] == 620
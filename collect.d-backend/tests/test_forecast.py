@@ -0,0 +1,113 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from app import services
+from app.forecast import LatenessProfile, forecast_collections, plan_flows
+from app.views import ReportViewSet
+
+AS_OF = pd.Timestamp('2025-04-20')
+
+
+def make_book():
+    invoices = pd.DataFrame({
+        'invoice_id': ['OLD1', 'OLD2', 'OLD3', 'INV1', 'INV2', 'INV3'],
+        'customer_id': ['C1', 'C1', 'C1', 'C1', 'C2', 'C3'],
+        'due_date': pd.to_datetime(['2025-01-01', '2025-02-01', '2025-03-01', '2025-04-25', '2025-04-05', '2025-04-01']),
+        'balance_amount': [0.0, 0.0, 0.0, 1000.0, 500.0, 900.0],
+        'payment_status': ['Paid', 'Paid', 'Paid', 'Unpaid', 'Overdue', 'Overdue'],
+    })
+    # C1 always pays exactly 10 days late
+    payments = pd.DataFrame({
+        'invoice_id': ['OLD1', 'OLD2', 'OLD3'],
+        'customer_id': ['C1', 'C1', 'C1'],
+        'payment_date': pd.to_datetime(['2025-01-11', '2025-02-11', '2025-03-11']),
+    })
+    plans = pd.DataFrame({
+        'invoice_id': ['INV3'],
+        'customer_id': ['C3'],
+        'installments': [3],
+        'installments_paid': [1],
+        'installment_amount': [400.0],
+        'remaining_balance': [700.0],
+        'status': ['Active'],
+        'next_installment_date': pd.to_datetime(['2025-05-31']),
+    })
+    return invoices, payments, plans
+
+
+def test_plan_installments_follow_schedule():
+    _, _, plans = make_book()
+    flows = plan_flows(plans, AS_OF)
+    assert list(flows['amount']) == [400.0, 300.0]
+    # May 31 -> June 30 (clipped to month end)
+    assert list(flows['day']) == [41, 71]
+
+
+def test_lateness_shifts_receipts():
+    invoices, payments, plans = make_book()
+    profile = LatenessProfile(payments, invoices)
+    assert profile.expected_days_late('C1') == pytest.approx((3 * 10 + 10 * 10) / 13)
+    assert profile.expected_days_late('C-new') == pytest.approx(10)
+
+    periods, summary = forecast_collections(invoices, plans, payments, AS_OF, horizon=120)
+    by_day = periods.set_index('period')
+    # C1 shrinks towards a book that is all C1, so INV1 lands 10 days after its due date
+    assert by_day.at[pd.Timestamp('2025-05-05'), 'invoice_amount'] == pytest.approx(1000.0)
+    assert by_day['plan_amount'].sum() == pytest.approx(700.0)
+    # INV2 is 15 days overdue and nobody pays that late: not expected
+    assert summary['not_expected'] == pytest.approx(500.0)
+    assert summary['open_amount'] == pytest.approx(2200.0)  # INV3 counts through its plan's remaining 700
+    total = summary['expected_within_horizon'] + summary['expected_after_horizon'] + summary['not_expected']
+    assert total == pytest.approx(summary['open_amount'])
+
+
+def test_weekly_totals_match_daily():
+    invoices, payments, plans = make_book()
+    daily, _ = forecast_collections(invoices, plans, payments, AS_OF, horizon=70, freq='D')
+    weekly, _ = forecast_collections(invoices, plans, payments, AS_OF, horizon=70, freq='W')
+    assert weekly['expected_amount'].sum() == pytest.approx(daily['expected_amount'].sum())
+    assert (weekly['period'].dt.dayofweek == 0).all()
+    with pytest.raises(ValueError):
+        forecast_collections(invoices, plans, payments, AS_OF, freq='M')
+
+
+def test_forecast_cached_per_generation():
+    first = services.get_forecast(AS_OF, 30, 'W')
+    assert services.get_forecast(AS_OF, 30, 'W') is first
+    summary = first[1]
+    assert np.isclose(summary['expected_within_horizon'] + summary['expected_after_horizon'] + summary['not_expected'],
+                      summary['open_amount'], atol=1.0)
+
+
+def test_forecast_memo_is_bounded(monkeypatch):
+    monkeypatch.setattr(services, 'FORECAST_MEMO_SIZE', 2)
+    snapshot = services.datasets.snapshot()
+    first = services.get_forecast('2025-01-01', 7, 'D', snapshot=snapshot)
+    services.get_forecast('2025-01-02', 7, 'D', snapshot=snapshot)
+    assert services.get_forecast('2025-01-01', 7, 'D', snapshot=snapshot) is first  # most recently used again
+    services.get_forecast('2025-01-03', 7, 'D', snapshot=snapshot)
+    assert len([key for key in snapshot._derived if key[0] == 'forecast']) == 2
+    assert services.get_forecast('2025-01-01', 7, 'D', snapshot=snapshot) is first
+
+
+def test_forecast_endpoint(api_request):
+    view = ReportViewSet.as_view({'get': 'forecast'})
+    request = api_request('get', '/api/reports/forecast/', {'freq': 'w', 'horizon': 28, 'as_of': '2025-04-20'})
+    response = view(request)
+    response.render()
+    assert response.status_code == 200
+    body = json.loads(response.content)
+    assert body['freq'] == 'W' and body['periods'][0]['period'] == '2025-04-14'
+    assert len(body['periods']) == 5
+
+    bad = api_request('get', '/api/reports/forecast/', {'horizon': 0})
+    assert view(bad).status_code == 400
+
+    for as_of in ('NaT', 'not-a-date'):
+        bad = api_request('get', '/api/reports/forecast/', {'as_of': as_of})
+        assert view(bad).status_code == 400
+    aware = api_request('get', '/api/reports/forecast/', {'as_of': '2025-04-20T23:30:00+05:30', 'horizon': 7})
+    response = view(aware)
+    response.render()
+    assert response.status_code == 200 and json.loads(response.content)['as_of'] == '2025-04-20'
@@ -0,0 +1,60 @@
+import pytest
+import pandas as pd
+from app.query import apply_query, QueryError
+
+
+@pytest.fixture
+def invoices():
+    return pd.DataFrame({
+        'invoice_id': ['INV1', 'INV2', 'INV3', 'INV4'],
+        'customer_id': ['C1', 'C2', 'C1', 'C3'],
+        'payment_status': pd.Categorical(['Overdue', 'Paid', 'Overdue', 'Partial']),
+        'total_amount': [100.0, 250.0, 50.0, 75.0],
+        'due_date': pd.to_datetime(['2025-01-10', '2025-02-01', '2025-03-01', None]),
+    })
+
+
+def test_filters_combine_as_vectorized_masks(invoices):
+    rows, total, page_info = apply_query(invoices, {'customer_id': 'C1', 'due_date__lt': '2025-02-15'})
+    assert rows['invoice_id'].tolist() == ['INV1']
+    assert total == 1
+    assert page_info is None
+
+    rows, _, _ = apply_query(invoices, {'payment_status__in': 'Paid,Partial', 'total_amount__gte': '80'})
+    assert rows['invoice_id'].tolist() == ['INV2']
+
+    rows, _, _ = apply_query(invoices, {'due_date__isnull': 'true'})
+    assert rows['invoice_id'].tolist() == ['INV4']
+
+
+def test_ordering_and_pagination(invoices):
+    rows, total, page_info = apply_query(invoices, {'ordering': '-total_amount', 'page': '2', 'page_size': '2'})
+    assert rows['invoice_id'].tolist() == ['INV4', 'INV3']
+    assert total == 4
+    assert page_info == {'page': 2, 'page_size': 2, 'num_pages': 2}
+
+
+@pytest.mark.parametrize('params', [
+    {'unknown_column': 'x'},
+    {'total_amount__between': '1'},
+    {'ordering': 'nope'},
+    {'page': '0'},
+    {'total_amount__gt': 'abc'},
+])
+def test_invalid_parameters_raise(invoices, params):
+    with pytest.raises(QueryError):
+        apply_query(invoices, params)
+
+
+def test_fields_and_exclude_project_after_filtering(invoices):
+    rows, total, _ = apply_query(invoices, {'customer_id': 'C1', 'fields': 'invoice_id,total_amount'})
+    assert list(rows.columns) == ['invoice_id', 'total_amount']
+    assert total == 2
+
+    rows, _, _ = apply_query(invoices, {'exclude': 'due_date,payment_status'})
+    assert list(rows.columns) == ['invoice_id', 'customer_id', 'total_amount']
+
+
+def test_unknown_projection_column_is_rejected(invoices):
+    with pytest.raises(QueryError):
+        apply_query(invoices, {'fields': 'invoice_id,bogus'})
@@ -0,0 +1,87 @@
+import json
+import os
+import pandas as pd
+from config import DATA_DIR
+from app.data_loaders import data_loader
+from app.reconciliation import gl_ar_postings, read_gl_chunks, reconcile
+from app.views import ReportViewSet
+
+GL_FILE = os.path.join(DATA_DIR, 'gl_entries.csv')
+
+
+def make_books():
+    invoices = pd.DataFrame({
+        'invoice_id': ['INV1', 'INV2', 'INV3', 'INV4'],
+        'customer_id': ['C1', 'C1', 'C2', 'C2'],
+        'total_amount': [100.0, 200.0, 300.0, 400.0],
+        'balance_amount': [0.0, 200.0, 300.0, 400.0],
+    })
+    payments = pd.DataFrame({
+        'payment_id': ['PAY1', 'PAY2'],
+        'customer_id': ['C1', 'C2'],
+        'payment_amount': [100.0, 50.0],
+        'status': ['Processed', 'Failed'],
+    })
+    gl = pd.DataFrame({
+        'document_type': ['Invoice', 'Invoice', 'Invoice', 'Invoice', 'Invoice', 'Payment', 'Payment', 'Invoice'],
+        'document_number': ['INV1', 'INV1', 'INV2', 'INV3', 'INV3', 'PAY1', 'PAY1', 'INV9'],
+        'account_code': [120000, 400000, 120000, 120000, 400000, 110000, 120000, 120000],
+        'debit': [100.0, 0.0, 200.0, 299.0, 0.0, 100.0, 0.0, 75.0],
+        'credit': [0.0, 100.0, 0.0, 0.0, 299.0, 0.0, 100.0, 0.0],
+        'customer_id': ['C1', 'C1', 'C2', 'C2', 'C2', 'C1', 'C1', 'C3'],
+    })
+    return gl, invoices, payments
+
+
+def test_document_and_customer_breaks():
+    gl, invoices, payments = make_books()
+    result = reconcile(gl, invoices, payments)
+    breaks = result['documents'].set_index('document_number')
+    assert breaks['break_type'].to_dict() == {
+        'INV2': 'customer_mismatch', 'INV3': 'amount_mismatch', 'INV4': 'missing_posting', 'INV9': 'orphan_posting'}
+    assert breaks.at['INV3', 'difference'] == -1.0
+    assert breaks.at['INV2', 'gl_customer_id'] == 'C2'
+    # The failed payment was never expected in the GL
+    assert 'PAY2' not in breaks.index
+
+    customers = result['customers'].set_index('customer_id')
+    assert set(customers.index) == {'C1', 'C2', 'C3'}
+    assert customers.at['C1', 'gl_balance'] == 0 and customers.at['C1', 'subledger_balance'] == 200
+    assert result['summary']['document_breaks']['amount_mismatch'] == 1
+
+
+def test_tolerance_rules():
+    gl, invoices, payments = make_books()
+    assert 'INV3' not in set(reconcile(gl, invoices, payments, abs_tol=1.0)['documents']['document_number'])
+    assert 'INV3' not in set(reconcile(gl, invoices, payments, abs_tol=0, rel_tol=0.005)['documents']['document_number'])
+    assert 'INV3' in set(reconcile(gl, invoices, payments, abs_tol=0.5)['documents']['document_number'])
+
+
+def test_chunked_partial_aggregation_matches_single_pass():
+    whole, _ = gl_ar_postings(data_loader.get_gl_entries())
+    chunked, read = gl_ar_postings(read_gl_chunks(GL_FILE, chunk_rows=997))
+    assert read['gl_chunks'] > 1 and read['gl_lines'] == len(data_loader.get_gl_entries())
+    keys = ['document_type', 'document_number', 'customer_id']
+    whole = whole.astype({key: object for key in keys}).sort_values(keys).reset_index(drop=True)
+    chunked = chunked.sort_values(keys).reset_index(drop=True)
+    pd.testing.assert_frame_equal(whole[keys + ['lines']], chunked[keys + ['lines']], check_dtype=False)
+    assert (whole['net'] - chunked['net']).abs().max() < 1e-6
+
+
+def test_generated_books_reconcile():
+    result = reconcile(read_gl_chunks(GL_FILE, 5000), data_loader.get_invoice_data(), data_loader.get_payment_data())
+    assert result['documents'].empty and result['customers'].empty
+    assert abs(result['summary']['difference']) < 1.0
+
+
+def test_reconciliation_endpoint(api_request):
+    view = ReportViewSet.as_view({'get': 'reconciliation'})
+    request = api_request('get', '/api/reports/reconciliation/', {'tolerance': 0.01, 'limit': 5})
+    response = view(request)
+    response.render()
+    assert response.status_code == 200
+    body = json.loads(response.content)
+    assert body['summary']['gl_lines'] > 0 and body['documents'] == []
+
+    bad = api_request('get', '/api/reports/reconciliation/', {'tolerance': 'x'})
+    assert view(bad).status_code == 400
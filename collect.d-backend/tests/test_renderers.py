@@ -0,0 +1,38 @@
+import json
+import numpy as np
+import pandas as pd
+from app.renderers import DataFrameJSONRenderer
+
+
+def sample_frame():
+    return pd.DataFrame({
+        'invoice_id': ['INV-1', 'INV-2'],
+        'status': pd.Categorical(['Open', None]),
+        'amount': [1250.5, np.nan],
+        'due_date': pd.to_datetime(['2024-03-01', None]),
+        'lines': np.array([3, 4], dtype='int32'),
+    })
+
+
+def test_frame_renders_like_record_dicts():
+    rendered = json.loads(DataFrameJSONRenderer().render(sample_frame()))
+    assert rendered == [
+        {'invoice_id': 'INV-1', 'status': 'Open', 'amount': 1250.5, 'due_date': '2024-03-01', 'lines': 3},
+        {'invoice_id': 'INV-2', 'status': None, 'amount': None, 'due_date': None, 'lines': 4},
+    ]
+
+
+def test_amounts_render_without_float_noise():
+    frame = pd.DataFrame({'outstanding_amount': [5307713.67, 143854.67], 'rate': [17.78, 0.1234]})
+    body = DataFrameJSONRenderer().render(frame)
+    assert body == b'[{"outstanding_amount":5307713.67,"rate":17.78},{"outstanding_amount":143854.67,"rate":0.1234}]'
+    envelope = DataFrameJSONRenderer().render({'summary': {'flagged': 1, 'ok': [1, 2]}, 'rows': frame.iloc[:0]})
+    assert envelope == b'{"summary":{"flagged":1,"ok":[1,2]},"rows":[]}'
+
+
+def test_envelope_with_frame_and_plain_data():
+    renderer = DataFrameJSONRenderer()
+    envelope = json.loads(renderer.render({'count': 2, 'page': 1, 'results': sample_frame()}))
+    assert envelope['count'] == 2
+    assert [row['invoice_id'] for row in envelope['results']] == ['INV-1', 'INV-2']
+    assert json.loads(renderer.render({'error': 'boom'})) == {'error': 'boom'}
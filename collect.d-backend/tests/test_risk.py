@@ -0,0 +1,106 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from app import risk
+from app.data_loaders import data_loader
+from app.risk import RiskScorer, score_book, score_customer, score_customers
+from app.views import RiskViewSet
+
+AS_OF = '2025-04-15'
+
+
+@pytest.fixture(scope='module')
+def sources():
+    return (data_loader.get_customer_data(), data_loader.get_invoice_data(),
+            data_loader.get_disputes(), data_loader.get_collection_cases(), data_loader.get_payment_data())
+
+
+def test_scores_match_generated_file(sources):
+    scores = score_customers(*sources, as_of=AS_OF)
+    expected = data_loader.get_risk_scores()
+    assert list(scores['customer_id']) == list(expected['customer_id'].astype(str))
+    for column in ('risk_score', 'credit_limit', 'outstanding_amount', 'credit_utilization',
+                   'overdue_rate', 'avg_days_late', 'total_invoices', 'overdue_invoices'):
+        np.testing.assert_allclose(scores[column], expected[column], atol=1e-6, err_msg=column)
+    for column in ('risk_category', 'has_disputes', 'has_collection_history', 'recommended_action'):
+        assert list(scores[column]) == list(expected[column].astype(str)), column
+
+
+def test_process_pool_matches_in_process(sources, monkeypatch):
+    monkeypatch.setattr(risk, 'PARALLEL_MIN_CUSTOMERS', 1)
+    pd.testing.assert_frame_equal(score_book(*sources, as_of=AS_OF, workers=3),
+                                  score_customers(*sources, as_of=AS_OF))
+
+
+def test_sync_rescores_only_touched_customers(sources):
+    customers, invoices, disputes, cases, payments = sources
+    scorer = RiskScorer(*sources, as_of=AS_OF)
+    assert scorer.sync(*sources) == []
+
+    target = invoices['customer_id'].iloc[0]
+    changed = invoices.copy()
+    changed.loc[changed.index[0], 'payment_status'] = 'Overdue'
+    changed.loc[changed.index[0], 'balance_amount'] = 5_000_000.0
+    new_case = cases.iloc[[0]].assign(case_id='CASE-NEW', customer_id='CUST000002', status='Resolved')
+    touched = scorer.sync(customers, changed, disputes, pd.concat([cases, new_case], ignore_index=True), payments)
+
+    assert set(touched) == {target, 'CUST000002'}
+    full = score_customers(customers, changed, disputes, pd.concat([cases, new_case]), payments, as_of=AS_OF)
+    pd.testing.assert_frame_equal(scorer.scores.reset_index(drop=True), full)
+
+
+def test_days_late_follow_the_payments_received(sources):
+    customers, invoices, disputes, cases, payments = sources
+    scorer = RiskScorer(*sources, as_of=AS_OF)
+    paid = invoices[invoices['payment_status'] == 'Paid'].iloc[0]
+    before = scorer.scores.loc[paid['customer_id']]
+    # The invoice's last payment arrives 60 days after the date recorded on the invoice
+    late = payments.copy()
+    row = late.index[late['invoice_id'] == paid['invoice_id']][-1]
+    late.loc[row, 'payment_date'] = paid['payment_date'] + pd.Timedelta(days=60)
+
+    assert scorer.sync(customers, invoices, disputes, cases, late) == [paid['customer_id']]
+    after = scorer.scores.loc[paid['customer_id']]
+    assert after['avg_days_late'] > before['avg_days_late']
+    # Without payments the invoice's own payment_date is used
+    unchanged = score_customers(customers, invoices, disputes, cases, as_of=AS_OF).set_index('customer_id')
+    assert unchanged.loc[paid['customer_id'], 'avg_days_late'] == before['avg_days_late']
+
+
+def test_score_customer_fast_path_matches_batch(sources):
+    batch = score_customers(*sources, as_of=AS_OF).set_index('customer_id')
+    rows = {name: frame.groupby(frame['customer_id'].astype(object)).indices
+            for name, frame in zip(('customers', 'invoices', 'disputes', 'cases', 'payments'), sources)}
+    for customer_id in ('CUST000001', 'CUST000004'):
+        score = score_customer(customer_id, *sources, rows=rows, as_of=AS_OF)
+        assert score['risk_score'] == batch.loc[customer_id, 'risk_score']
+        assert score['avg_days_late'] == batch.loc[customer_id, 'avg_days_late']
+    assert score_customer('CUST-NONE', *sources, rows=rows) is None
+
+
+def test_recompute_endpoint_full_then_incremental(api_request):
+    recompute = RiskViewSet.as_view({'post': 'recompute'})
+    first = recompute(api_request('post', '/api/risk/recompute/', {'full': True, 'write': False}, format='json'))
+    first.render()
+    assert first.status_code == 200
+    body = json.loads(first.content)
+    assert body['mode'] == 'full' and body['scored_customers'] == body['total_customers'] > 0
+    assert body['written'] is False
+
+    second = recompute(api_request('post', '/api/risk/recompute/', {'write': False}, format='json'))
+    second.render()
+    body = json.loads(second.content)
+    assert body['mode'] == 'incremental' and body['scored_customers'] == 0
+
+
+def test_customer_risk_endpoint(api_request):
+    view = RiskViewSet.as_view({'get': 'retrieve'})
+    response = view(api_request('get', '/api/risk/CUST000001/'), pk='CUST000001')
+    response.render()
+    assert response.status_code == 200
+    body = json.loads(response.content)
+    assert body['customer_id'] == 'CUST000001' and 0 <= body['risk_score'] <= 100
+
+    missing = view(api_request('get', '/api/risk/CUST-NONE/'), pk='CUST-NONE')
+    assert missing.status_code == 404
@@ -0,0 +1,79 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from app import services
+from app.data_loaders import data_loader
+from app.roll_rates import ABSENT_CODE, PAID_CODE, AgingSnapshotStore, aging_state_codes, roll_rates
+from app.views import ReportViewSet
+
+
+def make_invoices():
+    return pd.DataFrame({
+        'invoice_id': ['INV1', 'INV2', 'INV3', 'INV4'],
+        'due_date': pd.to_datetime(['2025-01-20', '2025-01-05', '2024-12-01', '2025-01-31']),
+        'balance_amount': [100.0, 100.0, 100.0, 100.0],
+        'payment_status': ['Unpaid', 'Overdue', 'Overdue', 'Unpaid'],
+    })
+
+
+def test_transitions_between_recorded_days(tmp_path):
+    store = AgingSnapshotStore(str(tmp_path))
+    invoices = make_invoices()
+    store.record(invoices.iloc[:3], '2025-02-01')  # INV4 not raised yet
+    invoices.loc[invoices['invoice_id'] == 'INV2', ['balance_amount', 'payment_status']] = [0.0, 'Paid']
+    store.record(invoices, '2025-03-03')
+
+    counts, pairs = store.transitions('2025-02-01', '2025-03-03', step=30)
+    assert pairs == [(pd.Timestamp('2025-02-01'), pd.Timestamp('2025-03-03'))]
+    assert counts.at['1-30 Days', '31-60 Days'] == 1  # INV1: 12 -> 42 days past due
+    assert counts.at['1-30 Days', 'Paid'] == 1  # INV2 cured
+    assert counts.at['61-90 Days', '90+ Days'] == 1  # INV3: 62 -> 92
+    assert counts.to_numpy().sum() == 3  # INV4 was absent on the first day
+
+    rates = roll_rates(counts).set_index('from_bucket')
+    assert rates.at['1-30 Days', 'roll_rate'] == 0.5 and rates.at['1-30 Days', 'cure_rate'] == 0.5
+    # Older day files are padded for ids added later
+    assert list(store.load('2025-02-01', len(store.invoice_ids()))) == [1, 1, 3, ABSENT_CODE]
+
+
+def test_backfill_matches_historical_reconstruction(tmp_path):
+    invoices = data_loader.get_invoice_data()
+    store = AgingSnapshotStore(str(tmp_path))
+    assert store.backfill(invoices, '2025-01-01', '2025-01-10') == 10
+    positions = store.invoice_ids().get_indexer(invoices['invoice_id'].astype(object))
+    for day in ('2025-01-01', '2025-01-10'):
+        expected = aging_state_codes(invoices, day, historical=True)
+        assert np.array_equal(np.asarray(store.load(day))[positions], expected)
+    assert (expected == PAID_CODE).any() and (expected == ABSENT_CODE).any()
+
+
+def test_window_needs_two_snapshots(tmp_path):
+    store = AgingSnapshotStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.transitions()
+    store.record(make_invoices(), '2025-02-01')
+    with pytest.raises(ValueError):
+        store.transitions('2025-02-01', '2025-03-01')
+
+
+def test_roll_rates_endpoint(tmp_path, monkeypatch, api_request):
+    store = AgingSnapshotStore(str(tmp_path))
+    store.backfill(data_loader.get_invoice_data(), '2025-01-01', '2025-04-01')
+    monkeypatch.setattr(services, 'aging_snapshots', store)
+
+    view = ReportViewSet.as_view({'get': 'roll_rates'})
+    request = api_request('get', '/api/reports/roll-rates/', {'start': '2025-01-01', 'end': '2025-04-01', 'step': 30})
+    response = view(request)
+    response.render()
+    assert response.status_code == 200
+    body = json.loads(response.content)
+    assert len(body['pairs']) == 3
+    rates = {row['from_bucket']: row for row in body['roll_rates']}
+    assert 0 < rates['1-30 Days']['roll_rate'] < 1
+    for row in body['transition_rates']:
+        assert sum(v for k, v in row.items() if k != 'from_bucket') == pytest.approx(1, abs=1e-3) or \
+            all(v == 0 for k, v in row.items() if k != 'from_bucket')
+
+    bad = api_request('get', '/api/reports/roll-rates/', {'start': '2025-04-01', 'end': '2025-01-01'})
+    assert view(bad).status_code == 400
@@ -0,0 +1,47 @@
+import os
+import pytest
+import pandas as pd
+from config import DATA_DIR
+from app.schemas import DATASET_SCHEMAS, DatasetSchema, memory_report, parse_percent
+
+
+@pytest.mark.parametrize('filename', sorted(DATASET_SCHEMAS))
+def test_schema_columns_exist_and_parse(filename):
+    path = os.path.join(DATA_DIR, filename)
+    schema = DATASET_SCHEMAS[filename]
+    df = schema.parse(path)
+    assert set(schema.columns) <= set(df.columns)
+    for col in schema.categories:
+        assert isinstance(df[col].dtype, pd.CategoricalDtype)
+    for col in schema.dates:
+        assert df[col].dtype.kind == 'M'
+    for col in schema.percents:
+        assert df[col].dtype == 'float64'
+
+
+def test_overflow_column_rejoins_unquoted_commas(tmp_path):
+    path = tmp_path / 'orders.csv'
+    path.write_text('order_id,shipping_address,total_amount\nORD1,24, MG Road, Mumbai,10.5\n')
+    df = DatasetSchema('orders.csv', numeric=('total_amount',), overflow='shipping_address').parse(path)
+    assert list(df.columns) == ['order_id', 'shipping_address', 'total_amount']
+    assert df.loc[0, 'shipping_address'] == '24, MG Road, Mumbai'
+    assert df.loc[0, 'total_amount'] == 10.5
+
+
+def test_customer_master_keeps_customer_id_column():
+    df = DATASET_SCHEMAS['customer_master.csv'].parse(os.path.join(DATA_DIR, 'customer_master.csv'))
+    assert df['customer_id'].str.startswith('CUST').all()
+    assert df['credit_limit'].dtype.kind in 'if'
+
+
+def test_parse_percent():
+    parsed = parse_percent(pd.Series(['17.78%', '18%', None]))
+    assert parsed.iloc[0] == pytest.approx(17.78)
+    assert parsed.iloc[1] == 18.0
+    assert pd.isna(parsed.iloc[2])
+
+
+def test_memory_report_shrinks_datasets():
+    report = {row['dataset']: row for row in memory_report(DATA_DIR)}
+    assert set(report) == set(DATASET_SCHEMAS)
+    assert report['invoices.csv']['typed_bytes'] < report['invoices.csv']['raw_bytes']
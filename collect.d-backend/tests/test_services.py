@@ -1,4 +1,5 @@
 import os
+import subprocess
 import sys
 import pytest
 
@@ -16,6 +17,12 @@ from datetime import datetime, timedelta
 import app.services as services
 from app.utils import calculate_aging_dt
 
+def test_import_does_not_load_data():
+    # Datasets are loaded lazily on first access, not when the module is imported.
+    # Checked in a fresh interpreter so other tests that already used services don't matter.
+    code = "import app.services as s; raise SystemExit(1 if s.datasets.is_loaded() else 0)"
+    assert subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR).returncode == 0
+
 def test_calculate_aging_dt():
     # Test aging bucket calculation
     assert calculate_aging_dt(pd.NaT) == 'N/A'
@@ -66,4 +73,14 @@ def test_trigger_automated_reminders_logic():
 def test_report_summary_logic():
     summary = services.get_report_summary_logic()
     for key in ('aging_summary', 'total_overdue_amount', 'total_overdue_count', 'calculated_dso'):
-        assert key in summary
\ No newline at end of file
+        assert key in summary
+
+
+def test_overdue_view_is_memoized_until_datasets_change():
+    first = services.get_overdue_view(as_of='2024-06-30')
+    assert services.get_overdue_view(as_of='2024-06-30') is first
+    assert services.get_overdue_view(as_of='2024-07-31') is not first
+    assert set(first['payment_status'].unique()) <= {'Overdue'}
+    # Logging a communication publishes a new snapshot, which starts with an empty memo
+    services.datasets.update('interactions', lambda df: df.copy())
+    assert services.get_overdue_view(as_of='2024-06-30') is not first
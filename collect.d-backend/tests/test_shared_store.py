@@ -0,0 +1,53 @@
+import os
+import time
+import pytest
+import pandas as pd
+from app.data_loaders import file_signature
+
+shared_store = pytest.importorskip('app.shared_store')
+
+
+def write_version(csv_path, amounts, mtime_ns):
+    pd.DataFrame({'invoice_id': [f"INV{i}" for i in range(len(amounts))], 'amount': amounts}).to_csv(csv_path, index=False)
+    os.utime(csv_path, ns=(mtime_ns, mtime_ns))
+
+
+def test_dataset_is_published_once_and_mapped_read_only(tmp_path):
+    csv_path = str(tmp_path / 'invoices.csv')
+    write_version(csv_path, [1.0, 2.0], time.time_ns())
+    parses = []
+
+    def parse(path):
+        parses.append(path)
+        return pd.read_csv(path)
+
+    worker_a = shared_store.SharedDatasetStore(str(tmp_path / 'shm'))
+    worker_b = shared_store.SharedDatasetStore(str(tmp_path / 'shm'))
+    df_a = worker_a.load(csv_path, file_signature(csv_path), parse=parse)
+    df_b = worker_b.load(csv_path, file_signature(csv_path), parse=parse)
+
+    assert len(parses) == 1
+    assert df_b['amount'].tolist() == [1.0, 2.0]
+    assert df_a['invoice_id'].tolist() == ['INV0', 'INV1']
+    # Numeric columns are views of the shared mapping, not private copies
+    assert not df_b['amount'].to_numpy().flags.writeable
+
+
+def test_old_generation_retired_after_last_reader_detaches(tmp_path):
+    csv_path = str(tmp_path / 'invoices.csv')
+    root = str(tmp_path / 'shm')
+    write_version(csv_path, [1.0], time.time_ns())
+    worker_a = shared_store.SharedDatasetStore(root)
+    worker_b = shared_store.SharedDatasetStore(root)
+    old_path = worker_a.generation_path(csv_path, file_signature(csv_path))
+    worker_a.load(csv_path, file_signature(csv_path))
+    worker_b.load(csv_path, file_signature(csv_path))
+
+    # A newer source version (future mtime so it is newer than any sidecar written above)
+    write_version(csv_path, [1.0, 5.0], time.time_ns() + 10_000_000_000)
+    reloaded = worker_a.load(csv_path, file_signature(csv_path))
+    assert reloaded['amount'].tolist() == [1.0, 5.0]
+    assert os.path.exists(old_path)  # worker_b is still attached
+
+    worker_b.load(csv_path, file_signature(csv_path))
+    assert not os.path.exists(old_path)
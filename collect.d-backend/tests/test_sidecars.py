@@ -0,0 +1,47 @@
+import os
+import pytest
+import pandas as pd
+from app import sidecars
+
+pytestmark = pytest.mark.skipif(not sidecars.sidecars_available(), reason='pyarrow not installed')
+
+
+def test_read_dataset_builds_and_reuses_sidecar(tmp_path):
+    csv_path = tmp_path / 'invoices.csv'
+    pd.DataFrame({'invoice_id': ['INV1', 'INV2'], 'due_date': ['2025-01-01', '2025-02-01']}).to_csv(csv_path, index=False)
+
+    def parse(path):
+        df = pd.read_csv(path)
+        df['due_date'] = pd.to_datetime(df['due_date'])
+        return df
+
+    first = sidecars.read_dataset(str(csv_path), parse=parse)
+    assert sidecars.is_fresh(str(csv_path))
+
+    def fail(path):
+        raise AssertionError('CSV should not be reparsed while the sidecar is fresh')
+
+    second = sidecars.read_dataset(str(csv_path), parse=fail)
+    pd.testing.assert_frame_equal(first, second)
+    assert second['due_date'].dtype.kind == 'M'
+
+
+def test_sidecar_goes_stale_when_csv_changes(tmp_path):
+    csv_path = tmp_path / 'payments.csv'
+    pd.DataFrame({'payment_id': ['P1']}).to_csv(csv_path, index=False)
+    sidecars.read_dataset(str(csv_path))
+
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, os.stat(sidecars.sidecar_path(str(csv_path))).st_mtime_ns + 1_000_000_000))
+    assert not sidecars.is_fresh(str(csv_path))
+
+
+def test_build_sidecars_preserves_implicit_index(tmp_path):
+    # Rows with one more field than the header make pandas use the first column as index
+    (tmp_path / 'customer_master.csv').write_text('customer_id,address_line1,city\nCUST1,24, MG Road,Mumbai\n')
+    results = dict(sidecars.build_sidecars(str(tmp_path)))
+    assert results == {'customer_master.csv': 'built'}
+
+    expected = pd.read_csv(tmp_path / 'customer_master.csv')
+    pd.testing.assert_frame_equal(sidecars.read_sidecar(str(tmp_path / 'customer_master.csv')), expected)
+    assert dict(sidecars.build_sidecars(str(tmp_path))) == {'customer_master.csv': 'fresh'}
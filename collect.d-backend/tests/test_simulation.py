@@ -0,0 +1,110 @@
+import json
+import pandas as pd
+import pytest
+from app import services, simulation
+from app.simulation import build_model, simulate
+from app.views import ReportViewSet
+
+AS_OF = pd.Timestamp('2025-04-20')
+
+
+def make_history():
+    # 'Fast' resolved 8 of 10 cases within 10 days; 'Slow' 1 of 10 after months
+    cases = pd.DataFrame({
+        'case_id': [f'CASE{i}' for i in range(24)],
+        'collector_id': ['R1', 'R2'] * 12,
+        'collection_strategy': ['Fast'] * 10 + ['Slow'] * 10 + ['Slow'] * 4,
+        'status': ['Resolved'] * 8 + ['Open'] * 2 + ['Resolved'] + ['Open'] * 9 + ['Open'] * 4,
+        'case_open_date': pd.to_datetime(['2025-01-01'] * 20 + ['2025-04-01'] * 4),
+        'resolution_date': pd.to_datetime(['2025-01-10'] * 8 + [None] * 2 + ['2025-04-01'] + [None] * 13),
+        'amount_due': [1000.0] * 24,
+    })
+    strategies = pd.DataFrame({
+        'strategy_name': ['Fast', 'Slow', 'Unused'],
+        'total_cases': [10, 14, 0],
+        'resolved_cases': [8, 1, 0],
+        'total_amount_collected': [4000.0, 1000.0, 0.0],
+        'avg_case_amount': [1000.0, 1000.0, 0.0],
+    })
+    performance = pd.DataFrame({
+        'collector_id': ['R1', 'R2'],
+        'total_cases': [12, 12],
+        'resolved_cases': [9, 0],
+    })
+    return cases, strategies, performance
+
+
+def make_model():
+    cases, strategies, performance = make_history()
+    return build_model(cases, strategies, performance, open_ar=100_000.0, dso=60.0, as_of=AS_OF)
+
+
+def test_model_reflects_history():
+    model = make_model()
+    assert model['strategies'] == ['Fast', 'Slow', 'Unused']
+    hazard = model['hazard_shape'] / model['hazard_rate']
+    assert hazard[0] > 10 * hazard[1]
+    assert model['recovery_mean'][0] < model['recovery_mean'][1]  # Fast settled for half
+    assert len(model['amount']) == 15 and model['collectors'] == 2
+    r1 = model['collector_factor'][0]
+    assert r1 > 1 > model['collector_factor'][1]
+
+
+def test_strategy_and_staffing_change_outcomes():
+    model = make_model()
+    result = simulate(model, strategy='Fast', apply_to='Slow', trials=4000, seed=1)
+    assert result['difference']['resolved_cases']['mean'] > 5
+    assert result['difference']['dso']['high'] <= 0
+    same = simulate(model, trials=500, seed=1)
+    assert same['difference']['recovered_amount'] == {'mean': 0.0, 'low': 0.0, 'median': 0.0, 'high': 0.0}
+    fewer = simulate(model, collectors_delta=-1, trials=2000, seed=1)
+    assert fewer['difference']['resolved_cases']['mean'] < 0
+    interval = result['results']['scenario']['recovered_amount']
+    assert interval['low'] <= interval['median'] <= interval['high']
+    with pytest.raises(ValueError):
+        simulate(model, strategy='Nope')
+    with pytest.raises(ValueError):
+        simulate(model, collectors_delta=-2)
+    with pytest.raises(simulation.ScenarioError):
+        simulate(model, seed=-1)
+
+
+def test_seed_reproduces_across_batches_and_pool(monkeypatch):
+    model = make_model()
+    monkeypatch.setattr(simulation, 'BATCH_CELLS', 15 * 300)  # several batches
+    serial = simulate(model, strategy='Fast', trials=1000, seed=11, workers=1)
+    assert simulate(model, strategy='Fast', trials=1000, seed=11, workers=1) == serial
+    monkeypatch.setattr(simulation, 'PARALLEL_MIN_CELLS', 1)
+    assert simulate(model, strategy='Fast', trials=1000, seed=11, workers=2) == serial
+    assert simulate(model, strategy='Fast', trials=1000, seed=12, workers=1) != serial
+
+
+def test_simulate_endpoint(api_request):
+    view = ReportViewSet.as_view({'post': 'simulate'})
+    payload = {'strategy': 'Intensive Collection', 'collectors_delta': 3, 'trials': 200, 'seed': 5}
+    request = api_request('post', '/api/reports/simulate/', payload, format='json')
+    response = view(request)
+    response.render()
+    assert response.status_code == 200
+    body = json.loads(response.content)
+    assert body['seed'] == 5 and body['trials'] == 200 and body['open_cases'] > 0
+    assert set(body['results']['scenario']) == {'recovered_amount', 'resolved_cases', 'dso'}
+
+    bad = api_request('post', '/api/reports/simulate/', {'strategy': 'Nope'}, format='json')
+    assert view(bad).status_code == 400
+    malformed = api_request('post', '/api/reports/simulate/', {'trials': 'many'}, format='json')
+    assert view(malformed).status_code == 400
+    negative_seed = view(api_request('post', '/api/reports/simulate/', {'seed': -1, 'trials': 10}, format='json'))
+    assert negative_seed.status_code == 400
+    listed = view(api_request('post', '/api/reports/simulate/', [{'trials': 10}], format='json'))
+    listed.render()
+    assert listed.status_code == 400 and 'JSON object' in json.loads(listed.content)['error']
+
+
+def test_simulate_endpoint_reports_internal_failures_as_500(monkeypatch, api_request):
+    def broken(**scenario):
+        raise ValueError("cannot convert float NaN to integer")
+
+    monkeypatch.setattr(services, 'simulate_scenario_logic', broken)
+    request = api_request('post', '/api/reports/simulate/', {'trials': 200}, format='json')
+    assert ReportViewSet.as_view({'post': 'simulate'})(request).status_code == 500
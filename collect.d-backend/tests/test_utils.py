@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from app.utils import aging_buckets, aging_labels, calculate_aging_dt
+
+
+def test_aging_buckets_match_calculate_aging_dt():
+    today = pd.Timestamp(datetime.now().date())
+    offsets = [-5, 0, 1, 30, 31, 60, 61, 90, 91, 400]
+    due = pd.Series([today - timedelta(days=d) for d in offsets] + [pd.NaT], index=np.arange(10, 21))
+    buckets = aging_buckets(due)
+    assert list(buckets.index) == list(due.index)
+    assert list(buckets.astype(str)) == [calculate_aging_dt(d) for d in due]
+    assert list(buckets.cat.categories) == aging_labels()
+
+
+def test_aging_buckets_with_as_of_and_custom_boundaries():
+    due = pd.Series(pd.to_datetime(['2024-01-01 15:30', '2023-12-10 00:00', '2023-10-01 09:00']))
+    buckets = aging_buckets(due, as_of='2024-01-01', boundaries=(0, 15, 45))
+    assert list(buckets.astype(str)) == ['Current', '16-45 Days', '46+ Days']
+    assert aging_labels((0, 15, 45)) == ['Current', '1-15 Days', '16-45 Days', '46+ Days', 'N/A']
+    # 45 days past due is still in 16-45; the open-ended bucket starts at 46
+    edge = pd.Series(pd.to_datetime(['2023-11-17', '2023-11-16']))
+    assert list(aging_buckets(edge, as_of='2024-01-01', boundaries=(0, 15, 45)).astype(str)) == ['16-45 Days', '46+ Days']
+    assert aging_labels()[-2] == '90+ Days'
@@ -0,0 +1,56 @@
+import json
+import pandas as pd
+from app.data_loaders import data_loader
+from app.validation import validate_invoices
+from app.views import InvoiceViewSet
+
+
+def make_book():
+    invoices = pd.DataFrame({
+        'invoice_id': ['INV1', 'INV2', 'INV3', 'INV4', 'INV5'],
+        'invoice_amount': [300.0, 100.0, 100.0, 100.0, 50.0],
+        'tax_amount': [54.0, 18.0, 20.0, 12.0, 9.0],
+        'total_amount': [354.0, 118.0, 120.0, 112.0, 59.0],
+        'tax_type': pd.Categorical(['GST18', 'GST18', 'GST18', 'GST18', 'GST18']),
+    })
+    line_items = pd.DataFrame({
+        'invoice_id': ['INV1', 'INV1', 'INV2', 'INV3', 'INV4', 'INV9'],
+        'amount': [100.0, 200.01, 90.0, 100.0, 100.0, 10.0],
+        'tax_rate': ['18%', '18%', '18%', '18%', '12%', '18%'],
+        'tax_amount': [18.0, 36.0, 16.2, 20.0, 12.0, 1.8],
+        'total_amount': [118.0, 236.01, 106.2, 120.0, 112.0, 11.8],
+    })
+    return invoices, line_items
+
+
+def test_flags_header_and_rate_mismatches():
+    invoices, line_items = make_book()
+    flagged, summary = validate_invoices(invoices, line_items)
+    issues = dict(zip(flagged['invoice_id'], flagged['issues']))
+    assert issues == {
+        'INV2': 'amount_mismatch,tax_mismatch,total_mismatch',
+        'INV3': 'line_tax_mismatch',
+        'INV4': 'rate_mismatch',
+        'INV5': 'no_line_items',
+    }
+    # INV1 is a cent off over two lines, which is within tolerance
+    assert summary['orphan_line_items'] == 1 and summary['flagged_invoices'] == 4
+    assert flagged.set_index('invoice_id').at['INV2', 'line_amount'] == 90.0
+
+
+def test_generated_invoices_match_their_line_items():
+    flagged, summary = validate_invoices(data_loader.get_invoice_data(), data_loader.get_invoice_line_items())
+    assert flagged.empty and summary['line_items'] > summary['invoices']
+
+
+def test_validation_endpoint(api_request):
+    view = InvoiceViewSet.as_view({'get': 'validation'})
+    request = api_request('get', '/api/invoices/validation/', {'limit': 10})
+    response = view(request)
+    response.render()
+    assert response.status_code == 200
+    body = json.loads(response.content)
+    assert body['summary']['flagged_invoices'] == 0 and body['invoices'] == []
+
+    bad = api_request('get', '/api/invoices/validation/', {'limit': '-1'})
+    assert view(bad).status_code == 400
@@ -0,0 +1,41 @@
+import pandas as pd
+from app.data_loaders import DataLoader, DatasetCache
+from app.warmup import warm_up, format_timing_table
+
+
+def make_loader(tmp_path):
+    for name in ('alpha.csv', 'beta.csv', 'gamma.csv'):
+        pd.DataFrame({'value': range(100)}).to_csv(tmp_path / name, index=False)
+    return DataLoader(data_dir=str(tmp_path), cache=DatasetCache())
+
+
+def test_warm_up_loads_every_dataset_into_cache(tmp_path):
+    loader = make_loader(tmp_path)
+    results = warm_up(loader=loader, max_workers=2, include_services=False)
+
+    assert sorted(r['dataset'] for r in results) == ['alpha.csv', 'beta.csv', 'gamma.csv']
+    assert all(r['error'] is None and r['rows'] == 100 for r in results)
+    assert set(loader.cache_stats()['datasets']) == {'alpha.csv', 'beta.csv', 'gamma.csv'}
+    assert 'alpha.csv' in format_timing_table(results)
+
+
+def test_warm_up_reports_failures_per_dataset(tmp_path):
+    loader = make_loader(tmp_path)
+    results = warm_up(loader=loader, filenames=['alpha.csv', 'missing.csv'], include_services=False)
+    errors = {r['dataset']: r['error'] for r in results}
+    assert errors['alpha.csv'] is None
+    assert 'missing.csv' in errors['missing.csv']
+
+
+def test_warm_up_unknown_mode_falls_back_to_threads(tmp_path, capsys):
+    loader = make_loader(tmp_path)
+    results = warm_up(loader=loader, mode='fork', include_services=False)
+    assert all(r['error'] is None for r in results) and len(results) == 3
+    assert "unknown mode 'fork'" in capsys.readouterr().out
+
+
+def test_warm_up_process_mode(tmp_path, monkeypatch):
+    loader = make_loader(tmp_path)
+    monkeypatch.setattr('app.warmup.PROCESS_MODE_MIN_BYTES', 0)
+    results = warm_up(loader=loader, max_workers=2, mode='process', include_services=False)
+    assert all(r['error'] is None for r in results)
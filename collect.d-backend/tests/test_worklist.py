@@ -0,0 +1,93 @@
+import json
+import numpy as np
+import pandas as pd
+from app import services
+from app.views import CollectionViewSet
+from app.worklist import Worklist, priority_scores
+
+AS_OF = pd.Timestamp('2025-04-20')
+
+
+def make_accounts():
+    return pd.DataFrame({
+        'invoice_id': ['INV1', 'INV2', 'INV3', 'INV4', 'INV5'],
+        'customer_id': ['C1', 'C1', 'C2', 'C3', 'C3'],
+        'customer_name': ['One', 'One', 'Two', 'Three', 'Three'],
+        'agent_id': ['A', 'B', 'A', 'A', 'B'],
+        'total_amount': [1_000_000.0, 50_000.0, 200_000.0, 5_000.0, 900_000.0],
+        'due_date': pd.to_datetime(['2025-01-01', '2025-04-01', '2025-02-15', '2025-04-10', '2024-12-01']),
+        'days_overdue': [109, 19, 64, 10, 140],
+        'aging_bucket': ['90+ Days', '1-30 Days', '61-90 Days', '1-30 Days', '90+ Days'],
+        'risk_category': ['High Risk', 'High Risk', 'Low Risk', None, 'Medium Risk'],
+        'last_contact_date': pd.to_datetime(['2025-03-01', '2025-03-01', None, '2025-04-19', '2025-04-01']),
+        'last_promise_date': pd.to_datetime([None] * 5),
+        'promise_active': [False] * 5,
+    }).assign(priority_score=lambda df: priority_scores(
+        df['total_amount'], df['days_overdue'], df['risk_category'],
+        (AS_OF - df['last_contact_date']).dt.days, df['promise_active']))
+
+
+def test_priority_score_factors():
+    base = priority_scores([100_000], [30], ['Low Risk'], [10], [False])[0]
+    assert priority_scores([1_000_000], [30], ['Low Risk'], [10], [False])[0] > base
+    assert priority_scores([100_000], [90], ['Low Risk'], [10], [False])[0] > base
+    assert priority_scores([100_000], [30], ['High Risk'], [10], [False])[0] > base
+    assert priority_scores([100_000], [30], ['Low Risk'], [np.nan], [False])[0] > base
+    assert priority_scores([100_000], [30], ['Low Risk'], [10], [True])[0] == round(base * 0.5, 2)
+
+
+def test_top_returns_highest_scores_per_agent():
+    accounts = make_accounts()
+    worklist = Worklist(accounts, AS_OF)
+    for agent in (None, 'A', 'B'):
+        subset = accounts if agent is None else accounts[accounts['agent_id'] == agent]
+        expected = list(subset.sort_values('priority_score', ascending=False)['invoice_id'])
+        assert [item['invoice_id'] for item in worklist.top(agent, 10)] == expected
+        assert [item['invoice_id'] for item in worklist.top(agent, 2)] == expected[:2]
+    assert worklist.top('nobody', 5) == []
+    assert worklist.size('A') == 3
+
+
+def test_record_interaction_rescores_only_that_customer():
+    worklist = Worklist(make_accounts(), AS_OF)
+    before = {item['invoice_id']: item['priority_score'] for item in worklist.top(None, 10)}
+
+    assert worklist.record_interaction('C1', '2025-04-20', 'Promise to Pay') == 2
+    after = {item['invoice_id']: item for item in worklist.top(None, 10)}
+    assert len(after) == 5  # stale heap entries are never returned
+    assert after['INV1']['priority_score'] < before['INV1'] and after['INV1']['promise_active']
+    assert after['INV1']['last_contact_date'] == '2025-04-20'
+    assert all(after[inv]['priority_score'] == before[inv] for inv in ('INV3', 'INV4', 'INV5'))
+
+    # Re-scoring to the same value must not duplicate the account
+    worklist.record_interaction('C1', '2025-04-20', 'Promise to Pay')
+    assert [item['invoice_id'] for item in worklist.top('A', 10)].count('INV1') == 1
+    assert worklist.record_interaction('C-unknown') == 0
+
+
+def test_logged_communication_updates_live_worklist(tmp_path, monkeypatch):
+    monkeypatch.setattr(services, 'INTERACTIONS_FILE', str(tmp_path / 'interactions.csv'))
+    worklist = services.get_worklist()
+    target = worklist.top(None, 1)[0]
+
+    ok, _ = services.log_communication_logic(target['customer_id'], 'Call', 'REP000001', 'Promised to pay Friday',
+                                             disposition='Promise to Pay')
+    assert ok
+    assert services.get_worklist() is worklist  # updated in place, not rebuilt
+    item = next(i for i in worklist.top(None, len(worklist)) if i['invoice_id'] == target['invoice_id'])
+    assert item['promise_active'] and item['priority_score'] < target['priority_score']
+
+
+def test_worklist_endpoint(api_request):
+    view = CollectionViewSet.as_view({'get': 'worklist'})
+    request = api_request('get', '/api/collections/worklist/', {'agent': 'REP000039', 'limit': 5})
+    response = view(request)
+    response.render()
+    assert response.status_code == 200
+    body = json.loads(response.content)
+    scores = [item['priority_score'] for item in body['results']]
+    assert len(scores) <= 5 and scores == sorted(scores, reverse=True)
+    assert all(item['agent_id'] == 'REP000039' for item in body['results'])
+
+    bad = api_request('get', '/api/collections/worklist/', {'limit': 'x'})
+    assert view(bad).status_code == 400
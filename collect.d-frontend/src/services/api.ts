@@ -85,74 +85,169 @@ export const authService = {
     },
 };
 
+// Server-side filters (e.g. customer_id, due_date__lt), ordering, page/page_size and
+// fields/exclude (comma-separated column lists) supported by the /data/* endpoints. With page or page_size the response is
+// { count, page, page_size, num_pages, results } instead of a plain array.
+export type DataQueryParams = Record<string, string | number>;
+
 export const dataService = {
-    getCustomers: async () => {
-        const response = await api.get('/data/customers/');
+    getCustomers: async (params?: DataQueryParams) => {
+        const response = await api.get('/data/customers/', { params });
+        return response.data;
+    },
+
+    getInvoices: async (params?: DataQueryParams) => {
+        const response = await api.get('/data/invoices/', { params });
+        return response.data;
+    },
+
+    getPayments: async (params?: DataQueryParams) => {
+        const response = await api.get('/data/payments/', { params });
+        return response.data;
+    },
+
+    getCollectionCases: async (params?: DataQueryParams) => {
+        const response = await api.get('/data/collection-cases/', { params });
+        return response.data;
+    },
+
+    getDisputes: async (params?: DataQueryParams) => {
+        const response = await api.get('/data/disputes/', { params });
+        return response.data;
+    },
+
+    getRiskScores: async (params?: DataQueryParams) => {
+        const response = await api.get('/data/risk-scores/', { params });
+        return response.data;
+    },
+
+    getCustomerInteractions: async (params?: DataQueryParams) => {
+        const response = await api.get('/data/customer-interactions/', { params });
+        return response.data;
+    },
+
+    getOrders: async (params?: DataQueryParams) => {
+        const response = await api.get('/data/orders/', { params });
+        return response.data;
+    },
+
+    getGLEntries: async (params?: DataQueryParams) => {
+        const response = await api.get('/data/gl-entries/', { params });
+        return response.data;
+    },
+
+    getInvoiceLineItems: async (params?: DataQueryParams) => {
+        const response = await api.get('/data/invoice-line-items/', { params });
+        return response.data;
+    },
+
+    getPaymentPlans: async (params?: DataQueryParams) => {
+        const response = await api.get('/data/payment-plans/', { params });
         return response.data;
     },
 
-    getInvoices: async () => {
-        const response = await api.get('/data/invoices/');
+    getDSOAnalytics: async (params?: DataQueryParams) => {
+        const response = await api.get('/data/dso-analytics/', { params });
         return response.data;
     },
 
-    getPayments: async () => {
-        const response = await api.get('/data/payments/');
+    getStrategyEffectiveness: async (params?: DataQueryParams) => {
+        const response = await api.get('/data/strategy-effectiveness/', { params });
         return response.data;
     },
 
-    getCollectionCases: async () => {
-        const response = await api.get('/data/collection-cases/');
+    getCollectionPerformance: async (params?: DataQueryParams) => {
+        const response = await api.get('/data/collection-performance/', { params });
+        return response.data;
+    },
+};
+
+export const reportService = {
+    // Open AR from the pre-aggregated cube, e.g. { group_by: 'state,aging_bucket', sales_rep_id: 'REP000027' }
+    getARCube: async (params?: DataQueryParams) => {
+        const response = await api.get('/reports/cube/', { params });
         return response.data;
     },
 
-    getDisputes: async () => {
-        const response = await api.get('/data/disputes/');
+    // Expected collections by day ('D') or week ('W') from due dates, payment plans and payment history
+    getForecast: async (params?: { freq?: 'D' | 'W'; horizon?: number; as_of?: string }) => {
+        const response = await api.get('/reports/forecast/', { params });
         return response.data;
     },
 
-    getRiskScores: async () => {
-        const response = await api.get('/data/risk-scores/');
+    // Aging bucket transition matrices and roll rates over step-day windows of the daily snapshots
+    getRollRates: async (params?: { start?: string; end?: string; step?: number }) => {
+        const response = await api.get('/reports/roll-rates/', { params });
         return response.data;
     },
 
-    getCustomerInteractions: async () => {
-        const response = await api.get('/data/customer-interactions/');
+    // Monte Carlo what-if of a strategy and/or staffing change; pass the returned seed to reproduce a run
+    simulate: async (scenario: {
+        strategy?: string;
+        apply_to?: string;
+        collectors_delta?: number;
+        horizon_days?: number;
+        trials?: number;
+        seed?: number;
+        confidence?: number;
+    }) => {
+        const response = await api.post('/reports/simulate/', scenario);
         return response.data;
     },
 
-    getOrders: async () => {
-        const response = await api.get('/data/orders/');
+    // GL accounts-receivable postings reconciled against invoices and payments
+    getReconciliation: async (params?: { tolerance?: number; limit?: number }) => {
+        const response = await api.get('/reports/reconciliation/', { params });
         return response.data;
     },
+};
 
-    getGLEntries: async () => {
-        const response = await api.get('/data/gl-entries/');
+export const collectionsService = {
+    // Next accounts to work, highest priority first; omit agent for the whole team
+    getWorklist: async (params?: { agent?: string; limit?: number }) => {
+        const response = await api.get('/collections/worklist/', { params });
         return response.data;
     },
 
-    getInvoiceLineItems: async () => {
-        const response = await api.get('/data/invoice-line-items/');
+    // Collector load-balance metrics, current vs. a dry-run rebalance
+    getWorkload: async (params?: { capacity?: number; diff_limit?: number }) => {
+        const response = await api.get('/collections/workload/', { params });
         return response.data;
     },
+};
 
-    getPaymentPlans: async () => {
-        const response = await api.get('/data/payment-plans/');
+export const riskService = {
+    // Rescore customers touched since the last run; { full: true } rescores the whole book
+    recompute: async (options?: { full?: boolean; write?: boolean }) => {
+        const response = await api.post('/risk/recompute/', options ?? {});
         return response.data;
     },
 
-    getDSOAnalytics: async () => {
-        const response = await api.get('/data/dso-analytics/');
+    getCustomerRisk: async (customerId: string) => {
+        const response = await api.get(`/risk/${customerId}/`);
         return response.data;
     },
+};
 
-    getStrategyEffectiveness: async () => {
-        const response = await api.get('/data/strategy-effectiveness/');
+export const invoiceService = {
+    // Invoices whose header totals or tax disagree with their line items
+    getValidation: async (params?: { limit?: number }) => {
+        const response = await api.get('/invoices/validation/', { params });
         return response.data;
     },
+};
 
-    getCollectionPerformance: async () => {
-        const response = await api.get('/data/collection-performance/');
+export const paymentService = {
+    // Match a bank file (CSV upload) or a list of payments against open invoices; dry_run previews only
+    applyBatch: async (batch: File | Record<string, unknown>[], dryRun = false) => {
+        if (batch instanceof File) {
+            const form = new FormData();
+            form.append('file', batch);
+            form.append('dry_run', String(dryRun));
+            const response = await api.post('/payments/apply/', form);
+            return response.data;
+        }
+        const response = await api.post('/payments/apply/', { payments: batch, dry_run: dryRun });
         return response.data;
     },
 };